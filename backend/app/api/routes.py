@@ -1,148 +1,425 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import JSONResponse
-from typing import Dict, Any
-from datetime import datetime
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, ORJSONResponse
+from typing import Dict, Any, Optional
+from datetime import datetime, date
+import asyncio
+import functools
+import logging
 
+from app.config import settings
 from app.models.birth_details import BirthDetails
 
-from app.schemas import PredictionRequest, PredictionResponse, ChartResponse
-from app.services.chart_calculator import ChartCalculator
-from app.services.rajanadi_engine import RajanadiEngine
-from app.services.ephemeris_service import EphemerisService
-from app.services.ollama_service import OllamaService
-from app.services.gemstone_service import gemstone_service
-from app.services.monthly_transit_service import MonthlyTransitService
+from app.schemas import (
+    PredictionRequest, PredictionResponse, ChartResponse, TransitFeedRequest,
+    MultiPredictionRequest, MultiPredictionResponse
+)
+from app.utils.single_flight import SingleFlight
+from app.utils.timing import stage, STAGE_DEGRADED
+from app.utils.http_cache import (
+    cacheable_json, fingerprint_etag, not_modified, tagged_json, CALENDAR_MAX_AGE
+)
+from app.services import chart_tasks
+from app.services.compute_pool import compute_pool, ComputePoolFullError
+from app.services.errors import GeocodingUnavailableError
+from app.services.caches import prediction_cache, get_cache_metrics
+from app.services.registry import services
+from app.services.warmup import warmup_service
+from app.services.llm_scheduler import (
+    llm_scheduler, QueueFullError, PRIORITY_INTERACTIVE, PRIORITY_STANDARD
+)
 
-from app.services.comprehensive_transit_service import ComprehensiveTransitService
-from app.services.rules_matcher import rules_matcher
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-# Initialize services
-chart_calculator = ChartCalculator()
-rajanadi_engine = RajanadiEngine()
-ephemeris_service = EphemerisService()
-ollama_service = OllamaService()
-monthly_transit_service = MonthlyTransitService()
-comprehensive_transit_service = ComprehensiveTransitService()
+# Identical predictions in flight (double-clicks, several tabs) share one generation
+prediction_flights = SingleFlight()
+
+async def _shared_prediction(fingerprint: str, generate, cacheable: bool = True):
+    """
+    One generation per fingerprint: identical requests in this process share
+    it, and with cacheable=True it is cached for every worker (failed
+    generations excepted)
+    
+    Args:
+        fingerprint: OllamaService.prediction_fingerprint of the request
+        generate: Zero-argument coroutine factory (the scheduler submission)
+        cacheable: False for follow-up questions, which depend on the session
+    """
+    if not cacheable:
+        return await prediction_flights.do(fingerprint, generate)
+    # Prompts name the current month, so a cached reading lasts at most until it ends
+    key = f'{datetime.utcnow():%Y-%m}:{fingerprint}'
+    return await prediction_flights.do(fingerprint, lambda: prediction_cache.aget_or_compute(
+        key, generate, cacheable=services.ollama_service.is_cacheable
+    ))
+
+# Returned by _optional_stage in place of a result
+_DEGRADED = object()
+
+async def _optional_stage(name: str, func, *args) -> Any:
+    """
+    Run one fanned-out chart stage on the compute pool within its timeout
+    
+    Returns:
+        The stage's result, or _DEGRADED after a timeout or error
+        
+    Raises:
+        ComputePoolFullError: Overload is not degraded; the request gets 503
+    """
+    timeout = settings.CHART_STAGE_TIMEOUTS.get(name, 10.0)
+    with stage(name):
+        try:
+            return await asyncio.wait_for(compute_pool.run(func, *args), timeout)
+        except ComputePoolFullError:
+            raise
+        except asyncio.TimeoutError:
+            logger.warning("Chart stage %s timed out after %.1fs", name, timeout)
+            STAGE_DEGRADED.labels(stage=name, reason='timeout').inc()
+        except Exception as e:
+            logger.warning("Chart stage %s failed: %s", name, e)
+            STAGE_DEGRADED.labels(stage=name, reason='error').inc()
+    return _DEGRADED
 
 @router.post("/calculate-chart", response_model=ChartResponse)
-async def calculate_chart(birth_details: BirthDetails):
-    """Calculate natal and navamsa charts with transit information"""
+async def calculate_chart(birth_details: BirthDetails, include_calendar: bool = False,
+                          if_none_match: Optional[str] = Header(None)):
+    """
+    Calculate natal and navamsa charts with the user's future transits
+    
+    Calendar data shared by every user (monthly transits, sign changes,
+    retrograde periods) is served by the cacheable /calendar endpoints;
+    include_calendar=true embeds it as before. The ETag covers the resolved
+    birth moment and today's date (future transits start today), so a
+    matching If-None-Match is answered with 304 before any calculation.
+    """
     try:
-        # Parse birth details
-        # Parse birth details
-        year = birth_details.date_of_birth.year
-        month = birth_details.date_of_birth.month
-        day = birth_details.date_of_birth.day
-        
-        hour = birth_details.time_of_birth.hour
-        minute = birth_details.time_of_birth.minute
-        second = birth_details.time_of_birth.second
-        
-        # Calculate natal chart
-        natal = chart_calculator.calculate_natal_chart(
-            year, month, day, hour, minute, second,
-            birth_details.latitude, birth_details.longitude
+        # Resolve missing coordinates/timezone and convert the local birth time to UTC
+        resolve = functools.partial(
+            services.timezone_service.resolve_birth_moment,
+            birth_details.place_of_birth, birth_details.date_of_birth, birth_details.time_of_birth,
+            birth_details.latitude, birth_details.longitude, birth_details.timezone
         )
+        with stage('resolve_place'):
+            if birth_details.latitude is None or birth_details.longitude is None:
+                # Geocoding may wait on Nominatim: not on the event loop, and not
+                # on a compute worker either
+                birth_place = await run_in_threadpool(resolve)
+            else:
+                birth_place = resolve()
+        utc = birth_place['birth_time_utc']
         
-        # Calculate navamsa (D9) chart
-        navamsa = chart_calculator.calculate_navamsa(natal)
+        etag = fingerprint_etag('chart', birth_place, datetime.utcnow().date(), include_calendar)
+        cached = not_modified(etag, if_none_match)
+        if cached:
+            return cached
         
-        # Identify authority planet using Raja Nadi rules
-        authority = rajanadi_engine.identify_authority_planet(natal)
+        # Skyfield/numpy stages run on the compute pool so the event loop stays free
+        # Calculate natal chart (everything else depends on it)
+        with stage('natal'):
+            natal = await compute_pool.run(
+                chart_tasks.natal_chart, utc, birth_place['latitude'], birth_place['longitude']
+            )
         
-        # Calculate future transits
-        future_transits = ephemeris_service.get_future_transits(natal, months_ahead=12)
+        # Fan out the independent stages; one that times out or fails is left out
+        # of the response (listed in "degraded") instead of failing it
+        current_year = datetime.utcnow().year
+        stages = {
+            'navamsa': (chart_tasks.navamsa_chart, natal),
+            'authority': (chart_tasks.authority_planet, natal),
+            'future_transits': (chart_tasks.future_transits, natal, 12)
+        }
+        if include_calendar:
+            # Pre-encoded once per month/year and embedded verbatim
+            stages['monthly_transits'] = (chart_tasks.monthly_transits_section, 6)
+            stages['sign_changes'] = (chart_tasks.sign_changes_section, current_year)
+            stages['retrograde_periods'] = (chart_tasks.retrograde_periods_section, current_year)
         
-        # Calculate monthly transits
-        monthly_transits = monthly_transit_service.get_monthly_transits(months_ahead=6)
+        outcomes = await asyncio.gather(*(_optional_stage(name, *call) for name, call in stages.items()))
+        results = dict(zip(stages, outcomes))
+        degraded = [name for name, result in results.items() if result is _DEGRADED]
         
-        # Get comprehensive transit data (sign changes and retrograde periods)
-        current_year = datetime.now().year
-        sign_changes = comprehensive_transit_service.get_sign_changes(year=current_year)
-        retrograde_periods = comprehensive_transit_service.get_retrograde_periods(year=current_year)
+        navamsa = None if 'navamsa' in degraded else results['navamsa']
+        authority = None if 'authority' in degraded else results['authority']
+        future_transits = [] if 'future_transits' in degraded else results['future_transits']
         
         # Get gemstone recommendation for authority planet
-        gemstone_data = gemstone_service.get_gemstone_recommendation(authority)
+        lucky_gemstone = None
+        if authority:
+            with stage('gemstone'):
+                gemstone_data = services.gemstone_service.get_gemstone_recommendation(authority)
+            
+            # Format gemstone info properly for frontend
+            lucky_gemstone = {
+                "gemstone": gemstone_data.get('primary', 'Consult astrologer'),
+                "planet": authority,
+                "benefits": gemstone_data.get('benefits', ''),
+                "finger": gemstone_data.get('finger', 'As per astrologer'),
+                "day": gemstone_data.get('day', 'Auspicious day'),
+                "mantra": gemstone_data.get('mantra', '')
+            }
         
-        # Format gemstone info properly for frontend
-        lucky_gemstone = {
-            "gemstone": gemstone_data.get('primary', 'Consult astrologer'),
-            "planet": authority,
-            "benefits": gemstone_data.get('benefits', ''),
-            "finger": gemstone_data.get('finger', 'As per astrologer'),
-            "day": gemstone_data.get('day', 'Auspicious day'),
-            "mantra": gemstone_data.get('mantra', '')
+        response = {
+            "natal": natal,
+            "navamsa": navamsa,
+            "authority_planet": authority,
+            "future_transits": future_transits[:20],  # Top 20 upcoming transits
+            "lucky_gemstone": lucky_gemstone,  # Use formatted dict
+            "birth_place": birth_place
         }
+        for name in ('monthly_transits', 'sign_changes', 'retrograde_periods'):
+            if name in results and name not in degraded:
+                response[name] = results[name].fragment()
         
-        return ChartResponse(
-            natal=natal,
-            navamsa=navamsa,
-            authority_planet=authority,
-            future_transits=future_transits[:20],  # Top 20 upcoming transits
-            monthly_transits=monthly_transits,  # Monthly planetary positions
-            sign_changes=sign_changes,  # Major planet sign changes
-            retrograde_periods=retrograde_periods,  # Retrograde periods table
-            lucky_gemstone=lucky_gemstone  # Use formatted dict
-        )
+        if degraded:
+            # Partial result: not worth revalidating, the next request may be complete
+            response["degraded"] = degraded
+            with stage('serialize'):
+                return ORJSONResponse(response, headers={"Cache-Control": "no-store"})
+        
+        # Serialized straight to JSON with orjson (shape documented by ChartResponse)
+        with stage('serialize'):
+            return tagged_json(response, etag)
     
+    except ComputePoolFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except GeocodingUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Chart calculation error: {str(e)}")
 
+def _prepare_prediction(request: PredictionRequest):
+    """Birth data, natal planets, chart analysis and matched rules for a prediction request"""
+    birth_data = {
+        "name": request.name,
+        "date_of_birth": request.date_of_birth if request.date_of_birth else "Unknown",
+        "time_of_birth": request.time_of_birth if request.time_of_birth else "Unknown",
+        "place_of_birth": request.place_of_birth if request.place_of_birth else "Unknown"
+    }
+    
+    # Extract natal planets from the request dict
+    natal_planets = request.natal_chart.get('planets', request.natal_chart)
+    navamsa_chart = request.navamsa_chart if hasattr(request, 'navamsa_chart') else {}
+    
+    # Get full analysis
+    with stage('analysis'):
+        chart_analysis = services.rajanadi_engine.analyze_chart(natal_planets, navamsa_chart)
+    
+    # Get matched rules
+    with stage('rules_matching'):
+        matched_rules = services.rules_matcher.build_context_for_chart(chart_analysis)
+    
+    return birth_data, natal_planets, navamsa_chart, chart_analysis, matched_rules
+
 @router.post("/generate-prediction", response_model=PredictionResponse)
 async def get_prediction(request: PredictionRequest):
     """Generate AI-powered predictions using Raja Nadi principles"""
     try:
-        # Prepare birth data
-        birth_data = {
-            "name": request.name,
-            "date_of_birth": request.date_of_birth if request.date_of_birth else "Unknown",
-            "time_of_birth": request.time_of_birth if request.time_of_birth else "Unknown",
-            "place_of_birth": request.place_of_birth if request.place_of_birth else "Unknown"
-        }
-
-        
-        # Prepare chart analysis
-        # Extract natal planets from the request dict
-        natal_planets = request.natal_chart.get('planets', request.natal_chart)
-        navamsa_chart = request.navamsa_chart if hasattr(request, 'navamsa_chart') else {}
-        
-        # Get full analysis
-        chart_analysis = rajanadi_engine.analyze_chart(natal_planets, navamsa_chart)
-        
-        # Get matched rules
-        matched_rules = rules_matcher.build_context_for_chart(chart_analysis)
+        birth_data, natal_planets, navamsa_chart, chart_analysis, matched_rules = _prepare_prediction(request)
         
-        # Get prediction from Ollama service (Synchronous call)
-        prediction_text = ollama_service.generate_prediction(
+        # Get prediction from Ollama service through the scheduler
+        # (custom questions jump ahead of category readings)
+        priority = PRIORITY_INTERACTIVE if request.custom_question else PRIORITY_STANDARD
+        fingerprint = services.ollama_service.prediction_fingerprint(
+            birth_data, natal_planets, request.category, request.custom_question
+        )
+        prediction_text = await _shared_prediction(fingerprint, lambda: llm_scheduler.submit(
+            services.ollama_service.generate_prediction,
             birth_data=birth_data,
             chart_analysis=chart_analysis,
             transit_data={'current_positions': request.current_transits},
             matched_rules=matched_rules,
             category=request.category,
-            custom_question=request.custom_question
-        )
+            custom_question=request.custom_question,
+            priority=priority
+        ), cacheable=not request.custom_question)
+        
+        return ORJSONResponse({
+            "name": request.name,
+            "natal_chart": request.natal_chart,
+            "navamsa_chart": navamsa_chart,
+            "authority_planet": request.authority_planet,
+            "prediction_text": prediction_text,
+            "current_transits": request.current_transits if hasattr(request, 'current_transits') else {},
+            "future_triggers": [],
+            "matched_rules_count": len(matched_rules.split('\n\n---\n\n')) if matched_rules else 0
+        })
+    
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
+
+@router.get("/panchangam")
+async def get_panchangam(start: date, end: date, latitude: float, longitude: float,
+                         timezone: str = "Asia/Kolkata", if_none_match: Optional[str] = Header(None)):
+    """Daily panchangam (tithi, nakshatra, yoga, karana, sunrise/sunset) for a location"""
+    # Fully determined by the parameters, so shared caches may keep it
+    cache_control = f'public, max-age={CALENDAR_MAX_AGE}'
+    etag = fingerprint_etag('panchangam', start, end, latitude, longitude, timezone)
+    cached = not_modified(etag, if_none_match, cache_control)
+    if cached:
+        return cached
+    
+    try:
+        days = await compute_pool.run(chart_tasks.panchangam, start, end, latitude, longitude, timezone)
+    except ComputePoolFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Panchangam calculation error: {str(e)}")
+    
+    return tagged_json({"timezone": timezone, "days": days}, etag, cache_control)
+
+@router.post("/generate-predictions", response_model=MultiPredictionResponse)
+async def get_multi_category_prediction(request: MultiPredictionRequest):
+    """Generate predictions for all (or the requested) age-appropriate categories in one LLM call"""
+    try:
+        birth_data, natal_planets, navamsa_chart, chart_analysis, matched_rules = _prepare_prediction(request)
         
-        return PredictionResponse(
-            name=request.name,
-            natal_chart=request.natal_chart,
-            navamsa_chart=navamsa_chart,
-            authority_planet=request.authority_planet,
-            prediction_text=prediction_text,
-            current_transits=request.current_transits if hasattr(request, 'current_transits') else {},
-            future_triggers=[],
-            matched_rules_count=len(matched_rules.split('\n\n---\n\n')) if matched_rules else 0
+        categories = request.categories or services.ollama_service.get_batch_categories(birth_data)
+        fingerprint = services.ollama_service.prediction_fingerprint(
+            birth_data, natal_planets, 'multi:' + ','.join(sorted(categories)), None
         )
+        predictions = await _shared_prediction(fingerprint, lambda: llm_scheduler.submit(
+            services.ollama_service.generate_multi_category_prediction,
+            birth_data=birth_data,
+            chart_analysis=chart_analysis,
+            transit_data={'current_positions': request.current_transits},
+            matched_rules=matched_rules,
+            categories=categories,
+            priority=PRIORITY_STANDARD
+        ))
+        
+        return ORJSONResponse({
+            "name": request.name,
+            "authority_planet": request.authority_planet,
+            "predictions": predictions,
+            "failed": [category for category, text in predictions.items()
+                       if not services.ollama_service.is_cacheable(text)],
+            "matched_rules_count": len(matched_rules.split('\n\n---\n\n')) if matched_rules else 0
+        })
     
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
 
+@router.post("/transit-feed")
+async def get_transit_feed(request: TransitFeedRequest, if_none_match: Optional[str] = Header(None)):
+    """Transit hits (Rajanadi sign relationships and 15° orbs) on a natal chart"""
+    if not 1 <= request.days <= 366:
+        raise HTTPException(status_code=400, detail="days must be between 1 and 366")
+    
+    natal_planets = request.natal_chart.get('planets', request.natal_chart)
+    start = request.start_date or datetime.utcnow().date()
+    etag = fingerprint_etag('transit-feed', natal_planets, start, request.days)
+    cached = not_modified(etag, if_none_match)
+    if cached:
+        return cached
+    
+    try:
+        events = await compute_pool.run(chart_tasks.transit_feed, natal_planets, start, request.days)
+    except ComputePoolFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=f"Natal chart is missing planet {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Transit feed error: {str(e)}")
+    
+    return tagged_json({"events": events}, etag)
+
+@router.get("/places")
+async def search_places(q: str, limit: int = 10):
+    """Place-name autocomplete from the offline gazetteer (coordinates and timezone included)"""
+    if not 1 <= limit <= 50:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 50")
+    
+    try:
+        places = services.geocoder_service.search(q, limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Place search error: {str(e)}")
+    
+    return {"places": places}
+
+def _check_calendar_year(year: int):
+    # de421 covers 1900-2050
+    if not 1900 <= year <= 2049:
+        raise HTTPException(status_code=400, detail="year must be between 1900 and 2049")
+
+@router.get("/calendar/monthly-transits")
+async def get_calendar_monthly_transits(months: int = 6, if_none_match: Optional[str] = Header(None)):
+    """Monthly planetary positions and ingresses from the current month (same for every user)"""
+    if not 1 <= months <= 24:
+        raise HTTPException(status_code=400, detail="months must be between 1 and 24")
+    
+    try:
+        section = await compute_pool.run(chart_tasks.monthly_transits_section, months)
+    except ComputePoolFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Monthly transit error: {str(e)}")
+    
+    return cacheable_json(section.body, section.etag, if_none_match)
+
+@router.get("/calendar/sign-changes/{year}")
+async def get_calendar_sign_changes(year: int, if_none_match: Optional[str] = Header(None)):
+    """Sign changes of Jupiter, Saturn, Rahu/Ketu, Uranus and Neptune during a year"""
+    _check_calendar_year(year)
+    
+    try:
+        section = await compute_pool.run(chart_tasks.sign_changes_section, year)
+    except ComputePoolFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Sign change error: {str(e)}")
+    
+    return cacheable_json(section.body, section.etag, if_none_match)
+
+@router.get("/calendar/retrogrades/{year}")
+async def get_calendar_retrogrades(year: int, if_none_match: Optional[str] = Header(None)):
+    """Retrograde periods during a year"""
+    _check_calendar_year(year)
+    
+    try:
+        section = await compute_pool.run(chart_tasks.retrograde_periods_section, year)
+    except ComputePoolFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Retrograde period error: {str(e)}")
+    
+    return cacheable_json(section.body, section.etag, if_none_match)
+
+@router.get("/llm/metrics")
+async def llm_metrics():
+    """LLM scheduler queue depth, slot usage and wait times"""
+    return {
+        **llm_scheduler.get_metrics(),
+        'inflight_predictions': prediction_flights.inflight,
+        'coalesced': prediction_flights.coalesced
+    }
+
+@router.get("/cache/metrics")
+async def cache_metrics():
+    """Chart, transit and prediction cache hits per tier, misses and sizes"""
+    return get_cache_metrics()
+
+@router.get("/ready")
+async def readiness_check():
+    """Readiness probe: 200 once the warm-up has finished, 503 before (or if a step failed)"""
+    status = warmup_service.status()
+    return ORJSONResponse(status, status_code=200 if status['ready'] else 503)
+
 @router.get("/health")
 async def health_check():
     """Check API health and Ollama service status"""
-    ollama_status = await ollama_service.check_health()
+    ollama_status = await services.ollama_service.check_health()
     return {
         "status": "healthy",
-        "ollama_status": "running" if ollama_status else "not available"
+        "ollama_status": "running" if ollama_status else "not available",
+        "llm_backend": services.ollama_service.backend.name
     }
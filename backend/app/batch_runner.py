@@ -0,0 +1,360 @@
+"""
+Nightly batch runner for subscriber forecasts
+
+Reads a subscriber file (JSONL or CSV with BirthDetails fields plus an
+``id``), computes natal/navamsa charts, Rajanadi analysis and transit
+feeds across a process pool, and writes one output file per chunk.
+Finished chunks are skipped on re-run, so an interrupted job resumes
+where it stopped. Optional LLM predictions are then generated through
+the LLM scheduler at batch priority, one output file per chunk as well.
+
+Usage:
+    python -m app.batch_runner subscribers.jsonl --output-dir out/2026-10-19
+"""
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, date
+from pathlib import Path
+from typing import Dict, List, Optional
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import logging
+import os
+import time
+
+from app.config import settings
+from app.models.birth_details import BirthDetails
+from app.services.chart_calculator import chart_calculator
+from app.services.llm_scheduler import llm_scheduler, PRIORITY_BATCH
+from app.services.rajanadi_engine import rajanadi_engine
+from app.services.registry import services
+from app.services.transit_feed_service import transit_feed_service
+from app.services.timezone_service import timezone_service
+from app.utils.age_utils import calculate_age, is_category_allowed
+from app.utils.logging_utils import configure_logging
+
+logger = logging.getLogger(__name__)
+
+def load_subscribers(path: Path) -> List[Dict]:
+    """Read subscriber records from a .jsonl or .csv file"""
+    with open(path, encoding='utf-8', newline='') as f:
+        if path.suffix.lower() == '.csv':
+            return [dict(row) for row in csv.DictReader(f)]
+        return [json.loads(line) for line in f if line.strip()]
+
+def chunk_path(output_dir: Path, chunk_index: int) -> Path:
+    """Output file of one chunk (its existence marks the chunk as done)"""
+    return output_dir / f"chunk-{chunk_index:05d}.jsonl"
+
+def jobs_path(output_dir: Path, chunk_index: int) -> Path:
+    """Prediction jobs queued by one chunk"""
+    return output_dir / f"chunk-{chunk_index:05d}.predictions.jsonl"
+
+def predictions_path(output_dir: Path, chunk_index: int) -> Path:
+    """Generated predictions of one chunk (its existence marks them as done)"""
+    return output_dir / f"chunk-{chunk_index:05d}.predictions.out.jsonl"
+
+def _write_atomic(path: Path, rows: List[Dict]):
+    """Write JSON lines to a temporary file and rename it into place"""
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        for row in rows:
+            f.write(json.dumps(row) + '\n')
+    os.replace(tmp, path)
+
+def _build_prediction_jobs(subscriber_id: str, details: BirthDetails, analysis: Dict,
+                           categories: List[str]) -> List[Dict]:
+    """Prediction jobs for the age-appropriate categories of one subscriber"""
+    age = calculate_age(details.date_of_birth)
+    categories = [c for c in categories if c == 'general' or is_category_allowed(c, age)]
+    if not categories:
+        return []
+
+    birth_data = {
+        'name': details.name,
+        'date_of_birth': details.date_of_birth.isoformat(),
+        'time_of_birth': details.time_of_birth.isoformat(),
+        'place_of_birth': details.place_of_birth
+    }
+    matched_rules = services.rules_matcher.build_context_for_chart(analysis)
+    return [
+        {
+            'id': subscriber_id,
+            'category': category,
+            'birth_data': birth_data,
+            'chart_analysis': analysis,
+            'matched_rules': matched_rules
+        }
+        for category in categories
+    ]
+
+def process_chunk(chunk_index: int, records: List[Dict], output_dir: str,
+                  feed_start: date, feed_days: int,
+                  prediction_categories: Optional[List[str]] = None) -> Dict:
+    """
+    Compute charts, analysis and transit feeds for one chunk of subscribers
+
+    Runs inside a worker process. Results are written to a temporary file
+    and renamed into place, so a chunk file only exists once complete.
+
+    Returns:
+        Summary counts for the chunk
+    """
+    output_dir = Path(output_dir)
+    results = []
+    prediction_jobs = []
+    natal_charts = []
+
+    for record in records:
+        subscriber_id = str(record.get('id', ''))
+        try:
+            details = BirthDetails(**record)
+            place = timezone_service.resolve_birth_moment(
+                details.place_of_birth, details.date_of_birth, details.time_of_birth,
+                details.latitude, details.longitude, details.timezone
+            )
+
+            utc = place['birth_time_utc']
+            natal = chart_calculator.calculate_natal_chart(
+                utc.year, utc.month, utc.day, utc.hour, utc.minute, utc.second,
+                place['latitude'], place['longitude']
+            )
+            navamsa = chart_calculator.calculate_navamsa(natal)
+            analysis = rajanadi_engine.analyze_chart(natal, navamsa)
+
+            results.append({
+                'id': subscriber_id,
+                'natal': natal,
+                'navamsa': navamsa,
+                'authority_planet': analysis['authority_planet'],
+                'retrogrades': analysis['retrogrades'],
+                'edge_planets': analysis['edge_planets'],
+                'conjunctions': analysis['conjunctions']
+            })
+            natal_charts.append(natal)
+
+            if prediction_categories:
+                prediction_jobs.extend(_build_prediction_jobs(subscriber_id, details, analysis,
+                                                              prediction_categories))
+        except Exception as e:
+            results.append({'id': subscriber_id, 'error': str(e)})
+
+    # Transit feeds for the whole chunk in one vectorized pass
+    ok_results = [r for r in results if 'error' not in r]
+    feeds = transit_feed_service.get_feeds(natal_charts, feed_start, feed_days)
+    for result, feed in zip(ok_results, feeds):
+        result['transit_feed'] = feed
+
+    # Jobs first: a finished chunk file promises its jobs are queued
+    if prediction_jobs:
+        _write_atomic(jobs_path(output_dir, chunk_index), prediction_jobs)
+    _write_atomic(chunk_path(output_dir, chunk_index), results)
+
+    return {
+        'chunk': chunk_index,
+        'processed': len(results),
+        'failed': len(results) - len(ok_results),
+        'prediction_jobs': len(prediction_jobs)
+    }
+
+async def _generate_chunk_predictions(jobs: List[Dict]) -> List[Dict]:
+    """Generate one chunk's predictions through the LLM scheduler at batch priority"""
+    # Never more in flight than the scheduler has slots, so the queue cannot overflow
+    slots = asyncio.Semaphore(llm_scheduler.max_concurrency)
+
+    async def generate(job: Dict) -> Dict:
+        async with slots:
+            try:
+                text = await llm_scheduler.submit(
+                    services.ollama_service.generate_prediction,
+                    birth_data=job['birth_data'],
+                    chart_analysis=job['chart_analysis'],
+                    transit_data={'current_positions': {}},
+                    matched_rules=job['matched_rules'],
+                    category=job['category'],
+                    priority=PRIORITY_BATCH
+                )
+                if not services.ollama_service.is_cacheable(text):  # Backend error text
+                    return {'id': job['id'], 'category': job['category'], 'error': text}
+                return {'id': job['id'], 'category': job['category'], 'prediction_text': text}
+            except Exception as e:
+                return {'id': job['id'], 'category': job['category'], 'error': str(e)}
+
+    return await asyncio.gather(*(generate(job) for job in jobs))
+
+def generate_predictions(output_dir: str, chunk_indices: List[int]) -> Dict:
+    """
+    Generate the queued predictions of finished chunks
+
+    Chunks whose predictions file already exists are skipped, so this
+    resumes like the chart pass.
+
+    Returns:
+        Counts of predictions generated and failed
+    """
+    out = Path(output_dir)
+    summary = {'predictions': 0, 'predictions_failed': 0}
+    todo = [i for i in chunk_indices
+            if jobs_path(out, i).exists() and not predictions_path(out, i).exists()]
+
+    for done, chunk_index in enumerate(todo, start=1):
+        jobs = load_subscribers(jobs_path(out, chunk_index))
+        rows = asyncio.run(_generate_chunk_predictions(jobs))
+        _write_atomic(predictions_path(out, chunk_index), rows)
+
+        failed = sum(1 for row in rows if 'error' in row)
+        summary['predictions'] += len(rows) - failed
+        summary['predictions_failed'] += failed
+        logger.info("Chunk %05d predictions done (%d/%d), %d failed", chunk_index, done, len(todo), failed)
+
+    return summary
+
+def input_fingerprint(path: Path) -> str:
+    """SHA-256 of the subscriber file (chunk i is only chunk i of the same input)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+# Run options every chunk of an output directory must share
+RESUME_KEYS = ('input_sha256', 'chunk_size', 'feed_start', 'feed_days', 'prediction_categories')
+
+def _previous_manifest(out: Path) -> Optional[Dict]:
+    """
+    Manifest of an earlier run in the directory, if any
+
+    Raises:
+        ValueError: If the directory holds chunks of an unknown run
+    """
+    manifest_path = out / 'manifest.json'
+    if manifest_path.exists():
+        return json.loads(manifest_path.read_text(encoding='utf-8'))
+    if any(out.glob('chunk-*.jsonl')):
+        raise ValueError(f"{out} holds chunk files without a manifest; use a new --output-dir")
+    return None
+
+def _check_resumable(out: Path, previous: Optional[Dict], run: Dict):
+    """
+    Refuse to resume a run with other options or input (checkpoints are chunk indices)
+
+    Raises:
+        ValueError: If the earlier run differs in any of RESUME_KEYS
+    """
+    if previous is None:
+        return
+    for key in RESUME_KEYS:
+        if previous.get(key) != run[key]:
+            raise ValueError(f"{out} holds a run with {key} {previous.get(key)!r}, not {run[key]!r}; "
+                             "re-run with the same input and options or use a new --output-dir")
+
+def _write_manifest(out: Path, manifest: Dict):
+    tmp = out / 'manifest.json.tmp'
+    tmp.write_text(json.dumps(manifest, indent=2), encoding='utf-8')
+    os.replace(tmp, out / 'manifest.json')
+
+def run_batch(input_path: str, output_dir: str, workers: Optional[int] = None,
+              chunk_size: int = 500, feed_start: Optional[date] = None, feed_days: int = 1,
+              prediction_categories: Optional[List[str]] = None) -> Dict:
+    """
+    Run (or resume) a batch job over a subscriber file
+
+    Args:
+        input_path: Subscriber file (.jsonl or .csv)
+        output_dir: Directory for chunk outputs and the manifest
+        workers: Worker processes (default: CPU count)
+        chunk_size: Subscribers per chunk (unit of work and of checkpointing)
+        feed_start: First day of the transit feed (default: the resumed run's, else today, UTC)
+        feed_days: Days of transit feed per subscriber
+        prediction_categories: Generate LLM predictions for these categories
+
+    Returns:
+        Job summary (also written to manifest.json)
+
+    Raises:
+        ValueError: If output_dir holds an earlier run with another input, chunk
+            size, feed window or prediction categories
+    """
+    started = time.time()
+    out = Path(output_dir)
+    out.mkdir(parents=True, exist_ok=True)
+
+    # A resumed run keeps its feed window even when it continues past midnight
+    previous = _previous_manifest(out)
+    if feed_start is None:
+        feed_start = date.fromisoformat(previous['feed_start']) if previous else datetime.utcnow().date()
+
+    manifest = {
+        'input': str(input_path),
+        'input_sha256': input_fingerprint(Path(input_path)),
+        'chunk_size': chunk_size,
+        'feed_start': feed_start.isoformat(),
+        'feed_days': feed_days,
+        'prediction_categories': prediction_categories
+    }
+    _check_resumable(out, previous, manifest)
+
+    subscribers = load_subscribers(Path(input_path))
+    chunks = [subscribers[i:i + chunk_size] for i in range(0, len(subscribers), chunk_size)]
+    pending = [i for i in range(len(chunks)) if not chunk_path(out, i).exists()]
+    manifest.update({'subscribers': len(subscribers), 'chunks': len(chunks)})
+    # Written before any chunk, so an interrupted run can be resumed safely
+    _write_manifest(out, manifest)
+
+    logger.info("Batch: %d subscribers in %d chunks, %d already done",
+                len(subscribers), len(chunks), len(chunks) - len(pending))
+
+    summary = {'processed': 0, 'failed': 0, 'prediction_jobs': 0}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(process_chunk, i, chunks[i], str(out), feed_start, feed_days, prediction_categories)
+            for i in pending
+        ]
+        for done, future in enumerate(as_completed(futures), start=1):
+            result = future.result()
+            for key in summary:
+                summary[key] += result[key]
+            logger.info("Chunk %05d done (%d/%d), %d failed", result['chunk'], done, len(pending), result['failed'])
+
+    if prediction_categories:
+        summary.update(generate_predictions(str(out), list(range(len(chunks)))))
+
+    manifest.update({
+        'chunks_run': len(pending),
+        **summary,
+        'elapsed_seconds': round(time.time() - started, 2)
+    })
+    _write_manifest(out, manifest)
+
+    return manifest
+
+def main(argv: Optional[List[str]] = None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Precompute subscriber charts and transit feeds")
+    parser.add_argument('input', help="Subscriber file (.jsonl or .csv)")
+    parser.add_argument('--output-dir', required=True, help="Directory for results and checkpoints")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--chunk-size', type=int, default=500, help="Subscribers per chunk")
+    parser.add_argument('--feed-start', type=date.fromisoformat, default=None,
+                        help="First transit feed day, YYYY-MM-DD (default: today)")
+    parser.add_argument('--feed-days', type=int, default=1, help="Days of transit feed")
+    parser.add_argument('--queue-predictions', nargs='*', metavar='CATEGORY', default=None,
+                        help="Generate LLM predictions (default category: general)")
+    args = parser.parse_args(argv)
+    configure_logging(settings.LOG_LEVEL, settings.LOG_FORMAT)
+
+    categories = None
+    if args.queue_predictions is not None:
+        categories = args.queue_predictions or ['general']
+
+    try:
+        manifest = run_batch(args.input, args.output_dir, args.workers, args.chunk_size,
+                             args.feed_start, args.feed_days, categories)
+    except ValueError as e:
+        parser.error(str(e))
+    print(json.dumps(manifest, indent=2))
+
+if __name__ == "__main__":
+    main()
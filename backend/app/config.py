@@ -3,6 +3,8 @@ Configuration settings for Rajanadi Astrology Application
 """
 from pydantic import BaseModel
 from pathlib import Path
+import json
+import os
 
 class Settings(BaseModel):
     """Application settings"""
@@ -11,13 +13,87 @@ class Settings(BaseModel):
     VERSION: str = "1.0.0"
     API_PREFIX: str = "/api"
     
+    # LLM Backend: ollama, openai (OpenAI-compatible server), llamacpp or fake
+    LLM_BACKEND: str = "ollama"
+    
     # Ollama Settings
     OLLAMA_BASE_URL: str = "http://localhost:11434"
     OLLAMA_MODEL: str = "llama3"
     
+    # Other Local Servers
+    OPENAI_BASE_URL: str = "http://localhost:8080"
+    OPENAI_API_KEY: str = ""
+    LLAMACPP_BASE_URL: str = "http://localhost:8080"
+    
+    # Fake Backend (load testing without a model)
+    LLM_FAKE_TOKENS: int = 200  # Tokens per response (per section)
+    LLM_FAKE_TOKENS_PER_SECOND: float = 50.0  # 0 = instant
+    
+    # LLM Scheduling
+    LLM_MAX_CONCURRENCY: int = 1  # Generations running at once
+    LLM_MAX_QUEUE: int = 32  # Waiting requests before answering 429
+    
+    # Compute Pool (Skyfield/numpy stages run off the event loop)
+    COMPUTE_POOL: str = "thread"  # thread or process (forked workers, true parallelism)
+    COMPUTE_WORKERS: int = 0  # 0 = one per CPU
+    COMPUTE_MAX_QUEUE: int = 64  # Waiting calculations before answering 503
+    
+    # calculate-chart stages fanned out after the natal chart: seconds before a stage is
+    # dropped from the response (listed in "degraded"); JSON object in the environment
+    CHART_STAGE_TIMEOUTS: dict = {
+        "navamsa": 2.0, "authority": 2.0, "future_transits": 10.0,
+        "monthly_transits": 10.0, "sign_changes": 10.0, "retrograde_periods": 10.0
+    }
+    
+    # Follow-up Sessions (Ollama context reuse for custom questions)
+    OLLAMA_KEEP_ALIVE: str = "30m"  # Keep the model (and its KV cache) loaded between calls
+    LLM_MAX_SESSIONS: int = 512
+    LLM_SESSION_TTL_SECONDS: int = 1800
+    LLM_SESSION_MAX_TURNS: int = 8
+    
+    # Caches (in-process LRU per worker, plus a shared Redis-protocol tier when CACHE_URL is set)
+    CACHE_URL: str = ""  # redis://[:password@]host:6379/0; empty = per-process caches only
+    CACHE_TIMEOUT: float = 0.25  # Seconds per shared-tier operation
+    CACHE_RETRY_SECONDS: float = 5.0  # Shared tier is skipped this long after an error
+    CACHE_LOCK_TIMEOUT: float = 15.0  # Longest a worker waits for another's chart/transit calculation
+    CHART_CACHE_SIZE: int = 2048  # Local entries: natal charts
+    CHART_CACHE_TTL: int = 604800  # Charts never change; a week bounds the shared tier's memory
+    TRANSIT_CACHE_SIZE: int = 512  # Local entries: transit tables and future transits
+    TRANSIT_CACHE_TTL: int = 86400
+    PREDICTION_CACHE_SIZE: int = 512  # Local entries: category predictions (not custom questions)
+    PREDICTION_CACHE_TTL: int = 86400
+    PREDICTION_LOCK_TIMEOUT: float = 180.0  # Longest a worker waits for another's LLM generation
+    
+    # Production Server (python -m app.serve)
+    SERVE_HOST: str = "0.0.0.0"
+    SERVE_PORT: int = 8000
+    SERVE_WORKERS: int = 0  # Forked worker processes; 0 = one per CPU
+    SERVE_GRACEFUL_TIMEOUT: int = 30  # Seconds workers get to finish in-flight requests
+    
+    # Logging
+    LOG_LEVEL: str = "INFO"  # DEBUG adds per-request prediction details
+    LOG_FORMAT: str = "json"  # json or text
+    
+    # Request Profiler (send X-Profile: 1 plus X-Profile-Token; disabled while the token is empty)
+    PROFILER_TOKEN: str = ""
+    PROFILER_INTERVAL_MS: float = 2.0  # Sampling interval
+    PROFILER_OUTPUT_DIR: str = ""  # Store profiles here instead of returning them
+    
+    # Response Compression (brotli when the Brotli package is installed, else gzip)
+    COMPRESSION_MIN_SIZE: int = 1024  # Smaller bodies are sent uncompressed; -1 disables compression
+    GZIP_LEVEL: int = 6
+    BROTLI_QUALITY: int = 5  # 0-11; higher levels cost far more CPU for little gain on JSON
+    
     # File Paths
     KNOWLEDGE_BASE_PATH: Path = Path(__file__).parent.parent / "knowledge_base" / "RajaNadiRules.txt"
     
+    # Offline Geocoding (GeoNames-format gazetteer, e.g. cities15000.txt; index rebuilt when it changes)
+    GAZETTEER_PATH: Path = Path(__file__).parent.parent / "knowledge_base" / "gazetteer" / "cities.tsv"
+    GAZETTEER_INDEX_DIR: Path = Path(__file__).parent.parent / "knowledge_base" / "gazetteer" / "index"
+    TIMEZONE_POLYGONS_PATH: str = ""  # timezone-boundary-builder GeoJSON; nearest place's zone when unset
+    GEOCODER_ONLINE_FALLBACK: bool = False  # Ask Nominatim for places missing from the gazetteer (needs requirements-geocoding.txt)
+    GEOCODER_ONLINE_TIMEOUT: float = 5.0  # Seconds
+    
     # Calculation Settings
     LAHIRI_AYANAMSA: bool = True  # Use Lahiri ayanamsa for Vedic calculations
     
@@ -27,4 +103,18 @@ class Settings(BaseModel):
     class Config:
         env_file = ".env"
 
-settings = Settings()
+def _env_overrides() -> dict:
+    """Settings overridden by environment variables of the same name"""
+    overrides = {}
+    for name, field in Settings.model_fields.items():
+        value = os.environ.get(name)
+        if value is None:
+            continue
+        if field.annotation is list:
+            value = value.split(',')
+        elif field.annotation is dict:
+            value = json.loads(value)
+        overrides[name] = value
+    return overrides
+
+settings = Settings(**_env_overrides())
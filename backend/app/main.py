@@ -2,16 +2,38 @@
 FastAPI main application
 Rajanadi Astrology Prediction System
 """
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from app.api.routes import router
 from app.config import settings
+from app.services.compute_pool import compute_pool
+from app.services.warmup import warmup_service
+from app.utils.timing import TimingMiddleware
+from app.utils.profiler import ProfilerMiddleware
+from app.utils.compression import CompressionMiddleware
+from app.utils.logging_utils import configure_logging, RequestIdMiddleware
+
+configure_logging(settings.LOG_LEVEL, settings.LOG_FORMAT)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # No-op in workers forked by app.serve (warmed up in the master before forking)
+    warmup_service.start_background()
+    yield
+    # Running calculations finish; queued ones are cancelled
+    compute_pool.shutdown()
 
 # Create FastAPI app
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.VERSION,
-    description="AI-Powered Rajanadi Vedic Astrology Predictions using Ollama LLM"
+    description="AI-Powered Rajanadi Vedic Astrology Predictions using Ollama LLM",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -21,11 +43,29 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Request-ID", "ETag"],
 )
 
+# Brotli/gzip for JSON responses (inside the timing middleware, so compression time is counted)
+app.add_middleware(CompressionMiddleware)
+
+# Per-stage timings (Server-Timing header and Prometheus histograms)
+app.add_middleware(TimingMiddleware)
+
+# Correlation ID for log records (X-Request-ID in and out)
+app.add_middleware(RequestIdMiddleware)
+
+# On-demand sampling profiler for single requests (needs PROFILER_TOKEN)
+app.add_middleware(ProfilerMiddleware)
+
 # Include API routes
 app.include_router(router, prefix=settings.API_PREFIX)
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics"""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -36,7 +76,10 @@ async def root():
             "calculate_chart": f"{settings.API_PREFIX}/calculate-chart",
             "generate_prediction": f"{settings.API_PREFIX}/generate-prediction",
             "current_transits": f"{settings.API_PREFIX}/transits/current",
+            "panchangam": f"{settings.API_PREFIX}/panchangam",
             "health": f"{settings.API_PREFIX}/health",
+            "ready": f"{settings.API_PREFIX}/ready",
+            "metrics": "/metrics",
             "docs": "/docs"
         }
     }
@@ -4,6 +4,7 @@ Data models for chart information and prediction
 """
 from pydantic import BaseModel
 from typing import Dict, List, Optional, Any
+from datetime import date, datetime
 
 
 class PlanetPosition(BaseModel):
@@ -62,13 +63,119 @@ class PredictionRequest(BaseModel):
     time_of_birth: Optional[str] = None  # Format: HH:MM:SS
     place_of_birth: Optional[str] = None
 
+class MultiPredictionRequest(PredictionRequest):
+    """Request for several category predictions generated in one call"""
+    categories: Optional[List[str]] = None  # Default: all age-appropriate categories
+
+class MultiPredictionResponse(BaseModel):
+    """Category -> prediction text for a multi-category request"""
+    name: str
+    authority_planet: Optional[str]
+    predictions: Dict[str, str]
+    failed: List[str] = []  # Categories whose text is an error message (not cached; retry later)
+    matched_rules_count: int
+
+class ChartPlanet(BaseModel):
+    """Planet (or Ascendant) in the natal chart"""
+    longitude: float  # Sidereal longitude (0-360)
+    rasi: int  # Sign number (1-12)
+    rasi_name: str
+    degree: float  # Degree within sign (0-30)
+    is_retrograde: bool
+    speed: float = 0.0
+    nakshatra: Optional[str] = None
+    nakshatra_lord: Optional[str] = None
+    pada: Optional[int] = None
+
+class NavamsaPlanet(BaseModel):
+    """Planet in the navamsa (D9) chart"""
+    rasi: int
+    rasi_name: str
+    degree: float
+
+class FutureTransit(BaseModel):
+    """Transit of a slow planet over a natal planet"""
+    date: str  # "YYYY-MM-DD to YYYY-MM-DD"
+    date_start: str
+    transit_planet: str
+    natal_planet: str
+    rasi: str
+    type: str
+    impact: str
+
+class MonthlyPlanet(BaseModel):
+    """Planet position at the start of a month"""
+    name: str
+    rasi: str
+    nakshatra: str
+    nakshatra_lord: str
+    pada: int
+    influence: str
+
+class Ingress(BaseModel):
+    """Planet moving from one sign to the next"""
+    planet: str
+    date: str
+    time: str
+    from_sign: str
+    to_sign: str
+
+class MonthlyTransit(BaseModel):
+    """One calendar month of transits"""
+    month: str
+    start_date: str
+    planets: List[MonthlyPlanet]
+    sign_changes: List[Ingress]
+    moon_transits: List[Ingress]
+
+class SignChange(BaseModel):
+    """Sign change of a slow planet during the year"""
+    date: str
+    from_sign: str
+    to_sign: str
+
+class RetrogradeWindow(BaseModel):
+    start: str
+    end: str
+    signs: str
+
+class RetrogradePeriods(BaseModel):
+    """Retrograde windows of one planet during the year"""
+    planet: str
+    periods: List[RetrogradeWindow]
+
+class LuckyGemstone(BaseModel):
+    gemstone: str
+    planet: Optional[str]
+    benefits: str
+    finger: str
+    day: str
+    mantra: str
+
+class BirthPlace(BaseModel):
+    """Birth location and time as resolved by the server"""
+    latitude: float
+    longitude: float
+    timezone: str
+    utc_offset: float  # Hours
+    birth_time_utc: datetime
+
 class ChartResponse(BaseModel):
     """Response for chart calculation only"""
-    natal: Dict
-    navamsa: Dict
+    natal: Dict[str, ChartPlanet]
+    navamsa: Optional[Dict[str, NavamsaPlanet]]  # None when the stage is degraded
     authority_planet: Optional[str]
-    future_transits: List[Dict] = []  # Future planetary transits for the year
-    monthly_transits: List[Dict] = []  # Monthly planetary positions
-    sign_changes: Dict = {}  # Major planet sign changes 
-    retrograde_periods: List[Dict] = []  # Retrograde periods
-    lucky_gemstone: Optional[Dict] = None  # Gemstone recommendation based on authority planet
+    future_transits: List[FutureTransit] = []  # Future planetary transits for the year
+    # Calendar sections, only with include_calendar=true (otherwise from /calendar/*)
+    monthly_transits: List[MonthlyTransit] = []  # Monthly planetary positions
+    sign_changes: Dict[str, List[SignChange]] = {}  # Major planet sign changes
+    retrograde_periods: List[RetrogradePeriods] = []  # Retrograde periods
+    lucky_gemstone: Optional[LuckyGemstone] = None  # Gemstone recommendation based on authority planet
+    birth_place: Optional[BirthPlace] = None  # Resolved coordinates, timezone, UTC offset and UTC birth time
+    degraded: List[str] = []  # Stages left out after a timeout or error (response not cached)
+
+class TransitFeedRequest(BaseModel):
+    """Request for a personalized transit feed"""
+    natal_chart: Dict
+    start_date: Optional[date] = None  # Defaults to today
+    days: int = 30
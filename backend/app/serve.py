@@ -0,0 +1,200 @@
+"""
+Production server: preloaded master process, forked uvicorn workers
+
+The master imports the application and runs the warm-up (ephemeris,
+rules index, gazetteer, timezone tables) once, binds the listening socket
+and forks the workers. Workers share the loaded memory copy-on-write,
+accept on the inherited socket and pass /api/ready from the start.
+
+Signals to the master:
+    TERM, INT   graceful shutdown; workers finish in-flight requests
+    HUP         rolling restart; each worker is replaced by a fresh fork of
+                the master (code changes need a full restart)
+
+Usage:
+    python -m app.serve --workers 4 --port 8000
+"""
+from typing import Dict, List, Optional, Set
+import argparse
+import logging
+import os
+import signal
+import socket
+import time
+
+import uvicorn
+
+from app.config import settings
+from app.main import app
+from app.services.warmup import warmup_service
+
+logger = logging.getLogger('app.serve')  # __name__ is '__main__' under python -m
+
+# A worker dying sooner than this after its start is restarted only after a pause
+MIN_WORKER_LIFETIME = 1.0
+
+SUPERVISOR_SIGNALS = {signal.SIGTERM, signal.SIGINT, signal.SIGHUP}
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    """Listening socket shared by every worker"""
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+class WorkerSupervisor:
+    """Fork, watch and replace uvicorn worker processes"""
+
+    def __init__(self, sock: socket.socket, workers: int, graceful_timeout: int):
+        """
+        Args:
+            sock: Bound listening socket
+            workers: Number of worker processes to keep running
+            graceful_timeout: Seconds a stopping worker gets before it is killed
+        """
+        self.sock = sock
+        self.num_workers = workers
+        self.graceful_timeout = graceful_timeout
+
+        self.workers: Dict[int, float] = {}  # pid -> start time
+        self._retiring: Set[int] = set()  # Replaced by HUP, finishing their requests
+        self._signals: List[int] = []
+        self._stopping = False
+
+    def spawn(self) -> int:
+        """Fork one worker"""
+        # Until the child has reset its handlers, a signal would run the master's
+        # handler there and be lost: hold them across the fork
+        signal.pthread_sigmask(signal.SIG_BLOCK, SUPERVISOR_SIGNALS)
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                self._run_worker()
+            except BaseException:
+                logger.exception("Worker crashed")
+                code = 1
+            finally:
+                os._exit(code)
+
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, SUPERVISOR_SIGNALS)
+        self.workers[pid] = time.monotonic()
+        logger.info("Started worker %d", pid)
+        return pid
+
+    def _run_worker(self):
+        # uvicorn installs its own TERM/INT handlers (graceful shutdown)
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, signal.SIG_DFL)
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, SUPERVISOR_SIGNALS)
+
+        config = uvicorn.Config(
+            app, lifespan='on', log_level=settings.LOG_LEVEL.lower(),
+            timeout_graceful_shutdown=self.graceful_timeout
+        )
+        uvicorn.Server(config).run(sockets=[self.sock])
+
+    def _on_signal(self, signum, frame):
+        self._signals.append(signum)
+
+    def _reap(self):
+        """Collect exited workers and replace unexpected exits"""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+
+            started = self.workers.pop(pid, None)
+            if pid in self._retiring:
+                self._retiring.discard(pid)
+                continue
+            if started is None or self._stopping:
+                continue
+
+            logger.warning("Worker %d exited unexpectedly (status %d)", pid, status)
+            if time.monotonic() - started < MIN_WORKER_LIFETIME:
+                time.sleep(MIN_WORKER_LIFETIME)  # Do not fork in a tight loop
+            self.spawn()
+
+    def reload(self):
+        """Replace every worker, starting each replacement before stopping the old one"""
+        logger.info("Rolling restart of %d workers", len(self.workers))
+        for pid in list(self.workers):
+            if pid in self._retiring:
+                continue
+            self.spawn()
+            self._retiring.add(pid)
+            self._kill(pid, signal.SIGTERM)
+
+    def _kill(self, pid: int, sig: int):
+        try:
+            os.kill(pid, sig)
+        except ProcessLookupError:
+            pass
+
+    def stop(self):
+        """Stop all workers gracefully, killing those that overrun the timeout"""
+        self._stopping = True
+        logger.info("Stopping %d workers", len(self.workers))
+        for pid in self.workers:
+            self._kill(pid, signal.SIGTERM)
+
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        while self.workers and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.1)
+        for pid in self.workers:
+            logger.warning("Killing worker %d", pid)
+            self._kill(pid, signal.SIGKILL)
+        self._reap()
+        self.sock.close()
+
+    def run(self):
+        """Start the workers and supervise them until TERM or INT"""
+        for sig in SUPERVISOR_SIGNALS:
+            signal.signal(sig, self._on_signal)
+
+        for _ in range(self.num_workers):
+            self.spawn()
+
+        while True:
+            while self._signals:
+                signum = self._signals.pop(0)
+                if signum == signal.SIGHUP:
+                    self.reload()
+                else:
+                    self.stop()
+                    return
+            self._reap()
+            time.sleep(0.2)
+
+def main(argv: Optional[List[str]] = None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Run the API with preloaded, forked workers")
+    parser.add_argument('--host', default=settings.SERVE_HOST, help="Bind address")
+    parser.add_argument('--port', type=int, default=settings.SERVE_PORT, help="Bind port")
+    parser.add_argument('--workers', type=int, default=settings.SERVE_WORKERS,
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument('--graceful-timeout', type=int, default=settings.SERVE_GRACEFUL_TIMEOUT,
+                        help="Seconds workers get to finish in-flight requests")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    if not warmup_service.run():
+        logger.error("Warm-up incomplete; workers will report not ready", extra=warmup_service.status())
+    logger.info("Warm-up took %.2fs", time.perf_counter() - started)
+
+    sock = bind_socket(args.host, args.port)
+    workers = args.workers or os.cpu_count() or 1
+    logger.info("Listening on %s:%d with %d workers", args.host, args.port, workers)
+    WorkerSupervisor(sock, workers, args.graceful_timeout).run()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""
+Chart, transit and prediction caches shared by every worker
+Each has a per-process LRU tier; with CACHE_URL set, all workers (and all
+hosts pointing at the same server) also share one Redis-protocol tier
+"""
+from typing import Dict
+
+from app.config import settings
+from app.utils.redis_protocol import RespClient
+from app.utils.tiered_cache import TieredCache
+
+# One connection pool for all caches; None runs them on their local tiers
+shared_client = RespClient(settings.CACHE_URL, timeout=settings.CACHE_TIMEOUT) if settings.CACHE_URL else None
+
+# Bumping the version orphans every shared entry written by an older release
+_PREFIX = f'rajanadi:{settings.VERSION}:'
+
+def _cache(name: str, maxsize: int, ttl: int, lock_timeout: float = settings.CACHE_LOCK_TIMEOUT) -> TieredCache:
+    return TieredCache(name, maxsize=maxsize, ttl=ttl, shared=shared_client, prefix=_PREFIX,
+                       lock_timeout=lock_timeout, retry_after=settings.CACHE_RETRY_SECONDS)
+
+def get_cache_metrics() -> Dict:
+    """Per-cache hit and miss counts"""
+    return {cache.name: cache.get_metrics() for cache in (chart_cache, transit_cache, prediction_cache)}
+
+# Global instances
+chart_cache = _cache('chart', settings.CHART_CACHE_SIZE, settings.CHART_CACHE_TTL)
+transit_cache = _cache('transit', settings.TRANSIT_CACHE_SIZE, settings.TRANSIT_CACHE_TTL)
+prediction_cache = _cache('prediction', settings.PREDICTION_CACHE_SIZE, settings.PREDICTION_CACHE_TTL,
+                          lock_timeout=settings.PREDICTION_LOCK_TIMEOUT)
@@ -1,11 +1,13 @@
 """
 Vedic chart calculation using Skyfield (alternative to Swiss Ephemeris)
 """
-from skyfield.api import load, Topos
+from skyfield.api import Topos
 from skyfield import almanac
 from datetime import datetime, timezone
 from typing import Dict
 import math
+from app.utils.nakshatra_utils import annotate_nakshatras
+from app.utils.ephemeris import get_ephemeris, get_timescale
 
 class ChartCalculator:
     """Calculate Vedic astrological charts using Skyfield"""
@@ -22,8 +24,8 @@ class ChartCalculator:
     
     def __init__(self):
         """Initialize with Skyfield ephemeris"""
-        self.ts = load.timescale()
-        self.eph = load('de421.bsp')  # Download ephemeris data
+        self.ts = get_timescale()
+        self.eph = get_ephemeris()
         
         # Define celestial bodies
         self.sun = self.eph['sun']
@@ -199,6 +201,8 @@ class ChartCalculator:
             'speed': 0.0
         }
         
+        # Star (nakshatra), pada and star lord for every planet
+        annotate_nakshatras(planets_data)
         
         return planets_data
     
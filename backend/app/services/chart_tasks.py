@@ -0,0 +1,61 @@
+"""
+CPU-bound calculation stages run on the compute pool
+Module-level functions (picklable by reference) over the service singletons,
+so they run unchanged in a thread or a forked worker process. Services are
+resolved through the registry, so importing this module loads nothing heavy
+"""
+from datetime import date, datetime
+from typing import Dict, List, TYPE_CHECKING
+import hashlib
+
+from app.services.caches import chart_cache, transit_cache
+from app.services.registry import services
+from app.utils.json_utils import dumps
+
+if TYPE_CHECKING:
+    from app.services.shared_sections import EncodedSection
+
+def natal_chart(utc: datetime, latitude: float, longitude: float) -> Dict:
+    """Natal chart for a UTC birth moment (cached across workers)"""
+    return chart_cache.get_or_compute(
+        f'natal:{utc.isoformat()}:{latitude!r}:{longitude!r}',
+        lambda: services.chart_calculator.calculate_natal_chart(
+            utc.year, utc.month, utc.day, utc.hour, utc.minute, utc.second, latitude, longitude
+        )
+    )
+
+def navamsa_chart(natal: Dict) -> Dict:
+    """Navamsa (D9) chart"""
+    return services.chart_calculator.calculate_navamsa(natal)
+
+def authority_planet(natal: Dict) -> str:
+    """Authority planet by Raja Nadi rules"""
+    return services.rajanadi_engine.identify_authority_planet(natal)
+
+def future_transits(natal: Dict, months_ahead: int = 12) -> List[Dict]:
+    """Upcoming transits over the natal positions (from today; cached for the day)"""
+    digest = hashlib.sha256(dumps(natal)).hexdigest()
+    return transit_cache.get_or_compute(
+        f'future:{datetime.utcnow().date().isoformat()}:{months_ahead}:{digest}',
+        lambda: services.ephemeris_service.get_future_transits(natal, months_ahead=months_ahead)
+    )
+
+def monthly_transits_section(months_ahead: int) -> 'EncodedSection':
+    """Pre-encoded monthly transits from the current month"""
+    return services.shared_sections.monthly_transits(months_ahead=months_ahead)
+
+def sign_changes_section(year: int) -> 'EncodedSection':
+    """Pre-encoded sign changes of the slow planets"""
+    return services.shared_sections.sign_changes(year)
+
+def retrograde_periods_section(year: int) -> 'EncodedSection':
+    """Pre-encoded retrograde periods"""
+    return services.shared_sections.retrograde_periods(year)
+
+def panchangam(start: date, end: date, latitude: float, longitude: float, timezone: str) -> List[Dict]:
+    """Daily panchangam for a location"""
+    return services.panchangam_service.get_panchangam(start, end, latitude, longitude, timezone)
+
+def transit_feed(natal_planets: Dict, start: date, days: int) -> List[Dict]:
+    """Transit hits on one natal chart"""
+    return services.transit_feed_service.get_feed(natal_planets, start, days)
@@ -1,6 +1,8 @@
 from typing import Dict, List
-from datetime import datetime, timedelta
-from skyfield.api import load
+from datetime import date
+import numpy as np
+from app.utils.ingress_utils import find_ingresses
+from app.utils.ephemeris import get_ephemeris, get_timescale
 
 class ComprehensiveTransitService:
     """Calculate comprehensive transits including sign changes and retrogrades"""
@@ -11,27 +13,29 @@ class ComprehensiveTransitService:
     ]
     
     def __init__(self):
-        self.ts = load.timescale()
-        self.planets = load('de421.bsp')
+        self.ts = get_timescale()
+        self.planets = get_ephemeris()
         self.earth = self.planets['earth']
     
     def get_sign_changes(self, year: int = 2026) -> Dict[str, List[Dict]]:
-        """Calculate sign changes for major planets in the given year"""
+        """
+        Calculate sign changes for major planets in the given year
         
-        # Ayanamsa for the year
-        ayanamsa = 23.85 + ((year - 2000) * 0.01397)
+        Longitudes are sampled daily in one vectorized ephemeris call per planet
+        and each crossing is interpolated to its day.
         
-        sign_changes = {
-            'Jupiter': [],
-            'Saturn': [],
-            'Rahu_Ketu': [],
-            'Uranus': [],
-            'Neptune': []
-        }
+        Args:
+            year: Calendar year (UTC)
+            
+        Returns:
+            Dictionary of planet -> [{date, from_sign, to_sign}] (Rahu_Ketu lists Rahu's signs)
+        """
+        # Daily samples from 1 January to 1 January of the next year
+        days = (date(year + 1, 1, 1) - date(year, 1, 1)).days
+        t = self.ts.utc(year, 1, np.arange(1, days + 2))
         
-        # Sample daily to detect sign changes
-        start_date = datetime(year, 1, 1)
-        end_date = datetime(year, 12, 31)
+        # Lahiri ayanamsa at each sample
+        ayanamsa = 23.85 + ((t.tt - 2451545.0) / 365.25) * 0.01397
         
         planet_bodies = {
             'Jupiter': self.planets['jupiter barycenter'],
@@ -40,33 +44,35 @@ class ComprehensiveTransitService:
             'Neptune': self.planets['neptune barycenter']
         }
         
-        prev_signs = {}
+        earth_at = self.earth.at(t)
+        longitudes = {}
+        for planet_name, planet_body in planet_bodies.items():
+            # ecliptic_latlon() returns (lat, lon, distance)
+            tropical_lon = earth_at.observe(planet_body).ecliptic_latlon()[1].degrees
+            longitudes[planet_name] = (tropical_lon - ayanamsa) % 360
         
-        current = start_date
-        while current <= end_date:
-            t = self.ts.utc(current.year, current.month, current.day)
-            
-            for planet_name, planet_body in planet_bodies.items():
-                try:
-                    astrometric = self.earth.at(t).observe(planet_body)
-                    lon, _, _ = astrometric.ecliptic_latlon()
-                    tropical_lon = lon.degrees
-                    sidereal_lon = (tropical_lon - ayanamsa) % 360
-                    rasi = int(sidereal_lon / 30) + 1
-                    
-                    if planet_name not in prev_signs:
-                        prev_signs[planet_name] = rasi
-                    elif prev_signs[planet_name] != rasi:
-                        sign_changes[planet_name].append({
-                            'date': current.strftime('%B %d, %Y'),
-                            'from_sign': self.RASI_NAMES[prev_signs[planet_name]],
-                            'to_sign': self.RASI_NAMES[rasi]
-                        })
-                        prev_signs[planet_name] = rasi
-                except:
+        # Rahu (mean node); Ketu is always opposite
+        rahu_tropical = (125.0 - ((t.tt - 2451545.0) * 0.05295)) % 360
+        longitudes['Rahu_Ketu'] = (rahu_tropical - ayanamsa) % 360
+        
+        sign_changes = {
+            'Jupiter': [],
+            'Saturn': [],
+            'Rahu_Ketu': [],
+            'Uranus': [],
+            'Neptune': []
+        }
+        for planet_name, lons in longitudes.items():
+            ingress_jd, from_rasi, to_rasi = find_ingresses(t.tt, lons)
+            for jd, from_r, to_r in zip(ingress_jd, from_rasi, to_rasi):
+                when = self.ts.tt_jd(jd).utc_datetime()
+                if when.year != year:
                     continue
-            
-            current += timedelta(days=1)
+                sign_changes[planet_name].append({
+                    'date': when.strftime('%B %d, %Y'),
+                    'from_sign': self.RASI_NAMES[from_r],
+                    'to_sign': self.RASI_NAMES[to_r]
+                })
         
         return sign_changes
     
@@ -0,0 +1,153 @@
+"""
+Worker pool for CPU-bound calculations (Skyfield, numpy)
+Keeps the event loop responsive, bounds the backlog and rejects work beyond it
+"""
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+import asyncio
+import contextvars
+import functools
+import multiprocessing
+import os
+import threading
+import time
+
+from prometheus_client import Gauge
+
+from app.config import settings
+from app.utils.profiler import profile_worker_thread
+from app.utils.timing import STAGE_SECONDS
+
+class ComputePoolFullError(Exception):
+    """Raised when the compute backlog is at capacity; callers should answer 503"""
+
+def _timed_call(func: Callable, args: Tuple, kwargs: Dict) -> Tuple[float, Any]:
+    """Run func in the worker, reporting when it started (wall clock, valid across processes)"""
+    started_at = time.time()
+    # Sampled along with the event loop when the request is being profiled (thread pool)
+    with profile_worker_thread():
+        return started_at, func(*args, **kwargs)
+
+class ComputePool:
+    """Run blocking calculations in a bounded thread or process pool"""
+
+    def __init__(self, kind: str = 'thread', workers: int = 0, max_queue: int = 64):
+        """
+        Args:
+            kind: 'thread' (shares caches, parallel only where numpy releases the GIL)
+                or 'process' (forked workers; tasks must be picklable module-level functions)
+            workers: Pool size (0 = one per CPU)
+            max_queue: Tasks allowed to wait for a worker before rejecting
+        """
+        if kind not in ('thread', 'process'):
+            raise ValueError(f"Unknown compute pool kind '{kind}' (use thread or process)")
+
+        self.kind = kind
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+
+        self._executor: Optional[Executor] = None
+        self._pending = 0  # Submitted and not yet finished (running + queued)
+        self._lock = threading.Lock()  # _pending is decremented from worker threads
+
+        # Metrics
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Tasks waiting for a free worker"""
+        return max(0, self._pending - self.workers)
+
+    @property
+    def active(self) -> int:
+        """Tasks running on a worker"""
+        return min(self._pending, self.workers)
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == 'process':
+                # Fork so workers inherit the loaded kernels and tables (copy-on-write)
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('fork')
+                )
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                    thread_name_prefix='compute')
+        return self._executor
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Run a blocking calculation on a worker and await its result
+
+        Args:
+            func: Blocking callable (module-level function for the process pool)
+
+        Returns:
+            Whatever func returns
+
+        Raises:
+            ComputePoolFullError: If max_queue tasks are already waiting
+        """
+        if self._pending >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise ComputePoolFullError(f"Compute queue is full ({self.max_queue} waiting)")
+
+        call = functools.partial(_timed_call, func, args, kwargs)
+        if self.kind == 'thread':
+            # Carry the request context (timer, request ID) into the worker thread
+            call = functools.partial(contextvars.copy_context().run, call)
+
+        self.submitted += 1
+        submitted_at = time.time()
+        with self._lock:
+            self._pending += 1
+        future = self._get_executor().submit(call)
+        # Released when the worker is done, not when the caller stops waiting:
+        # a timed-out calculation keeps its worker busy until it finishes
+        future.add_done_callback(self._task_done)
+
+        try:
+            started_at, result = await asyncio.wrap_future(future)
+        except Exception:
+            self.failed += 1
+            raise
+        STAGE_SECONDS.labels(stage='compute_queue_wait').observe(max(0.0, started_at - submitted_at))
+        self.completed += 1
+        return result
+
+    def _task_done(self, future):
+        with self._lock:
+            self._pending -= 1
+
+    def get_metrics(self) -> Dict:
+        """Pool kind and size, backlog and counters"""
+        return {
+            'kind': self.kind,
+            'workers': self.workers,
+            'max_queue': self.max_queue,
+            'active': self.active,
+            'queue_depth': self.queue_depth,
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'failed': self.failed,
+            'rejected': self.rejected
+        }
+
+    def shutdown(self):
+        """Stop the workers (waits for running tasks)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+# Global instance
+compute_pool = ComputePool(settings.COMPUTE_POOL, settings.COMPUTE_WORKERS, settings.COMPUTE_MAX_QUEUE)
+
+Gauge('rajanadi_compute_queue_depth', 'Calculations waiting for a compute worker').set_function(
+    lambda: compute_pool.queue_depth
+)
+Gauge('rajanadi_compute_active', 'Calculations running on compute workers').set_function(
+    lambda: compute_pool.active
+)
@@ -1,9 +1,12 @@
 """
 Ephemeris service for current and future transits using Skyfield
 """
-from skyfield.api import load
-from datetime import datetime, timedelta
-from typing import Dict, List
+from datetime import datetime, timedelta, date
+from typing import Dict, List, Tuple
+import numpy as np
+from app.utils.nakshatra_utils import annotate_nakshatras
+from app.utils.ephemeris import get_ephemeris, get_timescale
+from app.services.caches import transit_cache
 
 class EphemerisService:
     """Calculate current and future planetary transits"""
@@ -12,9 +15,12 @@ class EphemerisService:
     LAHIRI_AYANAMSA_2000 = 23.85
     AYANAMSA_RATE = 0.01397
     
+    # Row order of transit longitude tables (same order as RajanadiEngine.find_conjunctions)
+    GRAHAS = ['Sun', 'Moon', 'Mars', 'Mercury', 'Jupiter', 'Venus', 'Saturn', 'Rahu', 'Ketu']
+    
     def __init__(self):
-        self.ts = load.timescale()
-        self.eph = load('de421.bsp')
+        self.ts = get_timescale()
+        self.eph = get_ephemeris()
         self.earth = self.eph['earth']
         
         self.rasi_names = {
@@ -99,6 +105,8 @@ class EphemerisService:
             'longitude': round(ketu_long, 4)
         }
         
+        annotate_nakshatras(planets)
+        
         return planets
     
     def get_future_transits(self, natal_planets: Dict, months_ahead: int = 24) -> List[Dict]:
@@ -196,5 +204,57 @@ class EphemerisService:
         
         return unique_triggers[:20]  # Return top 20 events
 
+    def get_transit_table(self, start: date, days: int) -> Tuple[Tuple[str, ...], np.ndarray]:
+        """
+        Precompute daily sidereal longitudes of all nine grahas
+        
+        Every graha is observed once over a single array-valued Time
+        (12:00 UTC each day), so a table is shared by every chart (and,
+        through the transit cache, every worker) that asks for the same window.
+        
+        Args:
+            start: First day of the window
+            days: Number of days
+            
+        Returns:
+            (ISO dates, read-only longitudes array of shape (9, days) in GRAHAS order)
+        """
+        return transit_cache.get_or_compute(
+            f'table:{start.isoformat()}:{days}', lambda: self._compute_transit_table(start, days)
+        )
+    
+    def _compute_transit_table(self, start: date, days: int) -> Tuple[Tuple[str, ...], np.ndarray]:
+        t = self.ts.utc(start.year, start.month, start.day + np.arange(days), 12)
+        
+        years_from_2000 = (t.tt - 2451545.0) / 365.25
+        ayanamsa = self.LAHIRI_AYANAMSA_2000 + (years_from_2000 * self.AYANAMSA_RATE)
+        earth_at = self.earth.at(t)
+        
+        bodies = {
+            'Sun': self.eph['sun'],
+            'Moon': self.eph['moon'],
+            'Mars': self.eph['mars'],
+            'Mercury': self.eph['mercury'],
+            'Jupiter': self.eph['jupiter barycenter'],
+            'Venus': self.eph['venus'],
+            'Saturn': self.eph['saturn barycenter']
+        }
+        
+        table = np.empty((len(self.GRAHAS), days))
+        for row, name in enumerate(self.GRAHAS[:7]):
+            lon_tropical = earth_at.observe(bodies[name]).apparent().ecliptic_latlon()[1].degrees
+            table[row] = (lon_tropical - ayanamsa) % 360
+        
+        # Rahu (approximate) and Ketu
+        rahu_lon_tropical = (125.0 - ((t.tt - 2451545.0) * 0.05295)) % 360
+        table[7] = (rahu_lon_tropical - ayanamsa) % 360
+        table[8] = (table[7] + 180) % 360
+        
+        # Shared across callers, so keep it read-only
+        table.setflags(write=False)
+        dates = tuple((start + timedelta(days=i)).isoformat() for i in range(days))
+        
+        return dates, table
+
 # Global instance
 ephemeris_service = EphemerisService()
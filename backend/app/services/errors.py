@@ -0,0 +1,7 @@
+"""
+Exceptions raised by services the registry loads lazily
+Routes catch these without importing (and so loading) the services themselves
+"""
+
+class GeocodingUnavailableError(Exception):
+    """Raised when the online geocoder cannot be reached; callers should answer 503"""
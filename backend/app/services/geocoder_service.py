@@ -0,0 +1,172 @@
+"""
+Offline geocoding and timezone lookup
+Serves place search, geocoding and point-to-timezone lookups from the
+memory-mapped gazetteer index, with no network access
+"""
+from pathlib import Path
+from typing import Dict, List, Optional
+import json
+import logging
+import threading
+
+import pytz
+
+from app.config import settings
+from app.utils.gazetteer_index import GazetteerIndex, INDEX_VERSION, build_index, normalize
+
+logger = logging.getLogger(__name__)
+
+class GeocoderService:
+    """Place search, geocoding and timezone lookup against the local gazetteer"""
+
+    # Common country spellings beyond the ISO 3166 names
+    COUNTRY_ALIASES = {
+        'usa': 'US', 'america': 'US', 'united states of america': 'US',
+        'uk': 'GB', 'united kingdom': 'GB', 'england': 'GB', 'britain': 'GB', 'great britain': 'GB',
+        'uae': 'AE', 'emirates': 'AE'
+    }
+
+    def __init__(self, source: Optional[Path] = None, index_dir: Optional[Path] = None,
+                 timezone_polygons: Optional[str] = None):
+        """
+        Args:
+            source: GeoNames-format gazetteer (default: settings.GAZETTEER_PATH)
+            index_dir: Where the built index lives (default: settings.GAZETTEER_INDEX_DIR)
+            timezone_polygons: Optional timezone-boundary-builder GeoJSON
+        """
+        self.source = Path(source or settings.GAZETTEER_PATH)
+        self.index_dir = Path(index_dir or settings.GAZETTEER_INDEX_DIR)
+        self.timezone_polygons = settings.TIMEZONE_POLYGONS_PATH if timezone_polygons is None else timezone_polygons
+
+        self._index: Optional[GazetteerIndex] = None
+        self._lock = threading.Lock()
+
+        self.countries = {normalize(name): code for code, name in pytz.country_names.items()}
+        self.countries.update(self.COUNTRY_ALIASES)
+
+    def _index_is_current(self) -> bool:
+        meta_path = self.index_dir / 'meta.json'
+        if not meta_path.exists():
+            return False
+        meta = json.loads(meta_path.read_text(encoding='utf-8'))
+        stat = self.source.stat()
+        polygons = str(Path(self.timezone_polygons).resolve()) if self.timezone_polygons else None
+        return (meta.get('version') == INDEX_VERSION
+                and meta.get('source') == str(self.source.resolve())
+                and meta.get('source_size') == stat.st_size
+                and meta.get('source_mtime') == stat.st_mtime
+                and meta.get('timezone_polygons') == polygons)
+
+    @property
+    def index(self) -> GazetteerIndex:
+        """The loaded index, built on first use when missing or stale"""
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    if not self._index_is_current():
+                        meta = build_index(self.source, self.index_dir, self.timezone_polygons or None)
+                        logger.info("Built gazetteer index", extra={'places': meta['records'],
+                                                                    'polygons': meta['polygons']})
+                    self._index = GazetteerIndex(self.index_dir)
+        return self._index
+
+    def _country_code(self, qualifier: str) -> Optional[str]:
+        """ISO country code a normalized qualifier names ('india' or 'in' -> 'IN'), if any"""
+        if qualifier in self.countries:
+            return self.countries[qualifier]
+        if len(qualifier) == 2 and qualifier.upper() in pytz.country_names:
+            return qualifier.upper()
+        return None
+
+    def _country_filter(self, qualifiers: List[str]) -> Optional[str]:
+        """ISO country code named by any qualifier ('Chennai, India' -> 'IN')"""
+        for qualifier in reversed(qualifiers):
+            code = self._country_code(qualifier)
+            if code:
+                return code
+        return None
+
+    def search(self, query: str, limit: int = 10) -> List[Dict]:
+        """
+        Autocomplete places by name prefix, falling back to fuzzy (trigram) matches
+
+        Args:
+            query: Free text, optionally with a country ('Madurai, India'); with a
+                country, only places in that country match
+            limit: Maximum results
+
+        Returns:
+            Places (name, label, country, latitude, longitude, timezone, population), best first
+        """
+        parts = [normalize(part) for part in query.split(',')]
+        place = parts[0] if parts else ''
+        if not place:
+            return []
+        country = self._country_filter([p for p in parts[1:] if p])
+
+        index = self.index
+        scores = {}
+        for record, exact in index.prefix_matches(place):
+            scores[record] = max(scores.get(record, 0.0), 3.0 if exact else 2.0)
+        if len(scores) < limit:
+            for record, similarity in index.fuzzy_matches(place, limit):
+                scores.setdefault(record, similarity)
+
+        if country:
+            # A place in another country would give a silently wrong chart
+            scores = {r: s for r, s in scores.items() if index.records[r]['country'].decode('ascii') == country}
+
+        ranked = sorted(scores, key=lambda r: (-scores[r], -int(index.records[r]['population'])))
+        return [index.place(record) for record in ranked[:limit]]
+
+    def geocode(self, place_name: str) -> Optional[Dict]:
+        """
+        The place a birth-place name denotes, matched exactly
+
+        Unlike search, no prefix or fuzzy matches: a near miss ('Karur' for
+        Kanpur) would give a chart for the wrong place. Every qualifier after
+        the name must be a country the place is in; the index has no states
+        or provinces, so 'Paris, Texas' is not 'Paris, France'.
+
+        Args:
+            place_name: Name, optionally with a country ('Chennai, India')
+
+        Returns:
+            The most populous exact match, or None
+        """
+        parts = [normalize(part) for part in place_name.split(',')]
+        place = parts[0] if parts else ''
+        if not place:
+            return None
+
+        countries = set()
+        for qualifier in (p for p in parts[1:] if p):
+            code = self._country_code(qualifier)
+            if code is None:
+                return None  # A qualifier that cannot be checked is a mismatch
+            countries.add(code)
+        if len(countries) > 1:
+            return None
+
+        index = self.index
+        records = [r for r in index.exact_matches(place)
+                   if not countries or index.records[r]['country'].decode('ascii') in countries]
+        if not records:
+            return None
+        return index.place(max(records, key=lambda r: int(index.records[r]['population'])))
+
+    def timezone_at(self, latitude: float, longitude: float) -> Optional[str]:
+        """
+        Timezone at a point
+
+        Uses the timezone polygons when the index has them, otherwise the
+        zone of the nearest gazetteer place.
+        """
+        index = self.index
+        tz = index.polygon_timezone(latitude, longitude)
+        if tz is None and len(index):
+            tz = index.place(index.nearest(latitude, longitude))['timezone']
+        return tz
+
+# Global instance
+geocoder_service = GeocoderService()
@@ -0,0 +1,204 @@
+"""
+Pluggable LLM backends behind OllamaService
+Ollama, OpenAI-compatible servers, llama.cpp server and a deterministic fake
+"""
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Sequence
+import hashlib
+import re
+import time
+
+import requests
+
+class LLMBackend(ABC):
+    """Interface every backend implements"""
+
+    name = "base"
+
+    @abstractmethod
+    def generate(self, model: str, prompt: str, options: Optional[Dict] = None,
+                 context: Optional[Sequence[int]] = None) -> Dict:
+        """
+        Generate a completion
+
+        Args:
+            model: Model name
+            prompt: Full prompt text
+            options: Sampling options (temperature, top_p, max_tokens)
+            context: Conversation context from a previous call, if supported
+
+        Returns:
+            {'response': text, 'context': token array or None, 'eval_count': tokens generated}
+        """
+
+    @abstractmethod
+    def check_health(self) -> bool:
+        """True when the backend is reachable"""
+
+class OllamaBackend(LLMBackend):
+    """Local Ollama server (supports context reuse)"""
+
+    name = "ollama"
+
+    def __init__(self, base_url: str, keep_alive: Optional[str] = None):
+        import ollama
+
+        self.client = ollama.Client(host=base_url)
+        self.keep_alive = keep_alive
+
+    def generate(self, model: str, prompt: str, options: Optional[Dict] = None,
+                 context: Optional[Sequence[int]] = None) -> Dict:
+        response = self.client.generate(
+            model=model,
+            prompt=prompt,
+            context=context,
+            keep_alive=self.keep_alive,
+            options=options
+        )
+        return {
+            'response': response['response'],
+            'context': response.get('context'),
+            'eval_count': response.get('eval_count', 0)
+        }
+
+    def check_health(self) -> bool:
+        try:
+            self.client.list()
+            return True
+        except Exception:
+            return False
+
+class OpenAICompatibleBackend(LLMBackend):
+    """Any server exposing the OpenAI /v1/completions API (vLLM, LM Studio, llama.cpp, ...)"""
+
+    name = "openai"
+
+    def __init__(self, base_url: str, api_key: str = "", timeout: float = 300.0):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+        if api_key:
+            self.session.headers['Authorization'] = f"Bearer {api_key}"
+
+    def generate(self, model: str, prompt: str, options: Optional[Dict] = None,
+                 context: Optional[Sequence[int]] = None) -> Dict:
+        options = options or {}
+        response = self.session.post(f"{self.base_url}/v1/completions", json={
+            'model': model,
+            'prompt': prompt,
+            'temperature': options.get('temperature', 0.7),
+            'top_p': options.get('top_p', 0.9),
+            'max_tokens': options.get('max_tokens', 1000)
+        }, timeout=self.timeout)
+        response.raise_for_status()
+        data = response.json()
+        return {
+            'response': data['choices'][0]['text'],
+            'context': None,
+            'eval_count': data.get('usage', {}).get('completion_tokens', 0)
+        }
+
+    def check_health(self) -> bool:
+        try:
+            return self.session.get(f"{self.base_url}/v1/models", timeout=5).ok
+        except requests.RequestException:
+            return False
+
+class LlamaCppBackend(LLMBackend):
+    """llama.cpp server native /completion API (server-side prompt cache)"""
+
+    name = "llamacpp"
+
+    def __init__(self, base_url: str, timeout: float = 300.0):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def generate(self, model: str, prompt: str, options: Optional[Dict] = None,
+                 context: Optional[Sequence[int]] = None) -> Dict:
+        options = options or {}
+        response = self.session.post(f"{self.base_url}/completion", json={
+            'prompt': prompt,
+            'temperature': options.get('temperature', 0.7),
+            'top_p': options.get('top_p', 0.9),
+            'n_predict': options.get('max_tokens', 1000),
+            'cache_prompt': True
+        }, timeout=self.timeout)
+        response.raise_for_status()
+        data = response.json()
+        return {
+            'response': data['content'],
+            'context': None,
+            'eval_count': data.get('tokens_predicted', 0)
+        }
+
+    def check_health(self) -> bool:
+        try:
+            return self.session.get(f"{self.base_url}/health", timeout=5).ok
+        except requests.RequestException:
+            return False
+
+class FakeBackend(LLMBackend):
+    """
+    Deterministic stand-in for load testing without a model
+
+    Output depends only on the prompt, and tokens are "generated" at a fixed
+    rate so latency behaves like a real model. Section headers requested in
+    the prompt ('### [CATEGORY]') are echoed so sectioned responses split.
+    """
+
+    name = "fake"
+
+    WORDS = ['Jupiter', 'Saturn', 'transit', 'favours', 'career', 'growth', 'patience',
+             'brings', 'during', 'the', 'coming', 'months', 'with', 'steady', 'results']
+
+    SECTION_HEADER = re.compile(r'^### \[[A-Z]+\]$', re.MULTILINE)
+
+    def __init__(self, tokens: int = 200, tokens_per_second: float = 50.0):
+        """
+        Args:
+            tokens: Tokens emitted per call (per section for sectioned prompts)
+            tokens_per_second: Emission rate; 0 returns immediately
+        """
+        self.tokens = tokens
+        self.tokens_per_second = tokens_per_second
+
+    def _text(self, seed: bytes, count: int) -> List[str]:
+        digest = hashlib.sha256(seed).digest()
+        return [self.WORDS[digest[i % len(digest)] % len(self.WORDS)] for i in range(count)]
+
+    def generate(self, model: str, prompt: str, options: Optional[Dict] = None,
+                 context: Optional[Sequence[int]] = None) -> Dict:
+        headers = self.SECTION_HEADER.findall(prompt) or ['']
+        seed = prompt.encode('utf-8')
+
+        parts = []
+        for header in headers:
+            words = self._text(seed + header.encode('utf-8'), self.tokens)
+            parts.append(f"{header}\n{' '.join(words)}".strip())
+
+        count = self.tokens * len(headers)
+        if self.tokens_per_second > 0:
+            time.sleep(count / self.tokens_per_second)
+
+        return {
+            'response': '\n\n'.join(parts),
+            'context': list(context or []) + [len(prompt)],
+            'eval_count': count
+        }
+
+    def check_health(self) -> bool:
+        return True
+
+def create_backend(settings) -> LLMBackend:
+    """Build the backend selected by settings.LLM_BACKEND"""
+    backend = settings.LLM_BACKEND.lower()
+    if backend == 'ollama':
+        return OllamaBackend(settings.OLLAMA_BASE_URL, settings.OLLAMA_KEEP_ALIVE)
+    if backend == 'openai':
+        return OpenAICompatibleBackend(settings.OPENAI_BASE_URL, settings.OPENAI_API_KEY)
+    if backend == 'llamacpp':
+        return LlamaCppBackend(settings.LLAMACPP_BASE_URL)
+    if backend == 'fake':
+        return FakeBackend(settings.LLM_FAKE_TOKENS, settings.LLM_FAKE_TOKENS_PER_SECOND)
+    raise ValueError(f"Unknown LLM_BACKEND '{settings.LLM_BACKEND}' (use ollama, openai, llamacpp or fake)")
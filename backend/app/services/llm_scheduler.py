@@ -0,0 +1,167 @@
+"""
+Scheduler in front of the LLM (Ollama) service
+Bounded concurrency slots, a priority queue and fast rejection when full
+"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+import asyncio
+import contextvars
+import functools
+import heapq
+import itertools
+import time
+
+from prometheus_client import Gauge
+
+from app.config import settings
+from app.utils.timing import record_stage
+
+# Lower number = served first
+PRIORITY_INTERACTIVE = 0  # Custom questions typed by a waiting user
+PRIORITY_STANDARD = 1  # Category / general predictions
+PRIORITY_BATCH = 2  # Precompute and batch jobs
+
+class QueueFullError(Exception):
+    """Raised when the LLM queue is at capacity; callers should answer 429"""
+
+class LLMScheduler:
+    """Run blocking LLM calls with bounded concurrency and priorities"""
+
+    def __init__(self, max_concurrency: int = 1, max_queue: int = 32):
+        """
+        Args:
+            max_concurrency: Generations allowed to run at once
+            max_queue: Requests allowed to wait for a slot before rejecting
+        """
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+
+        self._active = 0
+        self._waiters = []  # heap of (priority, sequence, future)
+        self._sequence = itertools.count()
+        # One thread per slot: a generation holds its slot until its thread finishes
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='llm')
+
+        # Metrics
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._wait_times = deque(maxlen=1000)
+
+    @property
+    def queue_depth(self) -> int:
+        """Requests currently waiting for a slot"""
+        return sum(1 for _, _, fut in self._waiters if not fut.done())
+
+    async def _acquire(self, priority: int):
+        """Take a slot, waiting in priority order if all are busy"""
+        if self._active < self.max_concurrency and not self._waiters:
+            self._active += 1
+            return
+
+        if self.queue_depth >= self.max_queue:
+            self.rejected += 1
+            raise QueueFullError(f"LLM queue is full ({self.max_queue} waiting)")
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        try:
+            # The slot is handed over by _release, so _active is already counted
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Slot was handed to us just as we were cancelled; pass it on
+                self._release()
+            raise
+
+    def _release(self):
+        """Hand the slot to the highest-priority waiter, or free it"""
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._active -= 1
+
+    async def submit(self, func: Callable, *args, priority: int = PRIORITY_STANDARD, **kwargs) -> Any:
+        """
+        Run a blocking LLM call once a slot is free
+
+        Args:
+            func: Blocking callable (e.g., ollama_service.generate_prediction)
+            priority: PRIORITY_INTERACTIVE, PRIORITY_STANDARD or PRIORITY_BATCH
+
+        Returns:
+            Whatever func returns
+
+        Raises:
+            QueueFullError: If the queue is at capacity
+        """
+        self.submitted += 1
+        queued_at = time.perf_counter()
+        await self._acquire(priority)
+        waited = time.perf_counter() - queued_at
+        self._wait_times.append(waited)
+        record_stage('llm_queue_wait', waited)
+
+        loop = asyncio.get_running_loop()
+        try:
+            # Carry the request context (timer, request ID) into the worker thread
+            call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+            future = self._executor.submit(call)
+        except BaseException:
+            self._release()
+            raise
+        # Released when the generation is done, not when the caller stops waiting:
+        # a cancelled request's generation keeps running and keeps its slot
+        future.add_done_callback(functools.partial(self._generation_done, loop))
+
+        try:
+            result = await asyncio.wrap_future(future)
+        except Exception:
+            self.failed += 1
+            raise
+        self.completed += 1
+        return result
+
+    def _generation_done(self, loop: asyncio.AbstractEventLoop, future):
+        """Free the slot on the scheduler's loop (called from the worker thread)"""
+        try:
+            loop.call_soon_threadsafe(self._release)
+        except RuntimeError:  # Loop already closed; nothing can be waiting on it
+            self._release()
+
+    def get_metrics(self) -> Dict:
+        """Queue depth, slot usage, counters and wait-time percentiles (seconds)"""
+        waits = sorted(self._wait_times)
+
+        def percentile(p: float) -> float:
+            if not waits:
+                return 0.0
+            return round(waits[min(len(waits) - 1, int(p * len(waits)))], 4)
+
+        return {
+            'max_concurrency': self.max_concurrency,
+            'max_queue': self.max_queue,
+            'active': self._active,
+            'queue_depth': self.queue_depth,
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'failed': self.failed,
+            'rejected': self.rejected,
+            'wait_p50': percentile(0.50),
+            'wait_p95': percentile(0.95),
+            'wait_max': round(waits[-1], 4) if waits else 0.0
+        }
+
+# Global instance
+llm_scheduler = LLMScheduler(settings.LLM_MAX_CONCURRENCY, settings.LLM_MAX_QUEUE)
+
+Gauge('rajanadi_llm_queue_depth', 'LLM requests waiting for a slot').set_function(
+    lambda: llm_scheduler.queue_depth
+)
+Gauge('rajanadi_llm_active', 'LLM generations running').set_function(
+    lambda: llm_scheduler._active
+)
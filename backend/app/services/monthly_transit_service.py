@@ -1,6 +1,10 @@
-from typing import Dict, List
-from datetime import datetime, timedelta
-from skyfield.api import load
+from typing import Dict, List, Tuple
+from datetime import datetime, date
+from functools import lru_cache
+import numpy as np
+from app.utils.nakshatra_utils import get_nakshatra_indices, NAKSHATRA_NAMES, STAR_LORDS
+from app.utils.ingress_utils import find_ingresses
+from app.utils.ephemeris import get_ephemeris, get_timescale
 
 class MonthlyTransitService:
     """Calculate monthly planetary positions and influences"""
@@ -22,61 +26,163 @@ class MonthlyTransitService:
         'Libra', 'Scorpio', 'Sagittarius', 'Capricorn', 'Aquarius', 'Pisces'
     ]
     
+    # Lahiri Ayanamsa
+    LAHIRI_AYANAMSA_2000 = 23.85
+    AYANAMSA_RATE = 0.01397
+    
     def __init__(self):
-        self.ts = load.timescale()
-        self.planets = load('de421.bsp')
+        self.ts = get_timescale()
+        self.planets = get_ephemeris()
         self.earth = self.planets['earth']
+        
+        self.planet_bodies = {
+            'Sun': self.planets['sun'],
+            'Moon': self.planets['moon'],
+            'Mars': self.planets['mars'],
+            'Mercury': self.planets['mercury'],
+            'Jupiter': self.planets['jupiter barycenter'],
+            'Venus': self.planets['venus'],
+            'Saturn': self.planets['saturn barycenter']
+        }
     
-    def get_monthly_transits(self, months_ahead: int = 12) -> List[Dict]:
-        """Get planetary positions for next N months"""
-        monthly_data = []
-        current_date = datetime.now()
+    def get_ayanamsa(self, tt) -> np.ndarray:
+        """Calculate Lahiri ayanamsa for (an array of) TT Julian dates"""
+        years_from_2000 = (np.asarray(tt) - 2451545.0) / 365.25
+        return self.LAHIRI_AYANAMSA_2000 + (years_from_2000 * self.AYANAMSA_RATE)
+    
+    def get_sidereal_longitudes(self, t) -> Dict[str, np.ndarray]:
+        """
+        Sidereal longitudes of all nine grahas for an array-valued Time
+        
+        Args:
+            t: Skyfield Time holding every sample instant
+            
+        Returns:
+            Dictionary of planet name -> longitude array (degrees)
+        """
+        ayanamsa = self.get_ayanamsa(t.tt)
+        earth_at = self.earth.at(t)
+        
+        longitudes = {}
+        for planet_name, planet_body in self.planet_bodies.items():
+            # ecliptic_latlon() returns (lat, lon, distance)
+            tropical_lon = earth_at.observe(planet_body).apparent().ecliptic_latlon()[1].degrees
+            longitudes[planet_name] = (tropical_lon - ayanamsa) % 360
+        
+        # Rahu (approximate mean node) and Ketu opposite
+        days_from_epoch = t.tt - 2451545.0
+        rahu_lon_tropical = (125.0 - (days_from_epoch * 0.05295)) % 360
+        longitudes['Rahu'] = (rahu_lon_tropical - ayanamsa) % 360
+        longitudes['Ketu'] = (longitudes['Rahu'] + 180) % 360
+        
+        return longitudes
+    
+    def _month_starts(self, year: int, month: int, count: int) -> List[date]:
+        """First day of `count` consecutive months starting at year/month"""
+        starts = []
+        for offset in range(count):
+            m = month - 1 + offset
+            starts.append(date(year + m // 12, m % 12 + 1, 1))
+        return starts
+    
+    def _format_ingress(self, planet_name: str, jd: float, from_rasi: int, to_rasi: int) -> Dict:
+        """Format one sign change for the response"""
+        moment = self.ts.tt_jd(jd).utc_datetime()
+        return {
+            'planet': planet_name,
+            'date': moment.strftime('%Y-%m-%d'),
+            'time': moment.strftime('%H:%M'),
+            'from_sign': self.RASI_NAMES[from_rasi],
+            'to_sign': self.RASI_NAMES[to_rasi]
+        }
+    
+    @lru_cache(maxsize=32)
+    def _compute_monthly_transits(self, year: int, month: int, months_ahead: int) -> Tuple[Dict, ...]:
+        """Evaluate all planets on a daily grid spanning the requested months"""
+        # Month starts plus the boundary that closes the last month
+        starts = self._month_starts(year, month, months_ahead + 1)
+        total_days = (starts[-1] - starts[0]).days
+        
+        # One array-valued Time (00:00 UTC daily); skyfield normalises day overflow
+        t = self.ts.utc(year, month, np.arange(1, total_days + 2))
+        longitudes = self.get_sidereal_longitudes(t)
+        start_idx = [(s - starts[0]).days for s in starts]
         
-        # Lahiri Ayanamsa for current year
-        ayanamsa = 23.85 + ((current_date.year - 2000) * 0.01397)
+        # Ingresses for the whole span, bucketed into months afterwards
+        ingresses = {}
+        for planet_name, lons in longitudes.items():
+            ingresses[planet_name] = find_ingresses(t.tt, lons)
         
-        for month_offset in range(months_ahead):
-            target_date = current_date + timedelta(days=30 * month_offset)
-            t = self.ts.utc(target_date.year, target_date.month, target_date.day)
+        monthly_data = []
+        for m in range(months_ahead):
+            first, last = start_idx[m], start_idx[m + 1]
+            tt_first, tt_last = t.tt[first], t.tt[last]
             
             month_transits = {
-                'month': target_date.strftime('%B %Y'),
-                'planets': []
+                'month': starts[m].strftime('%B %Y'),
+                'start_date': starts[m].isoformat(),
+                'planets': [],
+                'sign_changes': [],
+                'moon_transits': []
             }
             
-            # Calculate position for each planet
-            planet_bodies = {
-                'Sun': self.planets['sun'],
-                'Moon': self.planets['moon'],
-                'Mars': self.planets['mars'],
-                'Mercury': self.planets['mercury'],
-                'Jupiter': self.planets['jupiter barycenter'],
-                'Venus': self.planets['venus'],
-                'Saturn': self.planets['saturn barycenter']
-            }
-            
-            for planet_name, planet_body in planet_bodies.items():
-                try:
-                    # Get tropical longitude
-                    astrometric = self.earth.at(t).observe(planet_body)
-                    lon, lat, distance = astrometric.ecliptic_latlon()
-                    tropical_lon = lon.degrees
-                    
-                    # Convert to sidereal
-                    sidereal_lon = (tropical_lon - ayanamsa) % 360
-                    rasi = int(sidereal_lon / 30) + 1
-                    
-                    month_transits['planets'].append({
-                        'name': planet_name,
-                        'rasi': self.RASI_NAMES[rasi],
-                        'influence': self.PLANET_INFLUENCES[planet_name]
-                    })
-                except:
-                    continue
+            for planet_name, lons in longitudes.items():
+                sidereal_lon = float(lons[first])
+                rasi = int(sidereal_lon / 30) + 1
+                nakshatra_idx, pada = get_nakshatra_indices(sidereal_lon)
+                
+                month_transits['planets'].append({
+                    'name': planet_name,
+                    'rasi': self.RASI_NAMES[rasi],
+                    'nakshatra': NAKSHATRA_NAMES[int(nakshatra_idx)],
+                    'nakshatra_lord': STAR_LORDS[int(nakshatra_idx)],
+                    'pada': int(pada),
+                    'influence': self.PLANET_INFLUENCES[planet_name]
+                })
+                
+                ingress_jd, from_rasi, to_rasi = ingresses[planet_name]
+                in_month = (ingress_jd >= tt_first) & (ingress_jd < tt_last)
+                changes = [
+                    self._format_ingress(planet_name, jd, int(fr), int(to))
+                    for jd, fr, to in zip(ingress_jd[in_month], from_rasi[in_month], to_rasi[in_month])
+                ]
+                
+                if planet_name == 'Moon':
+                    month_transits['moon_transits'] = changes
+                else:
+                    month_transits['sign_changes'].extend(changes)
             
+            month_transits['sign_changes'].sort(key=lambda x: (x['date'], x['time']))
             monthly_data.append(month_transits)
         
-        return monthly_data
+        return tuple(monthly_data)
+    
+    def get_monthly_transits(self, months_ahead: int = 12) -> List[Dict]:
+        """
+        Get planetary positions at the start of each of the next N calendar months
+        
+        Each month also lists the sign changes that happen inside it and
+        the Moon's sign transits for the whole month.
+        
+        Args:
+            months_ahead: Number of months, starting with the current month
+            
+        Returns:
+            List of monthly transit dictionaries
+        """
+        today = datetime.utcnow()
+        monthly_data = self._compute_monthly_transits(today.year, today.month, months_ahead)
+        
+        # Hand out copies so callers cannot mutate the cached months
+        return [
+            {
+                **month,
+                'planets': [dict(p) for p in month['planets']],
+                'sign_changes': [dict(c) for c in month['sign_changes']],
+                'moon_transits': [dict(c) for c in month['moon_transits']]
+            }
+            for month in monthly_data
+        ]
 
 # Global instance
 monthly_transit_service = MonthlyTransitService()
@@ -1,31 +1,99 @@
 """
 Ollama LLM integration for AI-powered predictions
 """
-import ollama
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from datetime import datetime, date
+import asyncio
+import hashlib
 import json
+import logging
+import re
+import time
+from app.config import settings
+from app.utils.ttl_cache import TTLCache
+from app.services.llm_backends import LLMBackend, create_backend
+from app.utils.timing import record_stage, record_generation
 from app.utils.age_utils import (
     calculate_age,
+    get_allowed_categories,
     is_category_allowed,
     get_age_appropriate_message,
     get_age_context_for_prompt,
     filter_prediction_topics
 )
 
+logger = logging.getLogger(__name__)
+
+class GenerationFailed(str):
+    """Error text returned in place of a prediction (shown to the user, never cached)"""
+
 class OllamaService:
     """Generate predictions using Ollama LLM"""
     
-    def __init__(self, model: str = "llama3", base_url: str = "http://localhost:11434"):
+    CATEGORY_FOCUS = {
+        'marriage': 'Marriage, Relationships, Spouse characteristics, Marriage timing',
+        'career': 'Career path, Professional success, Job changes, Business prospects',
+        'health': 'Health patterns, Medical issues, Vitality, Recovery periods',
+        'parents': 'Father relationship, Mother relationship, Family dynamics',
+        'children': 'Children prospects, Progeny timing, Parenting style',
+        'wealth': 'Financial status, Wealth accumulation, Income sources, Investments',
+        'education': 'Education, Learning abilities, Academic success, Suitable fields of study'
+    }
+    
+    def __init__(self, model: Optional[str] = None, base_url: Optional[str] = None,
+                 backend: Optional[LLMBackend] = None):
         """
         Initialize Ollama service
         
         Args:
-            model: Ollama model name (default: llama3)
-            base_url: Ollama server URL
+            model: Model name (default: settings.OLLAMA_MODEL)
+            base_url: Ollama server URL (default: settings.OLLAMA_BASE_URL)
+            backend: LLM backend (default: the one selected by settings.LLM_BACKEND)
         """
-        self.model = model
-        self.base_url = base_url
+        self.model = model or settings.OLLAMA_MODEL
+        self.base_url = base_url or settings.OLLAMA_BASE_URL
+        if backend is None:
+            backend = create_backend(settings.model_copy(update={'OLLAMA_BASE_URL': self.base_url}))
+        self.backend = backend
+        
+        # Ollama context token arrays of recent custom-question conversations, per chart
+        self.sessions = TTLCache(maxsize=settings.LLM_MAX_SESSIONS, ttl=settings.LLM_SESSION_TTL_SECONDS)
+    
+    async def check_health(self) -> bool:
+        """True when the configured LLM backend is reachable"""
+        return await asyncio.to_thread(self.backend.check_health)
+    
+    def prediction_fingerprint(self, birth_data: Dict, natal_planets: Dict,
+                               category: Optional[str], custom_question: Optional[str]) -> str:
+        """
+        Key identifying identical prediction requests
+        
+        Covers everything that shapes the prompt: chart positions, birth
+        details (age), category, question and model.
+        
+        Returns:
+            Hex digest
+        """
+        chart = {
+            name: [data.get('rasi'), data.get('degree'), data.get('is_retrograde', False)]
+            for name, data in natal_planets.items()
+        }
+        payload = {
+            'birth': birth_data,
+            'chart': chart,
+            'category': category or 'general',
+            'question': (custom_question or '').strip(),
+            'model': self.model
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode('utf-8')
+        return hashlib.sha256(encoded).hexdigest()
+    
+    @staticmethod
+    def is_cacheable(prediction) -> bool:
+        """False for failed generations (a prediction string or a dict of them)"""
+        if isinstance(prediction, dict):
+            return not any(isinstance(text, GenerationFailed) for text in prediction.values())
+        return not isinstance(prediction, GenerationFailed)
     
     def format_chart_data(self, chart_analysis: Dict) -> str:
         """Format chart data for the prompt"""
@@ -67,19 +135,28 @@ class OllamaService:
             Direct answer to the question
         """
         
-        print(f"\n=== CUSTOM QUESTION DEBUG ===")
-        print(f"Question: {question}")
-        print(f"Category: {category}")
-        print(f"Name: {birth_data.get('name')}")
-        print(f"Age: {age}")
-        print(f"===========================\n")
+        logger.debug("Custom question", extra={
+            'question': question, 'category': category, 'person': birth_data.get('name'), 'age': age
+        })
+        
+        started = time.perf_counter()
         
         # Add age context if available
         age_context = ""
         if age is not None:
             age_context = f"\n\nIMPORTANT AGE CONTEXT:\n{get_age_context_for_prompt(age, birth_data.get('name', 'Native'))}\n"
         
-        prompt = f"""You are an expert Vedic astrologer. Answer this specific question directly.
+        # Follow-up on a chart with a live session: send only the new question and
+        # let Ollama reuse the context (KV cache) of the earlier turns
+        session_key = self.prediction_fingerprint(birth_data, chart_analysis.get('planets', {}), 'session', None)
+        session = self.sessions.get(session_key)
+        if session:
+            prompt = f"""FOLLOW-UP QUESTION about the same person and chart: "{question}"
+Today's Date: {datetime.now().strftime('%B %d, %Y')}
+
+Answer directly in 2-3 paragraphs. Provide specific timeframes when relevant. Ensure your answer is appropriate for their age. Start immediately with the answer - no introductions."""
+        else:
+            prompt = f"""You are an expert Vedic astrologer. Answer this specific question directly.
 
 QUESTION: "{question}"
 
@@ -96,22 +173,47 @@ Today's Date: {datetime.now().strftime('%B %d, %Y')}
 Answer their question directly in 2-3 paragraphs. Provide specific timeframes when relevant. Ensure your answer is appropriate for their age. Start immediately with the answer - no introductions."""
 
         try:
-            response = ollama.generate(
-                model=self.model,
-                prompt=prompt,
-                options={
-                    'temperature': 0.6,
-                    'top_p': 0.85,
-                    'max_tokens': 600
-                }
-            )
+            response = self._generate(prompt, started, {
+                'temperature': 0.6,
+                'top_p': 0.85,
+                'max_tokens': 600
+            }, context=session['context'] if session else None)
             
+            self._update_session(session_key, session, response.get('context'))
             return response['response']
         
         except Exception as e:
+            logger.error("LLM generation failed: %s", e)
             error_msg = f"Error connecting to Ollama: {str(e)}\n\n"
             error_msg += "Please ensure Ollama is running (ollama serve) and the llama3 model is installed (ollama pull llama3)."
-            return error_msg
+            return GenerationFailed(error_msg)
+    
+    def _generate(self, prompt: str, prompt_started: float, options: Dict,
+                  context: Optional[List[int]] = None) -> Dict:
+        """
+        Call the backend, recording prompt-build and generation timings
+        
+        Args:
+            prompt: Full prompt text
+            prompt_started: perf_counter() value when prompt building began
+            options: Sampling options
+            context: Context of an earlier turn, if any
+        """
+        started = time.perf_counter()
+        record_stage('prompt_build', started - prompt_started)
+        
+        response = self.backend.generate(model=self.model, prompt=prompt, context=context, options=options)
+        record_generation(time.perf_counter() - started, response.get('eval_count') or 0)
+        return response
+    
+    def _update_session(self, session_key: str, session: Optional[Dict], context: Optional[List[int]]):
+        """Keep the returned context for the next follow-up, up to LLM_SESSION_MAX_TURNS"""
+        turns = session['turns'] + 1 if session else 1
+        if context and turns < settings.LLM_SESSION_MAX_TURNS:
+            self.sessions.set(session_key, {'context': list(context), 'turns': turns})
+        else:
+            # Start afresh instead of growing the context without bound
+            self.sessions.pop(session_key)
     
     def generate_category_prediction(self, birth_data: Dict, chart_analysis: Dict, 
                                     transit_data: Dict, matched_rules: str, 
@@ -130,17 +232,8 @@ Answer their question directly in 2-3 paragraphs. Provide specific timeframes wh
         Returns:
             Category-focused prediction
         """
-        category_focus = {
-            'marriage': 'Marriage, Relationships, Spouse characteristics, Marriage timing',
-            'career': 'Career path, Professional success, Job changes, Business prospects',
-            'health': 'Health patterns, Medical issues, Vitality, Recovery periods',
-            'parents': 'Father relationship, Mother relationship, Family dynamics',
-            'children': 'Children prospects, Progeny timing, Parenting style',
-            'wealth': 'Financial status, Wealth accumulation, Income sources, Investments',
-            'education': 'Education, Learning abilities, Academic success, Suitable fields of study'
-        }
-        
-        focus = category_focus.get(category, 'General life predictions')
+        started = time.perf_counter()
+        focus = self.CATEGORY_FOCUS.get(category, 'General life predictions')
         
         # Add age context if available
         age_context = ""
@@ -173,22 +266,148 @@ Provide a focused prediction ONLY about {focus}. Structure your answer:
 Ensure your predictions are appropriate for the person's age and life stage. Keep response under 6 paragraphs. Be specific and actionable."""
 
         try:
-            response = ollama.generate(
-                model=self.model,
-                prompt=prompt,
-                options={
-                    'temperature': 0.65,
-                    'top_p': 0.9,
-                    'max_tokens': 1000
-                }
-            )
+            response = self._generate(prompt, started, {
+                'temperature': 0.65,
+                'top_p': 0.9,
+                'max_tokens': 1000
+            })
             
             return response['response']
         
         except Exception as e:
+            logger.error("LLM generation failed: %s", e)
             error_msg = f"Error connecting to Ollama: {str(e)}\n\n"
             error_msg += "Please ensure Ollama is running."
-            return error_msg
+            return GenerationFailed(error_msg)
+    
+    def _get_age(self, birth_data: Dict, category: Optional[str] = None) -> Optional[int]:
+        """Current age from birth_data['date_of_birth'] (string or date), if known"""
+        age = None
+        date_of_birth_str = birth_data.get('date_of_birth')
+        
+        if date_of_birth_str:
+            try:
+                # Parse date of birth (could be string or date object)
+                if isinstance(date_of_birth_str, str):
+                    dob = datetime.strptime(date_of_birth_str, '%Y-%m-%d').date()
+                elif isinstance(date_of_birth_str, date):
+                    dob = date_of_birth_str
+                else:
+                    dob = None
+                
+                if dob:
+                    age = calculate_age(dob)
+                    logger.debug("Age calculated", extra={
+                        'person': birth_data.get('name'), 'date_of_birth': dob, 'age': age, 'category': category
+                    })
+            except Exception as e:
+                logger.warning("Error calculating age: %s", e)
+                age = None
+        
+        return age
+    
+    def get_batch_categories(self, birth_data: Dict) -> List[str]:
+        """Categories covered by a multi-category reading (age-appropriate when age is known)"""
+        age = self._get_age(birth_data)
+        if age is None:
+            return list(self.CATEGORY_FOCUS)
+        allowed = get_allowed_categories(age)
+        return [category for category in self.CATEGORY_FOCUS if category in allowed]
+    
+    def split_sections(self, text: str, categories: List[str]) -> Dict[str, str]:
+        """
+        Split a sectioned response on its '### [CATEGORY]' headers
+        
+        Returns:
+            Category -> section text (a GenerationFailed notice when the model
+            skipped a section, so it is retried rather than cached)
+        """
+        pattern = re.compile(r'^\s*#{1,4}\s*\[?\s*(' + '|'.join(categories) + r')\s*\]?.*$',
+                             re.IGNORECASE | re.MULTILINE)
+        matches = list(pattern.finditer(text))
+        
+        sections = {}
+        for i, match in enumerate(matches):
+            category = match.group(1).lower()
+            end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+            if category not in sections:
+                sections[category] = text[match.end():end].strip()
+        
+        return {
+            category: sections.get(category)
+            or GenerationFailed("No prediction was generated for this category. Please try again.")
+            for category in categories
+        }
+    
+    def generate_multi_category_prediction(self, birth_data: Dict, chart_analysis: Dict,
+                                           transit_data: Dict, matched_rules: str,
+                                           categories: Optional[List[str]] = None) -> Dict[str, str]:
+        """
+        Generate predictions for several categories in one LLM call
+        
+        The chart and rules are sent once and the model answers every
+        category under its own header, which is then split back apart.
+        
+        Args:
+            birth_data: Birth details
+            chart_analysis: Chart analysis
+            transit_data: Transit data
+            matched_rules: Relevant rules
+            categories: Categories to cover (default: all age-appropriate ones)
+            
+        Returns:
+            Dictionary of category -> prediction text
+        """
+        started = time.perf_counter()
+        age = self._get_age(birth_data, 'multi')
+        allowed = self.get_batch_categories(birth_data)
+        categories = [c for c in (categories or allowed) if c in allowed]
+        if not categories:
+            return {}
+        
+        age_context = ""
+        if age is not None:
+            age_context = f"\n\n### AGE CONTEXT:\n{get_age_context_for_prompt(age, birth_data.get('name', 'Native'))}\n"
+        
+        sections_str = "\n".join(
+            f"### [{category.upper()}]\nFocus: {self.CATEGORY_FOCUS[category]}"
+            for category in categories
+        )
+        
+        prompt = f"""You are a Rajanadi Shastra expert providing focused predictions for several life areas.
+
+### BIRTH CHART:
+**Name:** {birth_data.get('name')}
+**Date of Birth:** {birth_data.get('date_of_birth')}
+{age_context}
+**Planetary Positions:**
+{self.format_chart_data(chart_analysis)}
+**Authority Planet:** {chart_analysis.get('authority_planet')}
+
+### RAJANADI RULES:
+{matched_rules}
+
+### TASK:
+Write one section per life area below. Start every section with its header line exactly as shown (for example "### [{categories[0].upper()}]") and write nothing before the first header.
+
+{sections_str}
+
+In each section cover: current situation, planetary influences, timing (it's {datetime.now().strftime('%B %Y')}) and recommendations. Keep each section under 4 paragraphs. Ensure predictions are appropriate for the person's age and life stage."""
+
+        try:
+            response = self._generate(prompt, started, {
+                'temperature': 0.65,
+                'top_p': 0.9,
+                'max_tokens': 700 * len(categories)
+            })
+            
+            return self.split_sections(response['response'], categories)
+        
+        except Exception as e:
+            logger.error("LLM generation failed: %s", e)
+            error_msg = f"Error connecting to Ollama: {str(e)}\n\n"
+            error_msg += "Please ensure Ollama is running."
+            return {category: GenerationFailed(error_msg) for category in categories}
     
     def generate_prediction(self, birth_data: Dict, chart_analysis: Dict, 
                           transit_data: Dict, matched_rules: str,
@@ -209,30 +428,7 @@ Ensure your predictions are appropriate for the person's age and life stage. Kee
             AI-generated prediction
         """
         # Calculate person's age
-        age = None
-        date_of_birth_str = birth_data.get('date_of_birth')
-        
-        if date_of_birth_str:
-            try:
-                # Parse date of birth (could be string or date object)
-                if isinstance(date_of_birth_str, str):
-                    dob = datetime.strptime(date_of_birth_str, '%Y-%m-%d').date()
-                elif isinstance(date_of_birth_str, date):
-                    dob = date_of_birth_str
-                else:
-                    dob = None
-                
-                if dob:
-                    age = calculate_age(dob)
-                    print(f"\n=== AGE CALCULATION ===")
-                    print(f"Name: {birth_data.get('name')}")
-                    print(f"Date of Birth: {dob}")
-                    print(f"Current Age: {age} years")
-                    print(f"Category: {category}")
-                    print(f"======================\n")
-            except Exception as e:
-                print(f"Error calculating age: {e}")
-                age = None
+        age = self._get_age(birth_data, category)
         
         # Check if category is age-appropriate
         if age is not None and category != "general":
@@ -265,6 +461,7 @@ Ensure your predictions are appropriate for the person's age and life stage. Kee
                                           matched_rules: str,
                                           age: Optional[int] = None) -> str:
         """Generate comprehensive general prediction"""
+        started = time.perf_counter()
         
         # Get age-appropriate topics
         topics = None
@@ -304,20 +501,17 @@ Provide comprehensive predictions covering these topics (appropriate for the per
 Use Rajanadi rules. Be specific and actionable. Ensure all predictions are age-appropriate and relevant to their current life stage."""
 
         try:
-            response = ollama.generate(
-                model=self.model,
-                prompt=prompt,
-                options={
-                    'temperature': 0.7,
-                    'top_p': 0.9,
-                    'max_tokens': 2000
-                }
-            )
+            response = self._generate(prompt, started, {
+                'temperature': 0.7,
+                'top_p': 0.9,
+                'max_tokens': 2000
+            })
             
             return response['response']
         
         except Exception as e:
-            return f"Error: {str(e)}"
+            logger.error("LLM generation failed: %s", e)
+            return GenerationFailed(f"Error: {str(e)}")
 
 # Global instance
 ollama_service = OllamaService()
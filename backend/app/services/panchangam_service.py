@@ -0,0 +1,195 @@
+"""
+Panchangam (Hindu almanac) generator for date ranges using Skyfield
+Tithi, nakshatra, yoga and karana are taken at local sunrise
+"""
+from skyfield.api import Topos
+from skyfield import almanac
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Dict, List, Tuple
+import numpy as np
+import pytz
+
+from app.utils.nakshatra_utils import get_nakshatra_indices, NAKSHATRA_NAMES, STAR_LORDS
+from app.utils.ephemeris import get_ephemeris, get_timescale
+
+class PanchangamService:
+    """Generate daily panchangam for a location over any date range"""
+
+    # Lahiri Ayanamsa
+    LAHIRI_AYANAMSA_2000 = 23.85
+    AYANAMSA_RATE = 0.01397
+
+    TITHI_NAMES = [
+        'Pratipada', 'Dwitiya', 'Tritiya', 'Chaturthi', 'Panchami',
+        'Shashthi', 'Saptami', 'Ashtami', 'Navami', 'Dashami',
+        'Ekadashi', 'Dwadashi', 'Trayodashi', 'Chaturdashi'
+    ]
+
+    YOGA_NAMES = [
+        'Vishkambha', 'Priti', 'Ayushman', 'Saubhagya', 'Shobhana', 'Atiganda',
+        'Sukarma', 'Dhriti', 'Shoola', 'Ganda', 'Vriddhi', 'Dhruva',
+        'Vyaghata', 'Harshana', 'Vajra', 'Siddhi', 'Vyatipata', 'Variyana',
+        'Parigha', 'Shiva', 'Siddha', 'Sadhya', 'Shubha', 'Shukla',
+        'Brahma', 'Indra', 'Vaidhriti'
+    ]
+
+    # Seven movable karanas repeat through the month; four fixed ones sit at the ends
+    MOVABLE_KARANAS = ['Bava', 'Balava', 'Kaulava', 'Taitila', 'Gara', 'Vanija', 'Vishti']
+
+    VARA_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+    MAX_RANGE_DAYS = 366
+
+    def __init__(self):
+        self.ts = get_timescale()
+        self.eph = get_ephemeris()
+        self.earth = self.eph['earth']
+        self.sun = self.eph['sun']
+        self.moon = self.eph['moon']
+
+    def get_ayanamsa(self, tt) -> np.ndarray:
+        """Calculate Lahiri ayanamsa for (an array of) TT Julian dates"""
+        years_from_2000 = (np.asarray(tt) - 2451545.0) / 365.25
+        return self.LAHIRI_AYANAMSA_2000 + (years_from_2000 * self.AYANAMSA_RATE)
+
+    def get_karana_name(self, karana_idx: int) -> str:
+        """Karana name for half-tithi index 0-59"""
+        if karana_idx == 0:
+            return 'Kimstughna'
+        if karana_idx >= 57:
+            return ['Shakuni', 'Chatushpada', 'Naga'][karana_idx - 57]
+        return self.MOVABLE_KARANAS[(karana_idx - 1) % 7]
+
+    def get_tithi_name(self, tithi: int) -> Tuple[str, str]:
+        """(paksha, tithi name) for tithi number 1-30"""
+        if tithi <= 15:
+            return 'Shukla', 'Purnima' if tithi == 15 else self.TITHI_NAMES[tithi - 1]
+        return 'Krishna', 'Amavasya' if tithi == 30 else self.TITHI_NAMES[tithi - 16]
+
+    def _sidereal_longitudes(self, t) -> Tuple[np.ndarray, np.ndarray]:
+        """Sidereal Sun and Moon longitudes for an array-valued Time"""
+        earth_at = self.earth.at(t)
+        sun_lon = earth_at.observe(self.sun).apparent().ecliptic_latlon()[1].degrees
+        moon_lon = earth_at.observe(self.moon).apparent().ecliptic_latlon()[1].degrees
+        ayanamsa = self.get_ayanamsa(t.tt)
+        return (sun_lon - ayanamsa) % 360, (moon_lon - ayanamsa) % 360
+
+    def _local_days(self, start: date, end: date, tz) -> Tuple[List[date], object]:
+        """Local calendar days in [start, end] and a Time array of their local midnights"""
+        days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+        midnights = [tz.localize(datetime(d.year, d.month, d.day)) for d in days]
+        # One extra midnight so the last day's sunset is bracketed
+        last = end + timedelta(days=1)
+        midnights.append(tz.localize(datetime(last.year, last.month, last.day)))
+        return days, self.ts.from_datetimes(midnights)
+
+    def _events_by_day(self, times, flags, tz) -> Dict[date, datetime]:
+        """Bucket almanac event times onto local calendar days"""
+        events = {}
+        if len(times) == 0:
+            return events
+        for dt, real in zip(times.astimezone(tz), flags):
+            if real and dt.date() not in events:
+                events[dt.date()] = dt
+        return events
+
+    @lru_cache(maxsize=256)
+    def _get_year_days(self, year: int, latitude: float, longitude: float,
+                       timezone_name: str) -> Tuple[Dict, ...]:
+        """Compute (and cache) a full year of panchangam days for a rounded location"""
+        tz = pytz.timezone(timezone_name)
+        days, midnights = self._local_days(date(year, 1, 1), date(year, 12, 31), tz)
+
+        observer = self.earth + Topos(latitude_degrees=latitude, longitude_degrees=longitude)
+        t0, t1 = midnights[0], midnights[-1]
+
+        rise_times, rise_flags = almanac.find_risings(observer, self.sun, t0, t1)
+        set_times, set_flags = almanac.find_settings(observer, self.sun, t0, t1)
+        sunrises = self._events_by_day(rise_times, rise_flags, tz)
+        sunsets = self._events_by_day(set_times, set_flags, tz)
+
+        # Evaluate every day at once: at sunrise, or local noon when the Sun never rises
+        instants = [
+            sunrises.get(d) or tz.localize(datetime(d.year, d.month, d.day, 12))
+            for d in days
+        ]
+        t = self.ts.from_datetimes(instants)
+        sun_lon, moon_lon = self._sidereal_longitudes(t)
+
+        elongation = (moon_lon - sun_lon) % 360
+        tithis = (elongation // 12).astype(int) + 1
+        karanas = (elongation // 6).astype(int)
+        yogas = (((sun_lon + moon_lon) % 360) // (360.0 / 27)).astype(int)
+        nakshatra_idx, padas = get_nakshatra_indices(moon_lon)
+
+        result = []
+        for i, d in enumerate(days):
+            paksha, tithi_name = self.get_tithi_name(int(tithis[i]))
+            sunrise = sunrises.get(d)
+            sunset = sunsets.get(d)
+            nak = int(nakshatra_idx[i])
+
+            result.append({
+                'date': d.isoformat(),
+                'vara': self.VARA_NAMES[d.weekday()],
+                'sunrise': sunrise.strftime('%H:%M:%S') if sunrise else None,
+                'sunset': sunset.strftime('%H:%M:%S') if sunset else None,
+                'tithi': int(tithis[i]),
+                'tithi_name': tithi_name,
+                'paksha': paksha,
+                'nakshatra': NAKSHATRA_NAMES[nak],
+                'nakshatra_lord': STAR_LORDS[nak],
+                'pada': int(padas[i]),
+                'yoga': self.YOGA_NAMES[int(yogas[i])],
+                'karana': self.get_karana_name(int(karanas[i]))
+            })
+
+        return tuple(result)
+
+    def get_panchangam(self, start: date, end: date, latitude: float, longitude: float,
+                       timezone_name: str = 'Asia/Kolkata') -> List[Dict]:
+        """
+        Get daily panchangam for a location over a date range
+
+        Args:
+            start, end: First and last local dates (inclusive)
+            latitude, longitude: Location coordinates
+            timezone_name: IANA timezone of the location (e.g., 'Asia/Kolkata')
+
+        Returns:
+            List of daily panchangam dictionaries
+
+        Raises:
+            ValueError: For an invalid date range or an unknown timezone
+        """
+        if end < start:
+            raise ValueError("End date must not be before start date")
+        if (end - start).days + 1 > self.MAX_RANGE_DAYS:
+            raise ValueError(f"Date range is limited to {self.MAX_RANGE_DAYS} days")
+        try:
+            pytz.timezone(timezone_name)
+        except pytz.UnknownTimeZoneError:
+            raise ValueError(f"Unknown timezone '{timezone_name}'")
+
+        # Whole years are computed once per location and sliced for every request.
+        # Sunrise shifts by well under a minute across 0.01° (~1 km), so nearby
+        # locations share the same cached year.
+        latitude, longitude = round(latitude, 2), round(longitude, 2)
+        days = []
+        for year in range(start.year, end.year + 1):
+            year_days = self._get_year_days(year, latitude, longitude, timezone_name)
+            first = (start - date(year, 1, 1)).days if year == start.year else 0
+            last = (end - date(year, 1, 1)).days if year == end.year else len(year_days) - 1
+            days.extend(dict(day) for day in year_days[first:last + 1])
+
+        return days
+
+    def get_year(self, year: int, latitude: float, longitude: float,
+                 timezone_name: str = 'Asia/Kolkata') -> List[Dict]:
+        """Full-year panchangam for a location"""
+        return self.get_panchangam(date(year, 1, 1), date(year, 12, 31),
+                                   latitude, longitude, timezone_name)
+
+# Global instance
+panchangam_service = PanchangamService()
@@ -0,0 +1,77 @@
+"""
+Service registry: singletons constructed on first use
+
+Importing the API imports neither Skyfield, numpy nor the LLM client and
+constructs no service; a service's module is imported (creating its
+module-level instance, and loading the kernel if it needs one) the first
+time the service is asked for.
+"""
+from importlib import import_module
+from typing import Any, Dict, List
+import threading
+
+# Service name -> 'module:attribute' of its module-level instance
+SERVICES = {
+    'chart_calculator': 'app.services.chart_calculator:chart_calculator',
+    'rajanadi_engine': 'app.services.rajanadi_engine:rajanadi_engine',
+    'ephemeris_service': 'app.services.ephemeris_service:ephemeris_service',
+    'ollama_service': 'app.services.ollama_service:ollama_service',
+    'gemstone_service': 'app.services.gemstone_service:gemstone_service',
+    'monthly_transit_service': 'app.services.monthly_transit_service:monthly_transit_service',
+    'comprehensive_transit_service': 'app.services.comprehensive_transit_service:comprehensive_transit_service',
+    'rules_matcher': 'app.services.rules_matcher:rules_matcher',
+    'panchangam_service': 'app.services.panchangam_service:panchangam_service',
+    'transit_feed_service': 'app.services.transit_feed_service:transit_feed_service',
+    'geocoder_service': 'app.services.geocoder_service:geocoder_service',
+    'timezone_service': 'app.services.timezone_service:timezone_service',
+    'shared_sections': 'app.services.shared_sections:shared_sections'
+}
+
+class ServiceRegistry:
+    """Resolve service names to their singletons, importing modules on demand"""
+
+    def __init__(self, factories: Dict[str, str]):
+        """
+        Args:
+            factories: Service name -> 'module:attribute' of the instance
+        """
+        self._factories = dict(factories)
+        self._lock = threading.RLock()  # Re-entrant: a service module may look up another
+
+    def get(self, name: str) -> Any:
+        """
+        The named service, importing its module on first use
+
+        Raises:
+            KeyError: If no such service is registered
+        """
+        instance = self.__dict__.get(name)
+        if instance is not None:
+            return instance
+
+        with self._lock:
+            if name not in self.__dict__:
+                module_name, _, attribute = self._factories[name].partition(':')
+                # Kept as an instance attribute: later lookups skip __getattr__
+                self.__dict__[name] = getattr(import_module(module_name), attribute)
+            return self.__dict__[name]
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for services not resolved yet
+        if name.startswith('_') or name not in self._factories:
+            raise AttributeError(f"No service named '{name}'")
+        return self.get(name)
+
+    def override(self, name: str, instance: Any):
+        """Use instance for name (tests, alternative implementations)"""
+        with self._lock:
+            self._factories.setdefault(name, '')
+            self.__dict__[name] = instance
+
+    @property
+    def loaded(self) -> List[str]:
+        """Names of the services constructed so far"""
+        return [name for name in self._factories if name in self.__dict__]
+
+# Global instance
+services = ServiceRegistry(SERVICES)
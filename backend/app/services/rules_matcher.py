@@ -3,7 +3,7 @@ Pattern Matching for RajaNadiRules.txt
 Simple, fast in-memory keyword matching (NO vector embeddings needed!)
 """
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional
 import re
 
 class RulesMatcher:
@@ -24,7 +24,8 @@ class RulesMatcher:
         self.rules_text = rules_path.read_text(encoding='utf-8')
         self.lines = self.rules_text.split('\n')
     
-    def find_relevant_rules(self, keywords: List[str], max_sections: int = 15) -> str:
+    def find_relevant_rules(self, keywords: List[str], max_sections: int = 15,
+                            paired_keywords: Optional[Dict[str, List[str]]] = None) -> str:
         """
         Find rules using keyword matching
         
@@ -32,11 +33,15 @@ class RulesMatcher:
             keywords: List of keywords to search for
                      e.g., ['retrograde', 'saturn', 'authority', 'transit']
             max_sections: Maximum number of rule sections to return
+            paired_keywords: Keywords that only count on lines that also mention
+                     one of their partners, e.g. {'saram': ['venus', 'ketu']}
             
         Returns:
             Formatted text with matched rule sections
         """
         matched_sections = []
+        paired_keywords = {k.lower(): [p.lower() for p in partners]
+                           for k, partners in (paired_keywords or {}).items()}
         
         for i, line in enumerate(self.lines):
             score = 0
@@ -48,6 +53,10 @@ class RulesMatcher:
                 if keyword_lower in line_lower:
                     score += line_lower.count(keyword_lower) * 2  # Weight keyword matches
             
+            for keyword, partners in paired_keywords.items():
+                if keyword in line_lower and any(partner in line_lower for partner in partners):
+                    score += line_lower.count(keyword) * 2
+            
             if score > 0:
                 # Get context: 5 lines before and 5 lines after
                 start_idx = max(0, i - 5)
@@ -123,12 +132,19 @@ class RulesMatcher:
         
         # Add planet names and their Rasis (signs)
         planets = chart_analysis.get('planets', {})
+        star_lords = set()
         for planet_name, planet_data in planets.items():
             if planet_name in ['Ascendant']:
                 continue
             keywords.append(planet_name.lower())
             if 'rasi_name' in planet_data:
                 keywords.append(planet_data['rasi_name'].lower())
+            if 'nakshatra_lord' in planet_data:
+                star_lords.add(planet_data['nakshatra_lord'].lower())
+        keywords.extend(star_lords)
+        
+        # Saram (star lord) rules only count when they name one of this chart's star lords
+        paired_keywords = {'saram': sorted(star_lords)} if star_lords else None
         
         # Add Karaka-specific keywords
         karakas = chart_analysis.get('karakas', {})
@@ -143,7 +159,7 @@ class RulesMatcher:
         keywords = list(set(keywords))
         
         # Get relevant rules
-        relevant_rules = self.find_relevant_rules(keywords, max_sections=20)
+        relevant_rules = self.find_relevant_rules(keywords, max_sections=20, paired_keywords=paired_keywords)
         
         return relevant_rules
 
@@ -0,0 +1,59 @@
+"""
+Calendar data that is the same for every user
+Computed and serialized once per period, then served as-is by the calendar
+endpoints (with a strong ETag) or embedded as pre-encoded JSON
+"""
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, NamedTuple
+
+import orjson
+
+from app.services.monthly_transit_service import monthly_transit_service
+from app.services.comprehensive_transit_service import comprehensive_transit_service
+from app.utils.json_utils import dumps
+from app.utils.http_cache import strong_etag
+
+class EncodedSection(NamedTuple):
+    """JSON bytes of a shared section and their strong ETag"""
+    body: bytes
+    etag: str
+
+    def fragment(self) -> orjson.Fragment:
+        """Embed verbatim inside another orjson-encoded response"""
+        return orjson.Fragment(self.body)
+
+def _encode(value: Any) -> EncodedSection:
+    body = dumps(value)
+    return EncodedSection(body, strong_etag(body))
+
+class SharedSectionsService:
+    """Pre-encoded monthly transits, sign changes and retrograde periods"""
+
+    @lru_cache(maxsize=8)
+    def _monthly_transits(self, year: int, month: int, months_ahead: int) -> EncodedSection:
+        return _encode(monthly_transit_service.get_monthly_transits(months_ahead=months_ahead))
+
+    @lru_cache(maxsize=8)
+    def _sign_changes(self, year: int) -> EncodedSection:
+        return _encode(comprehensive_transit_service.get_sign_changes(year=year))
+
+    @lru_cache(maxsize=8)
+    def _retrograde_periods(self, year: int) -> EncodedSection:
+        return _encode(comprehensive_transit_service.get_retrograde_periods(year=year))
+
+    def monthly_transits(self, months_ahead: int = 6) -> EncodedSection:
+        """Monthly transits from the current month (re-encoded when the month changes)"""
+        today = datetime.utcnow()
+        return self._monthly_transits(today.year, today.month, months_ahead)
+
+    def sign_changes(self, year: int) -> EncodedSection:
+        """Sign changes of the slow planets during a year"""
+        return self._sign_changes(year)
+
+    def retrograde_periods(self, year: int) -> EncodedSection:
+        """Retrograde periods during a year"""
+        return self._retrograde_periods(year)
+
+# Global instance
+shared_sections = SharedSectionsService()
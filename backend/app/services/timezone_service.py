@@ -1,67 +1,205 @@
 """
 Timezone and geocoding service
 """
-from geopy.geocoders import Nominatim
-from datetime import datetime
+from datetime import datetime, date, time, timedelta
+from functools import lru_cache
+import logging
+import numpy as np
 import pytz
-from typing import Tuple, Optional
+from typing import Dict, Tuple, Optional
+
+from app.config import settings
+from app.services.errors import GeocodingUnavailableError
+from app.services.geocoder_service import geocoder_service, GeocoderService
+from app.utils.gazetteer_index import normalize
+
+logger = logging.getLogger(__name__)
+
+EPOCH = datetime(1970, 1, 1)
+
+@lru_cache(maxsize=None)
+def get_transition_table(timezone_name: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    UTC offset history of a zone, precomputed from the tz database
+
+    Returns:
+        (transition instants in UTC epoch seconds, offset in seconds from each instant on)
+
+    Raises:
+        pytz.UnknownTimeZoneError: If the zone does not exist
+    """
+    tz = pytz.timezone(timezone_name)
+    transitions = getattr(tz, '_utc_transition_times', None)
+    if not transitions:
+        offset = tz.utcoffset(datetime(2000, 1, 1)).total_seconds()
+        return np.array([np.iinfo(np.int64).min], dtype=np.int64), np.array([offset], dtype=np.int64)
+
+    instants = [np.iinfo(np.int64).min] + [int((t - EPOCH).total_seconds()) for t in transitions[1:]]
+    offsets = [int(info[0].total_seconds()) for info in tz._transition_info]
+    return np.array(instants, dtype=np.int64), np.array(offsets, dtype=np.int64)
 
 class TimezoneService:
     """Handle timezone conversions and geocoding"""
-    
-    def __init__(self):
-        self.geolocator = Nominatim(user_agent="rajanadi_astro")
-    
-    def geocode_location(self, place_name: str) -> Tuple[float, float, str]:
+
+    PLACE_CACHE_SIZE = 4096
+
+    def __init__(self, geocoder: GeocoderService = geocoder_service):
+        self.geocoder = geocoder
+
+        # Birth places repeat a lot (same cities, re-submitted forms)
+        self._geocode_normalized = lru_cache(maxsize=self.PLACE_CACHE_SIZE)(self._geocode_uncached)
+        self._timezone_at_rounded = lru_cache(maxsize=self.PLACE_CACHE_SIZE)(self.geocoder.timezone_at)
+        self._nominatim = None
+
+    def _geocode_online(self, normalized_place: str) -> Optional[Dict]:
         """
-        Convert place name to coordinates and timezone
-        
+        Nominatim lookup for places missing from the gazetteer (needs geopy)
+
+        Raises:
+            GeocodingUnavailableError: If Nominatim fails or times out (not cached,
+                so the place is looked up again next time)
+        """
+        if self._nominatim is None:
+            try:
+                from geopy.geocoders import Nominatim
+            except ImportError:
+                logger.debug("geopy not installed; no online geocoding fallback")
+                return None
+            self._nominatim = Nominatim(user_agent="rajanadi_astro", timeout=settings.GEOCODER_ONLINE_TIMEOUT)
+
+        try:
+            location = self._nominatim.geocode(normalized_place)
+        except Exception as e:
+            logger.warning("Online geocoding error for %r: %s", normalized_place, e)
+            raise GeocodingUnavailableError(f"Place lookup for '{normalized_place}' failed; please try again") from e
+        if location is None:
+            return None
+        return {'latitude': location.latitude, 'longitude': location.longitude, 'timezone': None}
+
+    def _geocode_uncached(self, normalized_place: str) -> Optional[Tuple[float, float, str]]:
+        place = self.geocoder.geocode(normalized_place)
+        if place is None and settings.GEOCODER_ONLINE_FALLBACK:
+            place = self._geocode_online(normalized_place)
+        if place is None:
+            return None
+
+        timezone_name = place['timezone'] or self.geocoder.timezone_at(place['latitude'], place['longitude'])
+        return place['latitude'], place['longitude'], timezone_name or 'UTC'
+
+    def geocode_location(self, place_name: str) -> Optional[Tuple[float, float, str]]:
+        """
+        Convert place name to coordinates and timezone (cached)
+
+        Uses the offline gazetteer, then Nominatim when GEOCODER_ONLINE_FALLBACK
+        is set and geopy is installed. The online lookup blocks for up to
+        GEOCODER_ONLINE_TIMEOUT: call this off the event loop.
+
         Args:
             place_name: City, Country (e.g., "Chennai, India")
-            
+
         Returns:
-            (latitude, longitude, timezone_name)
+            (latitude, longitude, timezone_name), or None if the place is unknown
+
+        Raises:
+            GeocodingUnavailableError: If the online lookup failed
         """
-        try:
-            location = self.geolocator.geocode(place_name)
-            if location:
-                latitude = location.latitude
-                longitude = location.longitude
-                
-                # Estimate timezone (simple mapping for Indian locations)
-                # For production, use timezonefinder library
-                if 'India' in place_name or 'Chennai' in place_name:
-                    timezone_name = 'Asia/Kolkata'
-                else:
-                    timezone_name = 'UTC'  # Default
-                
-                return latitude, longitude, timezone_name
-            else:
-                # Default to Chennai if geocoding fails
-                return 13.0827, 80.2707, 'Asia/Kolkata'
-        
-        except Exception as e:
-            print(f"Geocoding error: {e}")
-            # Default to Chennai
-            return 13.0827, 80.2707, 'Asia/Kolkata'
-    
+        # Normalize each comma-separated part so 'Chennai, India' and 'chennai,india' share an entry
+        key = ', '.join(part for part in (normalize(p) for p in place_name.split(',')) if part)
+        if not key:
+            return None
+        return self._geocode_normalized(key)
+
+    def get_timezone(self, latitude: float, longitude: float) -> Optional[str]:
+        """Timezone name at a point (e.g., 'Asia/Kolkata')"""
+        return self._timezone_at_rounded(round(latitude, 3), round(longitude, 3))
+
+    def _offset_at(self, timezone_name: str, utc_seconds: int) -> int:
+        instants, offsets = get_transition_table(timezone_name)
+        return int(offsets[np.searchsorted(instants, utc_seconds, side='right') - 1])
+
+    def local_to_utc(self, timezone_name: str, local: datetime) -> Tuple[datetime, float]:
+        """
+        Convert a historical local wall-clock time to UTC
+
+        Ambiguous times (clocks set back) resolve to the earlier instant;
+        non-existent times (clocks set forward) use the offset before the change.
+
+        Args:
+            timezone_name: Timezone name (e.g., 'Asia/Kolkata')
+            local: Naive local datetime
+
+        Returns:
+            (naive UTC datetime, UTC offset in hours)
+        """
+        local_seconds = int((local - EPOCH).total_seconds())
+
+        # Offsets in effect just before and after the local reading; keep the first consistent one
+        candidates = [self._offset_at(timezone_name, local_seconds - 86400),
+                      self._offset_at(timezone_name, local_seconds + 86400)]
+        offset = candidates[0]
+        for candidate in sorted(set(candidates), key=candidates.index):
+            if self._offset_at(timezone_name, local_seconds - candidate) == candidate:
+                offset = candidate
+                break
+
+        return local - timedelta(seconds=offset), offset / 3600
+
     def get_utc_offset(self, timezone_name: str, date_time: datetime) -> float:
         """
         Get UTC offset for a timezone at a specific datetime
-        
+
         Args:
             timezone_name: Timezone name (e.g., 'Asia/Kolkata')
-            date_time: Datetime to check
-            
+            date_time: Local datetime to check
+
         Returns:
             UTC offset in hours
         """
         try:
-            tz = pytz.timezone(timezone_name)
-            offset = tz.utcoffset(date_time)
-            return offset.total_seconds() / 3600
-        except:
+            return self.local_to_utc(timezone_name, date_time.replace(tzinfo=None))[1]
+        except pytz.UnknownTimeZoneError:
             return 5.5  # Default to IST
 
+    def resolve_birth_moment(self, place_of_birth: str, date_of_birth: date, time_of_birth: time,
+                             latitude: Optional[float] = None, longitude: Optional[float] = None,
+                             timezone_name: Optional[str] = None) -> Dict:
+        """
+        Fill in missing coordinates and timezone and convert the birth time to UTC
+
+        Args:
+            place_of_birth: Place name, geocoded when coordinates are missing
+            date_of_birth, time_of_birth: Local (wall-clock) birth date and time
+            latitude, longitude, timezone_name: Known values, if any
+
+        Returns:
+            Dictionary with latitude, longitude, timezone, utc_offset (hours) and birth_time_utc
+
+        Raises:
+            ValueError: If the place cannot be found or the timezone is unknown
+            GeocodingUnavailableError: If the online geocoder failed
+        """
+        if latitude is None or longitude is None:
+            found = self.geocode_location(place_of_birth)
+            if found is None:
+                raise ValueError(f"Could not find place of birth '{place_of_birth}'; "
+                                 "please enter a nearby city or provide latitude and longitude")
+            latitude, longitude, found_timezone = found
+            timezone_name = timezone_name or found_timezone
+
+        timezone_name = timezone_name or self.get_timezone(latitude, longitude) or 'UTC'
+
+        try:
+            utc, offset = self.local_to_utc(timezone_name, datetime.combine(date_of_birth, time_of_birth))
+        except pytz.UnknownTimeZoneError:
+            raise ValueError(f"Unknown timezone '{timezone_name}'")
+
+        return {
+            'latitude': latitude,
+            'longitude': longitude,
+            'timezone': timezone_name,
+            'utc_offset': offset,
+            'birth_time_utc': utc
+        }
+
 # Global instance
 timezone_service = TimezoneService()
@@ -0,0 +1,179 @@
+"""
+Personalized transit-to-natal feed using precomputed transit tables
+Applies the Rajanadi sign relationships and the 15-degree orb rule
+to every transiting graha against every natal graha
+"""
+from datetime import datetime, date
+from typing import Dict, List, Optional
+import numpy as np
+
+from app.services.ephemeris_service import ephemeris_service, EphemerisService
+
+class TransitFeedService:
+    """Generate transit hits on natal charts, one chart or many at a time"""
+
+    GRAHAS = EphemerisService.GRAHAS
+
+    # Rasi distance (0-11) -> strength, as in RajanadiEngine.find_conjunctions
+    # 100%: 1st, 5th, 7th, 9th  |  50%: 3rd, 11th
+    RELATION_STRENGTH = {0: 100, 4: 100, 6: 100, 8: 100, 2: 50, 10: 50}
+
+    ORB_DEGREES = 15.0  # RajanadiEngine.apply_orb_rule
+
+    # Subscribers evaluated per vectorized block, at most; fewer for long ranges
+    BATCH_SIZE = 2048
+    # Elements (subscribers x 9 x 9 x days) per block: each temporary stays near 32 MB
+    MAX_BLOCK_ELEMENTS = 4_000_000
+
+    def __init__(self, ephemeris: EphemerisService = ephemeris_service):
+        self.ephemeris = ephemeris
+
+        relation = np.zeros(12, dtype=np.int16)
+        for distance, strength in self.RELATION_STRENGTH.items():
+            relation[distance] = strength
+        self.relation_strength = relation
+
+    def natal_vector(self, natal_planets: Dict) -> np.ndarray:
+        """Natal longitudes of the nine grahas in GRAHAS order"""
+        return np.array([natal_planets[name]['longitude'] for name in self.GRAHAS], dtype=float)
+
+    def batch_size(self, days: int) -> int:
+        """Subscribers per block for a range of days (bounded by MAX_BLOCK_ELEMENTS)"""
+        n = len(self.GRAHAS)
+        return max(1, min(self.BATCH_SIZE, self.MAX_BLOCK_ELEMENTS // (n * n * max(days, 1))))
+
+    def _relation_type(self, distance: int) -> str:
+        """Same naming as RajanadiEngine.find_conjunctions"""
+        return f"{distance+1}th house" if distance > 0 else "same sign"
+
+    def _runs(self, codes: np.ndarray):
+        """
+        Find runs of constant value along the last axis
+
+        Returns:
+            (flat_keys, run_start, run_end) for every run, in C order
+        """
+        days = codes.shape[-1]
+        flat = codes.reshape(-1, days)
+
+        change = np.empty(flat.shape, dtype=bool)
+        change[:, 0] = True
+        change[:, 1:] = flat[:, 1:] != flat[:, :-1]
+
+        keys, starts = np.nonzero(change)
+        next_keys = np.append(keys[1:], -1)
+        next_starts = np.append(starts[1:], days)
+        ends = np.where(next_keys == keys, next_starts - 1, days - 1)
+
+        return keys, starts, ends
+
+    def _feeds_for_block(self, natal: np.ndarray, dates, table: np.ndarray) -> List[List[Dict]]:
+        """Vectorized hits for a block of natal vectors, shape (S, 9)"""
+        subscribers = natal.shape[0]
+        n = len(self.GRAHAS)
+        feeds = [[] for _ in range(subscribers)]
+
+        # Sign relationships: houses counted from each natal rasi to each transit rasi
+        transit_rasi = (table // 30).astype(np.int8)  # (9 transit, D)
+        natal_rasi = (natal // 30).astype(np.int8)  # (S, 9 natal)
+        distance = (transit_rasi[None, :, None, :] - natal_rasi[:, None, :, None]) % 12  # (S, T, N, D)
+
+        keys, starts, ends = self._runs(distance)
+        run_distance = distance.reshape(-1, distance.shape[-1])[keys, starts]
+        strength = self.relation_strength[run_distance]
+        keep = strength > 0
+
+        for key, start, end, dist, strong in zip(keys[keep].tolist(), starts[keep].tolist(),
+                                                 ends[keep].tolist(), run_distance[keep].tolist(),
+                                                 strength[keep].tolist()):
+            s, rest = divmod(key, n * n)
+            transit_planet = self.GRAHAS[rest // n]
+            natal_planet = self.GRAHAS[rest % n]
+            type_name = self._relation_type(dist)
+            feeds[s].append({
+                'transit_planet': transit_planet,
+                'natal_planet': natal_planet,
+                'kind': 'rasi',
+                'type': type_name,
+                'strength': strong,
+                'start': dates[start],
+                'end': dates[end],
+                'impact': f"Transit {transit_planet} in {type_name} from natal {natal_planet} ({strong}%)"
+            })
+
+        # Orb rule: shortest angular distance within 15°
+        diff = np.abs((table[None, :, None, :] - natal[:, None, :, None] + 180) % 360 - 180)
+        within = diff <= self.ORB_DEGREES
+
+        keys, starts, ends = self._runs(within)
+        keep = within.reshape(-1, within.shape[-1])[keys, starts]
+        flat_diff = diff.reshape(-1, diff.shape[-1])
+
+        for key, start, end in zip(keys[keep].tolist(), starts[keep].tolist(), ends[keep].tolist()):
+            s, rest = divmod(key, n * n)
+            transit_planet = self.GRAHAS[rest // n]
+            natal_planet = self.GRAHAS[rest % n]
+            window = flat_diff[key, start:end + 1]
+            peak = int(window.argmin())
+            orb = float(window[peak])
+            feeds[s].append({
+                'transit_planet': transit_planet,
+                'natal_planet': natal_planet,
+                'kind': 'orb',
+                'type': 'orb',
+                'strength': round(1.0 - (orb / self.ORB_DEGREES), 2),
+                'start': dates[start],
+                'end': dates[end],
+                'peak': dates[start + peak],
+                'impact': f"Transit {transit_planet} within {orb:.1f}° of natal {natal_planet}"
+            })
+
+        for feed in feeds:
+            feed.sort(key=lambda x: (x['start'], x['kind'], -x['strength']))
+
+        return feeds
+
+    def get_feeds(self, natal_charts: List[Dict], start: Optional[date] = None,
+                  days: int = 30) -> List[List[Dict]]:
+        """
+        Transit hits for many natal charts over a date range
+
+        Args:
+            natal_charts: Natal planet dictionaries (calculate_natal_chart output)
+            start: First day of the range (default: today, UTC)
+            days: Number of days
+
+        Returns:
+            One list of hit periods per chart, in input order
+        """
+        if start is None:
+            start = datetime.utcnow().date()
+
+        dates, table = self.ephemeris.get_transit_table(start, days)
+
+        feeds = []
+        batch_size = self.batch_size(days)
+        for offset in range(0, len(natal_charts), batch_size):
+            block = natal_charts[offset:offset + batch_size]
+            natal = np.stack([self.natal_vector(chart) for chart in block])
+            feeds.extend(self._feeds_for_block(natal, dates, table))
+
+        return feeds
+
+    def get_feed(self, natal_planets: Dict, start: Optional[date] = None,
+                 days: int = 30) -> List[Dict]:
+        """
+        Transit hits for one natal chart over a date range
+
+        Args:
+            natal_planets: Natal planet positions
+            start: First day of the range (default: today, UTC)
+            days: Number of days
+
+        Returns:
+            List of hit periods sorted by start date
+        """
+        return self.get_feeds([natal_planets], start, days)[0]
+
+# Global instance
+transit_feed_service = TransitFeedService()
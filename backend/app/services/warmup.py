@@ -0,0 +1,101 @@
+"""
+Start-up warm-up and readiness state
+Loads kernels and indexes and precomputes the hot caches before traffic
+arrives; /api/ready reports completion
+"""
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
+import threading
+import time
+
+from app.services.registry import services
+
+logger = logging.getLogger(__name__)
+
+# Transit-feed window most requests ask for (TransitFeedRequest default)
+TRANSIT_SNAPSHOT_DAYS = 30
+
+def _warm_ephemeris():
+    from app.utils.ephemeris import get_ephemeris, get_timescale
+    get_timescale()
+    get_ephemeris()
+    # First evaluation reads the kernel segments
+    services.chart_calculator.calculate_natal_chart(2000, 1, 1, 12, 0, 0, 13.08, 80.27)
+
+def _warm_transit_snapshot():
+    # Daily positions of all grahas from today, shared by every transit feed
+    services.ephemeris_service.get_transit_table(datetime.utcnow().date(), TRANSIT_SNAPSHOT_DAYS)
+
+def _warm_ingress_tables():
+    # The calendar endpoints' data: monthly ingresses, sign changes, retrograde stations
+    year = datetime.utcnow().year
+    services.shared_sections.monthly_transits(months_ahead=6)
+    services.shared_sections.sign_changes(year)
+    services.shared_sections.retrograde_periods(year)
+
+def _warm_rules_index():
+    services.rules_matcher.find_relevant_rules(['saturn', 'authority'])
+
+def _warm_gazetteer():
+    # Builds the memory-mapped index if the source changed, then maps it
+    services.geocoder_service.search('chennai', 1)
+
+def _warm_timezones():
+    from app.services.timezone_service import get_transition_table
+    get_transition_table('Asia/Kolkata')
+
+class WarmupService:
+    """Run the warm-up steps once and track whether the process is ready"""
+
+    def __init__(self, steps: Optional[List[Tuple[str, Callable[[], None]]]] = None):
+        self.steps = steps if steps is not None else [
+            ('ephemeris', _warm_ephemeris),
+            ('transit_snapshot', _warm_transit_snapshot),
+            ('ingress_tables', _warm_ingress_tables),
+            ('rules_index', _warm_rules_index),
+            ('gazetteer', _warm_gazetteer),
+            ('timezones', _warm_timezones)
+        ]
+        self.started = False
+        self.ready = False
+        self.results: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def run(self) -> bool:
+        """
+        Run every step (once per process tree; forked workers inherit the result)
+
+        Returns:
+            True when all steps succeeded
+        """
+        with self._lock:
+            if self.started:
+                return self.ready
+            self.started = True
+
+            for name, step in self.steps:
+                started = time.perf_counter()
+                try:
+                    step()
+                    self.results[name] = {'ok': True}
+                except Exception as e:
+                    logger.error("Warm-up step %s failed: %s", name, e)
+                    self.results[name] = {'ok': False, 'error': str(e)}
+                self.results[name]['seconds'] = round(time.perf_counter() - started, 3)
+
+            self.ready = all(result['ok'] for result in self.results.values())
+            logger.info("Warm-up finished", extra={'ready': self.ready, 'steps': self.results})
+            return self.ready
+
+    def start_background(self):
+        """Run the warm-up on a thread so the server can answer /health meanwhile"""
+        if not self.started:
+            threading.Thread(target=self.run, name='warmup', daemon=True).start()
+
+    def status(self) -> Dict:
+        """Readiness, whether the warm-up has begun, and per-step outcome and duration"""
+        return {'ready': self.ready, 'started': self.started, 'steps': dict(self.results)}
+
+# Global instance
+warmup_service = WarmupService()
@@ -0,0 +1,252 @@
+"""
+Compact binary encoding for cached chart, transit and prediction payloads
+
+A tagged format in the spirit of MessagePack, tuned for chart dictionaries:
+short strings (keys such as "longitude", values such as "Taurus") are
+written once per payload and referenced by index afterwards, floats take
+9 bytes, dates 5, and numpy arrays are stored as raw little-endian buffers.
+Payloads over COMPRESS_THRESHOLD bytes are zlib-compressed when that helps.
+
+A natal chart packs to about a third of its JSON size.
+"""
+from datetime import date, datetime
+from typing import Any, Dict, List
+import struct
+import zlib
+
+MAGIC = b'RN'
+VERSION = 1
+
+FLAG_COMPRESSED = 0x01
+COMPRESS_THRESHOLD = 512
+
+# Strings up to this length are remembered and back-referenced
+INTERN_MAX_LENGTH = 32
+
+_NONE, _TRUE, _FALSE = b'N', b'T', b'F'
+_INT8, _INT64, _BIGINT = b'b', b'q', b'I'
+_FLOAT = b'd'
+_STR, _STR_REF, _BYTES = b's', b'r', b'y'
+_LIST, _TUPLE, _DICT = b'l', b't', b'm'
+_DATE, _DATETIME = b'D', b'W'
+_ARRAY = b'a'
+
+_pack_int8 = struct.Struct('<b').pack
+_pack_int64 = struct.Struct('<q').pack
+_pack_float = struct.Struct('<d').pack
+_pack_ordinal = struct.Struct('<I').pack
+_unpack_int8 = struct.Struct('<b').unpack_from
+_unpack_int64 = struct.Struct('<q').unpack_from
+_unpack_float = struct.Struct('<d').unpack_from
+_unpack_ordinal = struct.Struct('<I').unpack_from
+
+class CodecError(ValueError):
+    """Raised for values that cannot be encoded and for corrupt payloads"""
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+class _Encoder:
+    def __init__(self):
+        self.out: List[bytes] = []
+        self.strings: Dict[str, int] = {}
+
+    def write(self, value: Any):
+        out = self.out
+        # bool before int (bool is an int subclass)
+        if value is None:
+            out.append(_NONE)
+        elif value is True:
+            out.append(_TRUE)
+        elif value is False:
+            out.append(_FALSE)
+        elif isinstance(value, str):
+            self.write_str(value)
+        elif isinstance(value, float):  # Includes numpy.float64
+            out.append(_FLOAT + _pack_float(value))
+        elif isinstance(value, int):
+            if -128 <= value <= 127:
+                out.append(_INT8 + _pack_int8(value))
+            elif -2**63 <= value < 2**63:
+                out.append(_INT64 + _pack_int64(value))
+            else:
+                encoded = str(value).encode('ascii')
+                out.append(_BIGINT + _varint(len(encoded)) + encoded)
+        elif isinstance(value, dict):
+            out.append(_DICT + _varint(len(value)))
+            for key, item in value.items():
+                self.write(key)
+                self.write(item)
+        elif isinstance(value, (list, tuple)):
+            out.append((_TUPLE if isinstance(value, tuple) else _LIST) + _varint(len(value)))
+            for item in value:
+                self.write(item)
+        elif isinstance(value, datetime):  # Before date (datetime is a date subclass)
+            encoded = value.isoformat().encode('ascii')
+            out.append(_DATETIME + _varint(len(encoded)) + encoded)
+        elif isinstance(value, date):
+            out.append(_DATE + _pack_ordinal(value.toordinal()))
+        elif isinstance(value, (bytes, bytearray)):
+            out.append(_BYTES + _varint(len(value)) + bytes(value))
+        elif type(value).__module__ == 'numpy':
+            self.write_numpy(value)
+        else:
+            raise CodecError(f"Cannot encode {type(value).__name__}")
+
+    def write_str(self, value: str):
+        index = self.strings.get(value)
+        if index is not None:
+            self.out.append(_STR_REF + _varint(index))
+            return
+        if len(value) <= INTERN_MAX_LENGTH:
+            self.strings[value] = len(self.strings)
+        encoded = value.encode('utf-8')
+        self.out.append(_STR + _varint(len(encoded)) + encoded)
+
+    def write_numpy(self, value: Any):
+        import numpy as np
+
+        if isinstance(value, np.ndarray):
+            array = np.ascontiguousarray(value)
+            if array.dtype.hasobject:
+                raise CodecError("Cannot encode object arrays")
+            dtype = array.dtype.newbyteorder('<').str.encode('ascii')
+            data = array.astype(array.dtype.newbyteorder('<'), copy=False).tobytes()
+            self.out.append(_ARRAY + _varint(len(dtype)) + dtype + _varint(array.ndim))
+            self.out.extend(_varint(size) for size in array.shape)
+            self.out.append(_varint(len(data)) + data)
+        elif isinstance(value, np.generic):
+            self.write(value.item())
+        else:
+            raise CodecError(f"Cannot encode {type(value).__name__}")
+
+class _Decoder:
+    def __init__(self, data: bytes):
+        self.data = data
+        self.pos = 0
+        self.strings: List[str] = []
+
+    def varint(self) -> int:
+        data = self.data
+        result = shift = 0
+        while True:
+            byte = data[self.pos]
+            self.pos += 1
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return result
+            shift += 7
+
+    def take(self, size: int) -> bytes:
+        chunk = self.data[self.pos:self.pos + size]
+        if len(chunk) != size:
+            raise CodecError("Truncated payload")
+        self.pos += size
+        return chunk
+
+    def read(self) -> Any:
+        tag = self.data[self.pos:self.pos + 1]
+        self.pos += 1
+
+        if tag == _STR_REF:
+            return self.strings[self.varint()]
+        if tag == _STR:
+            value = self.take(self.varint()).decode('utf-8')
+            if len(value) <= INTERN_MAX_LENGTH:
+                self.strings.append(value)
+            return value
+        if tag == _FLOAT:
+            self.pos += 8
+            return _unpack_float(self.data, self.pos - 8)[0]
+        if tag == _INT8:
+            self.pos += 1
+            return _unpack_int8(self.data, self.pos - 1)[0]
+        if tag == _DICT:
+            count = self.varint()
+            result = {}
+            for _ in range(count):
+                key = self.read()
+                result[key] = self.read()
+            return result
+        if tag == _LIST:
+            return [self.read() for _ in range(self.varint())]
+        if tag == _TUPLE:
+            return tuple(self.read() for _ in range(self.varint()))
+        if tag == _NONE:
+            return None
+        if tag == _TRUE:
+            return True
+        if tag == _FALSE:
+            return False
+        if tag == _INT64:
+            self.pos += 8
+            return _unpack_int64(self.data, self.pos - 8)[0]
+        if tag == _BIGINT:
+            return int(self.take(self.varint()))
+        if tag == _DATE:
+            self.pos += 4
+            return date.fromordinal(_unpack_ordinal(self.data, self.pos - 4)[0])
+        if tag == _DATETIME:
+            return datetime.fromisoformat(self.take(self.varint()).decode('ascii'))
+        if tag == _BYTES:
+            return self.take(self.varint())
+        if tag == _ARRAY:
+            import numpy as np
+
+            dtype = np.dtype(self.take(self.varint()).decode('ascii'))
+            shape = tuple(self.varint() for _ in range(self.varint()))
+            # A read-only view of the payload, like the cached arrays it replaces
+            return np.frombuffer(self.take(self.varint()), dtype=dtype).reshape(shape)
+        raise CodecError(f"Unknown tag {tag!r} at offset {self.pos - 1}")
+
+def pack(value: Any) -> bytes:
+    """
+    Encode a payload (dicts, lists, tuples, str, int, float, bool, None,
+    date, datetime, bytes, numpy arrays and scalars)
+
+    Raises:
+        CodecError: For any other type
+    """
+    encoder = _Encoder()
+    encoder.write(value)
+    body = b''.join(encoder.out)
+
+    flags = 0
+    if len(body) > COMPRESS_THRESHOLD:
+        compressed = zlib.compress(body, 1)
+        if len(compressed) < len(body):
+            body, flags = compressed, FLAG_COMPRESSED
+    return MAGIC + bytes((VERSION, flags)) + body
+
+def unpack(data: bytes) -> Any:
+    """
+    Decode a payload produced by pack()
+
+    Raises:
+        CodecError: If the data is not a payload of this version or is corrupt
+    """
+    if data[:2] != MAGIC or len(data) < 4 or data[2] != VERSION:
+        raise CodecError("Not a binary payload of this version")
+
+    body = data[4:]
+    if data[3] & FLAG_COMPRESSED:
+        try:
+            body = zlib.decompress(body)
+        except zlib.error as e:
+            raise CodecError(f"Corrupt payload: {e}") from e
+
+    decoder = _Decoder(body)
+    try:
+        value = decoder.read()
+    except CodecError:
+        raise
+    except (IndexError, ValueError, TypeError, struct.error) as e:  # ValueError covers bad UTF-8, dates, dtypes
+        raise CodecError(f"Corrupt payload: {e}") from e
+    if decoder.pos != len(body):
+        raise CodecError("Trailing bytes after payload")
+    return value
@@ -0,0 +1,199 @@
+"""
+Response compression (brotli or gzip) negotiated from Accept-Encoding
+"""
+import zlib
+from typing import Optional
+
+from app.config import settings
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip only without it
+    brotli = None
+
+COMPRESSIBLE_TYPES = (b'application/json', b'text/', b'application/javascript', b'image/svg+xml')
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Preferred content coding the client accepts
+
+    Brotli wins over gzip when both are acceptable (about 15% smaller on
+    chart JSON at a similar CPU cost); q=0 excludes a coding.
+
+    Args:
+        accept_encoding: Raw Accept-Encoding header
+
+    Returns:
+        'br', 'gzip' or None for identity
+    """
+    accepted = {}
+    for item in accept_encoding.split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+
+    wildcard = accepted.get('*', 0.0)
+    if brotli is not None and accepted.get('br', wildcard) > 0:
+        return 'br'
+    if accepted.get('gzip', wildcard) > 0:
+        return 'gzip'
+    return None
+
+def tag_etag(etag: bytes, encoding: str) -> bytes:
+    """Distinct ETag for the encoded representation ("abc" -> "abc-br")"""
+    if etag.endswith(b'"'):
+        return etag[:-1] + b'-' + encoding.encode('latin-1') + b'"'
+    return etag
+
+def _held_etag(etag: bytes, encoding: str, if_none_match: bytes) -> bytes:
+    """
+    ETag for a 304: the encoded tag only if that is the copy the client holds
+
+    Small and non-compressible bodies are sent unencoded under the plain tag,
+    so the suffix cannot be assumed from Accept-Encoding alone.
+    """
+    encoded = tag_etag(etag, encoding)
+    held = [tag.strip().removeprefix(b'W/') for tag in if_none_match.split(b',')]
+    return encoded if encoded in held else etag
+
+class _Compressor:
+    """Incremental compressor with the same interface for both codings"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        if encoding == 'br':
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+            self._zlib = None
+        else:
+            self._brotli = None
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)  # 31: gzip container
+
+    def chunk(self, data: bytes) -> bytes:
+        """Compress and flush so streamed chunks reach the client promptly"""
+        if self._brotli is not None:
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b'') -> bytes:
+        if self._brotli is not None:
+            return self._brotli.process(data) + self._brotli.finish()
+        return self._zlib.compress(data) + self._zlib.flush()
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing JSON and text responses
+
+    Bodies under COMPRESSION_MIN_SIZE are sent as-is (the framing overhead
+    outweighs the saving); every compressible response still carries
+    Vary: Accept-Encoding. Defaults favour speed over ratio, as every
+    response is compressed on the fly: gzip level 6, brotli quality 5.
+    Streamed responses are compressed chunk by chunk.
+    """
+
+    def __init__(self, app, minimum_size: Optional[int] = None,
+                 gzip_level: Optional[int] = None, brotli_quality: Optional[int] = None):
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MIN_SIZE if minimum_size is None else minimum_size
+        self.gzip_level = settings.GZIP_LEVEL if gzip_level is None else gzip_level
+        self.brotli_quality = settings.BROTLI_QUALITY if brotli_quality is None else brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['method'] == 'HEAD' or self.minimum_size < 0:
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = ''
+        if_none_match = b''
+        for name, value in scope['headers']:
+            if name == b'accept-encoding':
+                accept_encoding = value.decode('latin-1')
+            elif name == b'if-none-match':
+                if_none_match = value
+        encoding = choose_encoding(accept_encoding)
+
+        state = {'start': None, 'compressor': None, 'passthrough': False}
+
+        async def send_compressed(message):
+            if state['passthrough']:
+                await send(message)
+                return
+
+            if message['type'] == 'http.response.start':
+                if message['status'] < 200:
+                    state['passthrough'] = True
+                    await send(message)
+                    return
+                if message['status'] in (204, 304):
+                    # Same validator as the 200 the client holds, encoded or not
+                    state['passthrough'] = True
+                    headers = [(name.lower(), value) for name, value in message.get('headers', [])]
+                    if encoding is not None:
+                        headers = [(n, _held_etag(v, encoding, if_none_match) if n == b'etag' else v)
+                                   for n, v in headers]
+                    headers = [(n, v) for n, v in headers if n != b'vary'] + [(b'vary', _merge_vary(headers))]
+                    await send({**message, 'headers': headers})
+                    return
+                state['start'] = message
+                return
+
+            if message['type'] != 'http.response.body':
+                await send(message)
+                return
+
+            body = message.get('body', b'')
+            more_body = message.get('more_body', False)
+
+            if state['compressor'] is None:
+                start = state['start']
+                headers = [(name.lower(), value) for name, value in start.get('headers', [])]
+                content_type = next((v for n, v in headers if n == b'content-type'), b'')
+                already_encoded = any(n == b'content-encoding' for n, _ in headers)
+                compressible = content_type.startswith(COMPRESSIBLE_TYPES)
+
+                if compressible and not already_encoded:
+                    headers = [(n, v) for n, v in headers if n != b'vary'] + [
+                        (b'vary', _merge_vary(headers))
+                    ]
+
+                if (encoding is None or already_encoded or not compressible
+                        or (not more_body and len(body) < self.minimum_size)):
+                    state['passthrough'] = True
+                    await send({**start, 'headers': headers})
+                    await send(message)
+                    return
+
+                headers = [
+                    (n, tag_etag(v, encoding) if n == b'etag' else v)
+                    for n, v in headers if n != b'content-length'
+                ]
+                headers.append((b'content-encoding', encoding.encode('latin-1')))
+                compressor = _Compressor(encoding, self.gzip_level, self.brotli_quality)
+                state['compressor'] = compressor
+
+                if not more_body:
+                    compressed = compressor.finish(body)
+                    headers.append((b'content-length', str(len(compressed)).encode('latin-1')))
+                    await send({**start, 'headers': headers})
+                    await send({'type': 'http.response.body', 'body': compressed})
+                    return
+
+                await send({**start, 'headers': headers})
+
+            compressor = state['compressor']
+            data = compressor.chunk(body) if more_body else compressor.finish(body)
+            await send({'type': 'http.response.body', 'body': data, 'more_body': more_body})
+
+        await self.app(scope, receive, send_compressed)
+
+def _merge_vary(headers) -> bytes:
+    """Existing Vary values plus Accept-Encoding"""
+    values = [v.decode('latin-1') for n, v in headers if n == b'vary']
+    tokens = [t.strip() for value in values for t in value.split(',') if t.strip()]
+    if 'accept-encoding' not in (t.lower() for t in tokens):
+        tokens.append('Accept-Encoding')
+    return ', '.join(tokens).encode('latin-1')
@@ -0,0 +1,20 @@
+"""
+Shared Skyfield ephemeris and timescale
+Loaded once per process and used by every service
+"""
+from functools import lru_cache
+
+from skyfield.api import load
+
+# JPL DE421 (1900-2050), read from the working directory (downloaded on first use)
+EPHEMERIS_FILE = 'de421.bsp'
+
+@lru_cache(maxsize=None)
+def get_timescale():
+    """Skyfield timescale (leap seconds and Delta T tables)"""
+    return load.timescale()
+
+@lru_cache(maxsize=None)
+def get_ephemeris():
+    """Planetary ephemeris kernel"""
+    return load(EPHEMERIS_FILE)
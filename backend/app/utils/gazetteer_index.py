@@ -0,0 +1,402 @@
+"""
+Gazetteer index files for offline geocoding
+
+Builds compact lookup tables from a GeoNames-format dump (cities15000.txt
+or the bundled seed file) and, optionally, timezone boundary polygons
+(timezone-boundary-builder GeoJSON). Every table is a .npy or raw binary
+file, so a loaded index is memory-mapped and shared by all workers.
+
+Usage:
+    python -m app.utils.gazetteer_index cities15000.txt --out knowledge_base/gazetteer/index
+    python -m app.utils.gazetteer_index cities15000.txt --out ... --timezones combined.json
+"""
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+import argparse
+import json
+import os
+import re
+import shutil
+import tempfile
+import unicodedata
+import zlib
+
+import numpy as np
+import pytz
+
+INDEX_VERSION = 1
+
+RECORD_DTYPE = np.dtype([
+    ('lat', '<f8'), ('lon', '<f8'), ('population', '<i8'), ('tz', '<i2'),
+    ('country', 'S2'), ('label_offset', '<i8'), ('label_length', '<i4')
+])
+KEY_DTYPE = np.dtype([('record', '<i4'), ('offset', '<i8'), ('length', '<i4')])
+
+# GeoNames "geoname" table columns used here
+COL_NAME, COL_ASCII, COL_ALTERNATES = 1, 2, 3
+COL_LAT, COL_LON, COL_COUNTRY, COL_POPULATION, COL_TIMEZONE = 4, 5, 8, 14, 17
+
+def normalize(text: str) -> str:
+    """Lower-case, strip accents and punctuation: 'São Paulo' -> 'sao paulo'"""
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(c for c in text if not unicodedata.combining(c)).lower()
+    return ' '.join(re.sub(r'[^\w]+', ' ', text).split())
+
+def trigrams(key: str) -> List[int]:
+    """Distinct trigram codes of a normalized key (padded so prefixes weigh more)"""
+    padded = f"  {key} "
+    return sorted({zlib.crc32(padded[i:i + 3].encode('utf-8')) for i in range(len(padded) - 2)})
+
+def read_geonames(path: Path) -> Iterable[Dict]:
+    """Places from a GeoNames-format, tab-separated file"""
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if not line.strip() or line.startswith('#'):
+                continue
+            cols = line.rstrip('\n').split('\t')
+            if len(cols) <= COL_TIMEZONE:
+                continue
+            yield {
+                'name': cols[COL_NAME],
+                'alternates': [a for a in {cols[COL_ASCII], *cols[COL_ALTERNATES].split(',')} if a],
+                'lat': float(cols[COL_LAT]),
+                'lon': float(cols[COL_LON]),
+                'country': cols[COL_COUNTRY],
+                'population': int(cols[COL_POPULATION] or 0),
+                'timezone': cols[COL_TIMEZONE]
+            }
+
+def _parse_iso6709(value: str) -> Tuple[float, float]:
+    """'+1305+08017' (or with seconds) -> (13.083, 80.283)"""
+    lat_str, lon_str = re.match(r'([+-]\d+)([+-]\d+)', value).groups()
+
+    def convert(part: str, degree_digits: int) -> float:
+        sign = -1 if part[0] == '-' else 1
+        digits = part[1:]
+        degrees = int(digits[:degree_digits])
+        minutes = int(digits[degree_digits:degree_digits + 2])
+        seconds = int(digits[degree_digits + 2:] or 0)
+        return sign * (degrees + minutes / 60 + seconds / 3600)
+
+    return convert(lat_str, 2), convert(lon_str, 3)
+
+def read_zone_tab() -> Iterable[Dict]:
+    """Principal cities of every tz database zone (shipped with pytz)"""
+    with pytz.open_resource('zone.tab') as f:
+        for line in f.read().decode('utf-8').splitlines():
+            if not line or line.startswith('#'):
+                continue
+            country, coordinates, zone = line.split('\t')[:3]
+            lat, lon = _parse_iso6709(coordinates)
+            yield {
+                'name': zone.rsplit('/', 1)[-1].replace('_', ' '),
+                'alternates': [],
+                'lat': lat,
+                'lon': lon,
+                'country': country,
+                'population': 0,
+                'timezone': zone
+            }
+
+def _read_polygons(path: Path) -> Iterable[Tuple[str, List]]:
+    """(tzid, rings) per polygon of a timezone-boundary-builder GeoJSON file"""
+    with open(path, encoding='utf-8') as f:
+        collection = json.load(f)
+    for feature in collection['features']:
+        tzid = feature['properties']['tzid']
+        geometry = feature['geometry']
+        polygons = geometry['coordinates'] if geometry['type'] == 'MultiPolygon' else [geometry['coordinates']]
+        for rings in polygons:
+            yield tzid, rings
+
+def _write_strings(path: Path, strings: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Concatenate UTF-8 strings into one file; returns (offsets, lengths)"""
+    encoded = [s.encode('utf-8') for s in strings]
+    lengths = np.array([len(e) for e in encoded], dtype=np.int64)
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(np.int64) if encoded else lengths
+    path.write_bytes(b''.join(encoded))
+    return offsets, lengths
+
+def build_index(source: Path, out_dir: Path, timezones: Optional[Path] = None,
+                include_zone_tab: bool = True) -> Dict:
+    """
+    Build the index files for a gazetteer
+
+    Args:
+        source: GeoNames-format file
+        out_dir: Directory for the index (replaced atomically)
+        timezones: Optional timezone-boundary-builder GeoJSON for polygon lookups
+        include_zone_tab: Add the tz database's principal cities not already present
+
+    Returns:
+        The index metadata (also written to meta.json)
+    """
+    source, out_dir = Path(source), Path(out_dir)
+
+    places = list(read_geonames(source))
+    if include_zone_tab:
+        seen = {(normalize(p['name']), p['country']) for p in places}
+        places.extend(p for p in read_zone_tab() if (normalize(p['name']), p['country']) not in seen)
+
+    tz_names = sorted({p['timezone'] for p in places if p['timezone']})
+    polygons = list(_read_polygons(Path(timezones))) if timezones else []
+    tz_names = sorted(set(tz_names) | {tzid for tzid, _ in polygons})
+    tz_ids = {name: i for i, name in enumerate(tz_names)}
+
+    # Private to this build: workers starting together each build their own copy
+    out_dir.parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(prefix=out_dir.name + '.tmp-', dir=out_dir.parent))
+    tmp.chmod(0o755)  # mkdtemp creates it private
+
+    # Records and their display labels
+    labels = [f"{p['name']}, {pytz.country_names.get(p['country'], p['country'])}" for p in places]
+    label_offsets, label_lengths = _write_strings(tmp / 'labels.bin', labels)
+    records = np.zeros(len(places), dtype=RECORD_DTYPE)
+    records['lat'] = [p['lat'] for p in places]
+    records['lon'] = [p['lon'] for p in places]
+    records['population'] = [p['population'] for p in places]
+    records['tz'] = [tz_ids.get(p['timezone'], -1) for p in places]
+    records['country'] = [p['country'].encode('ascii') for p in places]
+    records['label_offset'] = label_offsets
+    records['label_length'] = label_lengths
+    np.save(tmp / 'records.npy', records)
+
+    # Sorted name keys (primary and alternate names) for prefix search
+    key_pairs = sorted({(normalize(name), i)
+                        for i, p in enumerate(places)
+                        for name in [p['name'], *p['alternates']] if normalize(name)})
+    key_offsets, key_lengths = _write_strings(tmp / 'keys.bin', [k for k, _ in key_pairs])
+    keys = np.zeros(len(key_pairs), dtype=KEY_DTYPE)
+    keys['record'] = [i for _, i in key_pairs]
+    keys['offset'] = key_offsets
+    keys['length'] = key_lengths
+    np.save(tmp / 'keys.npy', keys)
+
+    # Trigram postings (code -> key indices) for fuzzy matching
+    pairs = np.array([(code, k) for k, (key, _) in enumerate(key_pairs) for code in trigrams(key)],
+                     dtype=np.int64).reshape(-1, 2)
+    pairs = pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+    codes, starts = np.unique(pairs[:, 0], return_index=True)
+    np.save(tmp / 'trigram_codes.npy', codes.astype(np.uint32))
+    np.save(tmp / 'trigram_offsets.npy', np.append(starts, len(pairs)).astype(np.int64))
+    np.save(tmp / 'trigram_postings.npy', pairs[:, 1].astype(np.int32))
+
+    # Timezone polygons: bounding boxes, ring offsets and vertices
+    if polygons:
+        bboxes, polygon_tz, polygon_rings, ring_offsets, vertices = [], [], [0], [0], []
+        for tzid, rings in polygons:
+            outer = np.asarray(rings[0], dtype=float)[:, :2]
+            bboxes.append([outer[:, 0].min(), outer[:, 1].min(), outer[:, 0].max(), outer[:, 1].max()])
+            polygon_tz.append(tz_ids[tzid])
+            for ring in rings:
+                ring = np.asarray(ring, dtype=float)[:, :2]
+                vertices.append(ring)
+                ring_offsets.append(ring_offsets[-1] + len(ring))
+            polygon_rings.append(polygon_rings[-1] + len(rings))
+        np.save(tmp / 'tz_bboxes.npy', np.array(bboxes))
+        np.save(tmp / 'tz_polygon_tz.npy', np.array(polygon_tz, dtype=np.int16))
+        np.save(tmp / 'tz_polygon_rings.npy', np.array(polygon_rings, dtype=np.int64))
+        np.save(tmp / 'tz_ring_offsets.npy', np.array(ring_offsets, dtype=np.int64))
+        np.save(tmp / 'tz_vertices.npy', np.concatenate(vertices))
+
+    stat = source.stat()
+    meta = {
+        'version': INDEX_VERSION,
+        'source': str(source.resolve()),
+        'source_size': stat.st_size,
+        'source_mtime': stat.st_mtime,
+        'timezone_polygons': str(Path(timezones).resolve()) if timezones else None,
+        'records': len(places),
+        'keys': len(key_pairs),
+        'polygons': len(polygons),
+        'timezones': tz_names
+    }
+    (tmp / 'meta.json').write_text(json.dumps(meta), encoding='utf-8')
+
+    _install(tmp, out_dir)
+    return meta
+
+def _install(tmp: Path, out_dir: Path):
+    """
+    Move a finished build into place with renames
+
+    Readers still mapping the old files keep them. When another process
+    installs its build between the two renames, its identical index is
+    kept and this one is discarded.
+    """
+    old = None
+    if out_dir.exists():
+        old = Path(tempfile.mkdtemp(prefix=out_dir.name + '.old-', dir=out_dir.parent))
+        try:
+            os.replace(out_dir, old)
+        except FileNotFoundError:
+            pass  # Another builder moved it aside first
+    try:
+        os.rename(tmp, out_dir)
+    except OSError:
+        if not (out_dir / 'meta.json').exists():
+            raise
+        shutil.rmtree(tmp, ignore_errors=True)
+    if old is not None:
+        shutil.rmtree(old, ignore_errors=True)
+
+def _map_bytes(path: Path):
+    """Memory-map a raw byte file (empty files cannot be mapped)"""
+    if path.stat().st_size == 0:
+        return np.zeros(0, dtype=np.uint8)
+    return np.memmap(path, dtype=np.uint8, mode='r')
+
+class GazetteerIndex:
+    """Read-only, memory-mapped view of a built index"""
+
+    PREFIX_SCAN_LIMIT = 2000  # Keys examined per prefix query
+    MIN_SIMILARITY = 0.3  # Trigram similarity needed for a fuzzy match
+
+    def __init__(self, index_dir: Path):
+        index_dir = Path(index_dir)
+        self.meta = json.loads((index_dir / 'meta.json').read_text(encoding='utf-8'))
+        self.timezones = self.meta['timezones']
+
+        self.records = np.load(index_dir / 'records.npy', mmap_mode='r')
+        self.labels = _map_bytes(index_dir / 'labels.bin')
+        self.keys = np.load(index_dir / 'keys.npy', mmap_mode='r')
+        self.key_text = _map_bytes(index_dir / 'keys.bin')
+        self.trigram_codes = np.load(index_dir / 'trigram_codes.npy', mmap_mode='r')
+        self.trigram_offsets = np.load(index_dir / 'trigram_offsets.npy', mmap_mode='r')
+        self.trigram_postings = np.load(index_dir / 'trigram_postings.npy', mmap_mode='r')
+
+        self.has_polygons = self.meta.get('polygons', 0) > 0
+        if self.has_polygons:
+            self.tz_bboxes = np.load(index_dir / 'tz_bboxes.npy', mmap_mode='r')
+            self.tz_polygon_tz = np.load(index_dir / 'tz_polygon_tz.npy', mmap_mode='r')
+            self.tz_polygon_rings = np.load(index_dir / 'tz_polygon_rings.npy', mmap_mode='r')
+            self.tz_ring_offsets = np.load(index_dir / 'tz_ring_offsets.npy', mmap_mode='r')
+            self.tz_vertices = np.load(index_dir / 'tz_vertices.npy', mmap_mode='r')
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def key(self, k: int) -> str:
+        entry = self.keys[k]
+        start = int(entry['offset'])
+        return bytes(self.key_text[start:start + int(entry['length'])]).decode('utf-8')
+
+    def place(self, record: int) -> Dict:
+        """Public dictionary for one record"""
+        r = self.records[record]
+        start = int(r['label_offset'])
+        label = bytes(self.labels[start:start + int(r['label_length'])]).decode('utf-8')
+        tz = int(r['tz'])
+        return {
+            'name': label.rsplit(', ', 1)[0],
+            'label': label,
+            'country': r['country'].decode('ascii'),
+            'latitude': float(r['lat']),
+            'longitude': float(r['lon']),
+            'timezone': self.timezones[tz] if tz >= 0 else None,
+            'population': int(r['population'])
+        }
+
+    def _first_key_at_or_after(self, text: str) -> int:
+        """Binary search over the sorted keys"""
+        lo, hi = 0, len(self.keys)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.key(mid) < text:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def exact_matches(self, name: str) -> List[int]:
+        """Records whose name or an alternate name is exactly the normalized name"""
+        matches = []
+        for k in range(self._first_key_at_or_after(name), len(self.keys)):
+            if self.key(k) != name:
+                break
+            matches.append(int(self.keys[k]['record']))
+        return matches
+
+    def prefix_matches(self, prefix: str) -> List[Tuple[int, bool]]:
+        """(record, exact) for names starting with the normalized prefix"""
+        lo = self._first_key_at_or_after(prefix)
+        matches = []
+        for k in range(lo, min(lo + self.PREFIX_SCAN_LIMIT, len(self.keys))):
+            key = self.key(k)
+            if not key.startswith(prefix):
+                break
+            matches.append((int(self.keys[k]['record']), key == prefix))
+        return matches
+
+    def fuzzy_matches(self, query: str, limit: int) -> List[Tuple[int, float]]:
+        """(record, similarity) of names sharing enough trigrams with the query"""
+        codes = np.array(trigrams(query), dtype=np.uint32)
+        if len(codes) == 0 or len(self.trigram_codes) == 0:
+            return []
+        positions = np.minimum(np.searchsorted(self.trigram_codes, codes), len(self.trigram_codes) - 1)
+        positions = positions[self.trigram_codes[positions] == codes]
+        if len(positions) == 0:
+            return []
+
+        postings = np.concatenate([self.trigram_postings[self.trigram_offsets[p]:self.trigram_offsets[p + 1]]
+                                   for p in positions])
+        key_ids, shared = np.unique(postings, return_counts=True)
+
+        # Jaccard similarity; a padded key of n characters has about n + 1 trigrams
+        key_trigrams = self.keys['length'][key_ids] + 1
+        similarity = shared / (len(codes) + key_trigrams - shared)
+        keep = similarity >= self.MIN_SIMILARITY
+        key_ids, similarity = key_ids[keep], similarity[keep]
+
+        order = np.argsort(-similarity, kind='stable')[:limit * 4]
+        best = {}
+        for k, score in zip(key_ids[order].tolist(), similarity[order].tolist()):
+            best.setdefault(int(self.keys[k]['record']), score)
+        return list(best.items())
+
+    def nearest(self, lat: float, lon: float) -> int:
+        """Record closest to a point (equirectangular distance)"""
+        lats = np.radians(self.records['lat'])
+        dlat = lats - np.radians(lat)
+        dlon = (np.radians(self.records['lon'] - lon) + np.pi) % (2 * np.pi) - np.pi
+        distance = dlat ** 2 + (dlon * np.cos((lats + np.radians(lat)) / 2)) ** 2
+        return int(distance.argmin())
+
+    def _in_ring(self, ring: int, lon: float, lat: float) -> bool:
+        """Even-odd ray casting against one ring"""
+        start, end = self.tz_ring_offsets[ring], self.tz_ring_offsets[ring + 1]
+        x, y = self.tz_vertices[start:end, 0], self.tz_vertices[start:end, 1]
+        x2, y2 = np.roll(x, -1), np.roll(y, -1)
+        crosses = (y > lat) != (y2 > lat)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x_at = x + (lat - y) * (x2 - x) / (y2 - y)
+        return bool(np.count_nonzero(crosses & (lon < x_at)) % 2)
+
+    def polygon_timezone(self, lat: float, lon: float) -> Optional[str]:
+        """Timezone of the polygon containing the point, if any"""
+        if not self.has_polygons:
+            return None
+        b = self.tz_bboxes
+        candidates = np.nonzero((b[:, 0] <= lon) & (lon <= b[:, 2]) & (b[:, 1] <= lat) & (lat <= b[:, 3]))[0]
+        for polygon in candidates.tolist():
+            first, last = self.tz_polygon_rings[polygon], self.tz_polygon_rings[polygon + 1]
+            if self._in_ring(first, lon, lat) and not any(self._in_ring(r, lon, lat) for r in range(first + 1, last)):
+                return self.timezones[int(self.tz_polygon_tz[polygon])]
+        return None
+
+def main(argv: Optional[List[str]] = None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Build the offline gazetteer index")
+    parser.add_argument('source', help="GeoNames-format file (e.g. cities15000.txt)")
+    parser.add_argument('--out', required=True, help="Index directory")
+    parser.add_argument('--timezones', default=None,
+                        help="timezone-boundary-builder GeoJSON for polygon timezone lookups")
+    parser.add_argument('--no-zone-tab', action='store_true',
+                        help="Do not add the tz database's principal cities")
+    args = parser.parse_args(argv)
+
+    meta = build_index(Path(args.source), Path(args.out), args.timezones, not args.no_zone_tab)
+    print(f"Indexed {meta['records']} places ({meta['keys']} names, {meta['polygons']} timezone polygons)")
+
+if __name__ == "__main__":
+    main()
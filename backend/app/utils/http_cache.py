@@ -0,0 +1,98 @@
+"""
+HTTP caching helpers: strong ETags and conditional responses
+"""
+import hashlib
+from typing import Any, Optional
+
+import orjson
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+
+from app.config import settings
+from app.utils.json_utils import OPTIONS
+
+# Global calendar data changes at most daily, so browsers and the CDN may reuse it for a day
+CALENDAR_MAX_AGE = 86400
+
+# Per-user results: never stored by shared caches, always revalidated
+PRIVATE_REVALIDATE = 'private, no-cache'
+
+# Suffixes CompressionMiddleware adds to the ETags of encoded representations
+_ENCODING_SUFFIXES = ('-br"', '-gzip"')
+
+def strong_etag(body: bytes) -> str:
+    """Strong ETag (quoted) derived from the exact response bytes"""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+def fingerprint_etag(*inputs: Any) -> str:
+    """
+    Strong ETag derived from everything that determines a response
+
+    Computed before the response itself, so a client that already holds the
+    result is answered without recalculating it. The application version
+    is included so deploys invalidate earlier results.
+
+    Args:
+        inputs: JSON-serializable values (dict keys are sorted)
+    """
+    encoded = orjson.dumps([settings.VERSION, *inputs], option=OPTIONS | orjson.OPT_SORT_KEYS)
+    return strong_etag(encoded)
+
+def _strip_encoding(etag: str) -> str:
+    for suffix in _ENCODING_SUFFIXES:
+        if etag.endswith(suffix):
+            return etag[:-len(suffix)] + '"'
+    return etag
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an If-None-Match header covers the given ETag
+
+    Args:
+        if_none_match: Raw header value (comma-separated list or '*')
+        etag: Current quoted ETag
+
+    Returns:
+        True when the client's copy is still current
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    # Weak comparison, as RFC 9110 requires for If-None-Match; any content coding of the same data
+    candidates = [_strip_encoding(tag.strip().removeprefix('W/')) for tag in if_none_match.split(',')]
+    return etag in candidates
+
+def not_modified(etag: str, if_none_match: Optional[str],
+                 cache_control: str = PRIVATE_REVALIDATE) -> Optional[Response]:
+    """
+    304 Not Modified when the client's copy is current, else None
+
+    The chart endpoints are safe queries sent as POST (the body carries the
+    birth details), so a match is answered with 304 as for GET rather than
+    412, letting clients reuse the copy they hold.
+    """
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={'ETag': etag, 'Cache-Control': cache_control})
+    return None
+
+def tagged_json(content: Any, etag: str, cache_control: str = PRIVATE_REVALIDATE) -> ORJSONResponse:
+    """orjson response carrying its ETag and Cache-Control"""
+    return ORJSONResponse(content, headers={'ETag': etag, 'Cache-Control': cache_control})
+
+def cacheable_json(body: bytes, etag: str, if_none_match: Optional[str],
+                   max_age: int = CALENDAR_MAX_AGE) -> Response:
+    """
+    JSON response with validators, or 304 Not Modified when the client is current
+
+    Args:
+        body: Pre-encoded JSON
+        etag: Strong ETag of body
+        if_none_match: Request's If-None-Match header
+        max_age: Freshness lifetime in seconds for browsers and shared caches
+    """
+    cache_control = f'public, max-age={max_age}'
+    return not_modified(etag, if_none_match, cache_control) or Response(
+        content=body, media_type='application/json',
+        headers={'ETag': etag, 'Cache-Control': cache_control}
+    )
@@ -0,0 +1,43 @@
+"""
+Sign ingress detection on sampled longitude arrays
+Crossings are located between samples and refined by linear interpolation
+"""
+from typing import Tuple
+import numpy as np
+
+def find_ingresses(jd, longitudes) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Find sign (rasi) changes in a longitude series
+
+    The series must be sampled finely enough that a planet never moves more
+    than one sign between samples (daily is enough for every graha, the Moon
+    included). Retrograde re-entries are reported like any other change.
+
+    Args:
+        jd: Sample times as Julian dates (array)
+        longitudes: Sidereal longitudes in degrees at those times (array)
+
+    Returns:
+        (ingress_jd, from_rasi, to_rasi) arrays, rasi numbered 1-12
+    """
+    jd = np.asarray(jd, dtype=float)
+    lons = np.mod(np.asarray(longitudes, dtype=float), 360.0)
+    rasi = (lons // 30).astype(int)
+
+    idx = np.nonzero(rasi[1:] != rasi[:-1])[0]
+    if len(idx) == 0:
+        empty = np.array([], dtype=int)
+        return np.array([], dtype=float), empty, empty
+
+    from_rasi = rasi[idx]
+    to_rasi = rasi[idx + 1]
+
+    # Signed motion between samples, unwrapped across 360°
+    delta = np.mod(lons[idx + 1] - lons[idx] + 180.0, 360.0) - 180.0
+    # Direct motion crosses the start of the new sign, retrograde the start of the old one
+    boundary = np.where(delta > 0, to_rasi, from_rasi) * 30.0
+    travelled = np.mod(boundary - lons[idx] + 180.0, 360.0) - 180.0
+    fraction = np.clip(travelled / np.where(delta == 0, 1.0, delta), 0.0, 1.0)
+
+    ingress_jd = jd[idx] + fraction * (jd[idx + 1] - jd[idx])
+    return ingress_jd, from_rasi + 1, to_rasi + 1
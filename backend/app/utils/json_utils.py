@@ -0,0 +1,22 @@
+"""
+Fast JSON encoding with orjson
+"""
+from typing import Any
+
+import orjson
+
+# Same options as fastapi.responses.ORJSONResponse
+OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+def dumps(value: Any) -> bytes:
+    """Serialize to JSON bytes (datetimes, dates and numpy values included)"""
+    return orjson.dumps(value, option=OPTIONS)
+
+def fragment(value: Any) -> orjson.Fragment:
+    """
+    Serialize once and embed verbatim later
+
+    A Fragment placed inside a response dictionary is copied into the output
+    as-is, so sections shared by every response are not re-encoded.
+    """
+    return orjson.Fragment(dumps(value))
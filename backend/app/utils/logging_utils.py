@@ -0,0 +1,131 @@
+"""
+Structured logging with per-request correlation IDs
+Records are handed to a queue and written by a background thread, so
+request handlers never block on stdout
+"""
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import uuid
+
+request_id_var: ContextVar[str] = ContextVar('request_id', default='-')
+
+# Attributes every LogRecord has; anything else came in through extra={...}
+_RECORD_FIELDS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime', 'request_id'}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+class RequestIdFilter(logging.Filter):
+    """Stamp records with the correlation ID of the request being served"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, request_id, message and extra fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'request_id': getattr(record, 'request_id', '-'),
+            'message': record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+def configure_logging(level: str = 'INFO', fmt: str = 'json'):
+    """
+    Route the 'app' loggers through a non-blocking queue handler
+
+    Args:
+        level: Minimum level; records below it are dropped before formatting
+        fmt: 'json' for structured lines, 'text' for human-readable output
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+
+    stream = logging.StreamHandler(sys.stdout)
+    if fmt == 'text':
+        stream.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s'))
+    else:
+        stream.setFormatter(JSONFormatter())
+
+    log_queue = queue.SimpleQueue()
+    handler = logging.handlers.QueueHandler(log_queue)
+    # Runs on the calling thread, where the request's context is visible
+    handler.addFilter(RequestIdFilter())
+
+    logger = logging.getLogger('app')
+    logger.handlers = [handler]
+    logger.setLevel(level.upper())
+    logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=False)
+    _listener.start()
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def _pause_listener():
+    # Only the forking thread survives in the child: flush and stop the writer
+    # thread before fork() and start one in each process afterwards
+    if _listener is not None:
+        _listener.stop()
+
+def _resume_listener():
+    if _listener is not None:
+        _listener.start()
+
+atexit.register(shutdown_logging)
+os.register_at_fork(before=_pause_listener, after_in_parent=_resume_listener,
+                    after_in_child=_resume_listener)
+
+class RequestIdMiddleware:
+    """ASGI middleware: take X-Request-ID (or generate one) and echo it on the response"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for key, value in scope.get('headers', []):
+            if key == b'x-request-id':
+                request_id = value.decode('latin-1')[:128]
+                break
+        request_id = request_id or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+
+        async def send_with_id(message):
+            if message['type'] == 'http.response.start':
+                headers = list(message.get('headers', []))
+                headers.append((b'x-request-id', request_id.encode('latin-1')))
+                message = {**message, 'headers': headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id_var.reset(token)
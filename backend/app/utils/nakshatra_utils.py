@@ -0,0 +1,63 @@
+"""
+Nakshatra (star), pada and star lord (Saram) lookup utilities
+Boundaries are precomputed once so lookups vectorize over whole batches
+"""
+from typing import Dict, Tuple
+import numpy as np
+
+NAKSHATRA_NAMES = [
+    'Ashwini', 'Bharani', 'Krittika', 'Rohini', 'Mrigashira', 'Ardra',
+    'Punarvasu', 'Pushya', 'Ashlesha', 'Magha', 'Purva Phalguni', 'Uttara Phalguni',
+    'Hasta', 'Chitra', 'Swati', 'Vishakha', 'Anuradha', 'Jyeshtha',
+    'Mula', 'Purva Ashadha', 'Uttara Ashadha', 'Shravana', 'Dhanishta', 'Shatabhisha',
+    'Purva Bhadrapada', 'Uttara Bhadrapada', 'Revati'
+]
+
+# Vimshottari star lords repeat every 9 nakshatras (Ashwini, Magha, Mula -> Ketu)
+STAR_LORD_CYCLE = ['Ketu', 'Venus', 'Sun', 'Moon', 'Mars', 'Rahu', 'Jupiter', 'Saturn', 'Mercury']
+STAR_LORDS = [STAR_LORD_CYCLE[i % 9] for i in range(27)]
+
+NAKSHATRA_SPAN = 360.0 / 27  # 13°20'
+PADA_SPAN = NAKSHATRA_SPAN / 4  # 3°20'
+
+# Start longitude of every nakshatra and every pada (sidereal)
+NAKSHATRA_BOUNDARIES = np.arange(27) * NAKSHATRA_SPAN
+PADA_BOUNDARIES = np.arange(108) * PADA_SPAN
+
+def get_nakshatra_indices(longitudes) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Look up nakshatra index (0-26) and pada (1-4) for sidereal longitudes
+
+    Args:
+        longitudes: Scalar or array of sidereal longitudes in degrees
+
+    Returns:
+        (nakshatra_indices, padas) as integer arrays
+    """
+    lons = np.mod(np.asarray(longitudes, dtype=float), 360.0)
+    nakshatra_idx = np.searchsorted(NAKSHATRA_BOUNDARIES, lons, side='right') - 1
+    pada_idx = np.searchsorted(PADA_BOUNDARIES, lons, side='right') - 1
+    return nakshatra_idx, (pada_idx % 4) + 1
+
+def annotate_nakshatras(planets: Dict) -> Dict:
+    """
+    Add nakshatra, pada and star lord to every planet entry (in place)
+
+    Args:
+        planets: Dictionary of planet positions with sidereal 'longitude'
+
+    Returns:
+        The same dictionary, annotated
+    """
+    names = list(planets.keys())
+    if not names:
+        return planets
+
+    nakshatra_idx, padas = get_nakshatra_indices([planets[n]['longitude'] for n in names])
+
+    for name, idx, pada in zip(names, nakshatra_idx.tolist(), padas.tolist()):
+        planets[name]['nakshatra'] = NAKSHATRA_NAMES[idx]
+        planets[name]['nakshatra_lord'] = STAR_LORDS[idx]
+        planets[name]['pada'] = pada
+
+    return planets
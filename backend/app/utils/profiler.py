@@ -0,0 +1,250 @@
+"""
+Per-request sampling profiler
+Samples the stacks of the threads serving a request (the event loop and the
+compute workers it hands calculations to) and exports the result as a
+speedscope profile (https://www.speedscope.app) or collapsed stacks for flamegraph.pl
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+import hmac
+import json
+import sys
+import threading
+import time
+
+from app.config import settings
+
+# Profiler of the request being served; worker threads see it through the copied context
+_active_profiler: ContextVar[Optional['SamplingProfiler']] = ContextVar('active_profiler', default=None)
+
+@contextmanager
+def profile_worker_thread():
+    """
+    Sample the calling worker thread while it works for a profiled request
+
+    A no-op unless the context (copied from the request) carries a profiler.
+    """
+    profiler = _active_profiler.get()
+    if profiler is None:
+        yield
+        return
+    thread_id = threading.get_ident()
+    profiler.add_thread(thread_id, threading.current_thread().name)
+    try:
+        yield
+    finally:
+        profiler.remove_thread(thread_id)
+
+class SamplingProfiler:
+    """Sample threads' Python stacks at a fixed interval from a background thread"""
+
+    def __init__(self, thread_id: int, interval: float = 0.002, thread_name: str = 'event loop'):
+        """
+        Args:
+            thread_id: Thread serving the request (threading.get_ident() of the target)
+            interval: Seconds between samples
+            thread_name: Its label in the profile
+        """
+        self.interval = interval
+
+        self.frames: List[Tuple[str, str, int]] = []  # (function, file, first line)
+        self._frame_index: Dict[Tuple[str, str, int], int] = {}
+        # Per thread label: root-first frame indices and the seconds each sample stands for
+        self.samples: Dict[str, List[List[int]]] = {}
+        self.weights: Dict[str, List[float]] = {}
+
+        self._threads: Dict[int, str] = {}  # Thread ident -> label, while it works for the request
+        self._threads_lock = threading.Lock()
+        self.add_thread(thread_id, thread_name)
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.started_at = 0.0
+        self.duration = 0.0
+
+    def add_thread(self, thread_id: int, name: str):
+        """Start sampling a thread (a worker picking up the request's work)"""
+        with self._threads_lock:
+            self._threads[thread_id] = name
+            self.samples.setdefault(name, [])
+            self.weights.setdefault(name, [])
+
+    def remove_thread(self, thread_id: int):
+        """Stop sampling a thread"""
+        with self._threads_lock:
+            self._threads.pop(thread_id, None)
+
+    def _frame_id(self, code) -> int:
+        key = (code.co_name, code.co_filename, code.co_firstlineno)
+        index = self._frame_index.get(key)
+        if index is None:
+            index = self._frame_index[key] = len(self.frames)
+            self.frames.append(key)
+        return index
+
+    def _sample(self, elapsed: float):
+        with self._threads_lock:
+            threads = list(self._threads.items())
+        current = sys._current_frames()
+        for thread_id, name in threads:
+            frame = current.get(thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._frame_id(frame.f_code))
+                frame = frame.f_back
+            stack.reverse()
+            self.samples[name].append(stack)
+            self.weights[name].append(elapsed)
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            self._sample(now - last)
+            last = now
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - self.started_at
+
+    def to_speedscope(self, name: str) -> Dict:
+        """Profile in speedscope's file format (one sampled profile per thread, seconds)"""
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'shared': {
+                'frames': [{'name': func, 'file': file, 'line': line} for func, file, line in self.frames]
+            },
+            'profiles': [{
+                'type': 'sampled',
+                'name': thread,
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': self.duration,
+                'samples': self.samples[thread],
+                'weights': self.weights[thread]
+            } for thread in self.samples if self.samples[thread]],
+            'name': name,
+            'exporter': 'rajanadi-profiler'
+        }
+
+    def to_collapsed(self) -> str:
+        """Collapsed stacks ('thread;a;b;c <microseconds>'), the input of flamegraph.pl"""
+        totals: Dict[str, float] = {}
+        for thread in self.samples:
+            for stack, weight in zip(self.samples[thread], self.weights[thread]):
+                frames = [f"{self.frames[i][0]} ({Path(self.frames[i][1]).name}:{self.frames[i][2]})" for i in stack]
+                key = ';'.join([thread] + frames)
+                totals[key] = totals.get(key, 0.0) + weight
+        return '\n'.join(f"{key} {int(total * 1e6)}" for key, total in totals.items()) + '\n'
+
+class ProfilerMiddleware:
+    """
+    ASGI middleware running flagged requests under the sampling profiler
+
+    A request is profiled when it sends ``X-Profile: 1`` (or ``?profile=1``)
+    and ``X-Profile-Token`` (or ``?profile_token=``) matches PROFILER_TOKEN.
+    ``X-Profile-Format`` / ``?profile_format=`` picks ``speedscope`` (default)
+    or ``collapsed``. The profile replaces the response body, or is written to
+    PROFILER_OUTPUT_DIR (named in the ``X-Profile-File`` header) when set.
+
+    The event-loop thread is sampled, and so are compute-pool threads while
+    they run the request's calculations (natal chart, navamsa, transits), each
+    as its own profile. LLM calls and process-pool workers show up as time
+    spent awaiting, and concurrent requests on the same loop appear too.
+    """
+
+    def __init__(self, app, token: Optional[str] = None, interval_ms: Optional[float] = None,
+                 output_dir: Optional[str] = None):
+        self.app = app
+        self.token = settings.PROFILER_TOKEN if token is None else token
+        self.interval = (settings.PROFILER_INTERVAL_MS if interval_ms is None else interval_ms) / 1000
+        self.output_dir = settings.PROFILER_OUTPUT_DIR if output_dir is None else output_dir
+
+    def _options(self, scope) -> Optional[str]:
+        """Requested profile format, or None when the request is not to be profiled"""
+        if not self.token:
+            return None
+        headers = {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope.get('headers', [])}
+        query = {k: v[-1] for k, v in parse_qs(scope.get('query_string', b'').decode('latin-1')).items()}
+
+        flag = headers.get('x-profile', query.get('profile', ''))
+        if flag.lower() not in ('1', 'true', 'yes'):
+            return None
+        token = headers.get('x-profile-token', query.get('profile_token', ''))
+        if not hmac.compare_digest(token.encode(), self.token.encode()):
+            return None
+
+        fmt = headers.get('x-profile-format', query.get('profile_format', 'speedscope')).lower()
+        return fmt if fmt in ('speedscope', 'collapsed') else 'speedscope'
+
+    def _render(self, profiler: SamplingProfiler, fmt: str, name: str) -> Tuple[bytes, str, str]:
+        """(body, content type, file extension)"""
+        if fmt == 'collapsed':
+            return profiler.to_collapsed().encode('utf-8'), 'text/plain; charset=utf-8', 'txt'
+        return json.dumps(profiler.to_speedscope(name)).encode('utf-8'), 'application/json', 'speedscope.json'
+
+    async def __call__(self, scope, receive, send):
+        fmt = self._options(scope) if scope['type'] == 'http' else None
+        if fmt is None:
+            await self.app(scope, receive, send)
+            return
+
+        name = f"{scope['method']} {scope['path']}"
+        profiler = SamplingProfiler(threading.get_ident(), self.interval)
+        response_start = {}
+        body_parts = []
+
+        async def capture(message):
+            if message['type'] == 'http.response.start':
+                response_start.update(message)
+            elif message['type'] == 'http.response.body':
+                body_parts.append(message.get('body', b''))
+
+        profiler.start()
+        token = _active_profiler.set(profiler)
+        try:
+            await self.app(scope, receive, capture)
+        finally:
+            _active_profiler.reset(token)
+            profiler.stop()
+
+        body, content_type, extension = self._render(profiler, fmt, name)
+        status = response_start.get('status', 500)
+
+        if self.output_dir:
+            out = Path(self.output_dir)
+            out.mkdir(parents=True, exist_ok=True)
+            slug = scope['path'].strip('/').replace('/', '-') or 'root'
+            path = out / f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}-{slug}.{extension}"
+            path.write_bytes(body)
+
+            # Pass the original response through, pointing at the stored profile
+            headers = list(response_start.get('headers', []))
+            headers.append((b'x-profile-file', str(path).encode('latin-1')))
+            await send({**response_start, 'headers': headers})
+            await send({'type': 'http.response.body', 'body': b''.join(body_parts)})
+            return
+
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', content_type.encode('latin-1')),
+                (b'content-length', str(len(body)).encode('latin-1')),
+                (b'x-profiled-status', str(status).encode('latin-1'))
+            ]
+        })
+        await send({'type': 'http.response.body', 'body': body})
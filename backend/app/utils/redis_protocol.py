@@ -0,0 +1,327 @@
+"""
+Minimal Redis-protocol (RESP2) client, and an in-memory server for tests
+
+The client covers what the shared cache tier needs (GET, SET with PX/NX,
+DEL, PING) over a small pool of blocking connections; it works against
+Redis, Valkey, KeyDB or any other RESP server. FakeRedisServer speaks the
+same protocol from a thread, so the shared tier can be exercised locally:
+
+    python -m app.utils.redis_protocol --port 6379
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+import argparse
+import os
+import socket
+import socketserver
+import threading
+import time
+import weakref
+
+class RedisError(Exception):
+    """Error reply from the server"""
+
+def encode_command(*args) -> bytes:
+    """RESP array of bulk strings"""
+    out = [b'*%d\r\n' % len(args)]
+    for arg in args:
+        if isinstance(arg, str):
+            arg = arg.encode('utf-8')
+        elif not isinstance(arg, (bytes, bytearray)):
+            arg = str(arg).encode('ascii')
+        out.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+    return b''.join(out)
+
+def read_reply(stream) -> Any:
+    """
+    Read one reply from a buffered binary stream
+
+    Returns:
+        bytes for bulk strings, str for status replies, int, list, or None
+
+    Raises:
+        RedisError: For error replies
+        ConnectionError: If the server closed the connection
+    """
+    line = stream.readline()
+    if not line.endswith(b'\r\n'):
+        raise ConnectionError("Connection closed by server")
+    kind, rest = line[:1], line[1:-2]
+
+    if kind == b'$':
+        length = int(rest)
+        if length < 0:
+            return None
+        data = stream.read(length + 2)
+        if len(data) != length + 2:
+            raise ConnectionError("Connection closed by server")
+        return data[:-2]
+    if kind == b'+':
+        return rest.decode('utf-8')
+    if kind == b':':
+        return int(rest)
+    if kind == b'*':
+        length = int(rest)
+        return None if length < 0 else [read_reply(stream) for _ in range(length)]
+    if kind == b'-':
+        raise RedisError(rest.decode('utf-8', 'replace'))
+    raise ConnectionError(f"Unexpected reply {line[:20]!r}")
+
+# Live clients, so pooled connections can be dropped in forked children
+_clients: 'weakref.WeakSet[RespClient]' = weakref.WeakSet()
+
+class RespClient:
+    """Thread-safe client with a pool of persistent connections"""
+
+    def __init__(self, url: str, timeout: float = 0.25, max_idle: int = 8):
+        """
+        Args:
+            url: redis://[:password@]host[:port][/db]
+            timeout: Seconds for connecting and for each reply
+            max_idle: Idle connections kept open for reuse
+        """
+        parsed = urlparse(url)
+        if parsed.scheme != 'redis':
+            raise ValueError(f"Unsupported cache URL '{url}' (use redis://host:port/db)")
+
+        self.host = parsed.hostname or 'localhost'
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.lstrip('/') or 0)
+        self.password = parsed.password
+        self.timeout = timeout
+        self.max_idle = max_idle
+
+        self._idle: List[Tuple[socket.socket, Any]] = []
+        self._lock = threading.Lock()
+        _clients.add(self)
+
+    def _connect(self) -> Tuple[socket.socket, Any]:
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        connection = (sock, sock.makefile('rb'))
+        try:
+            if self.password:
+                self._call(connection, ('AUTH', self.password))
+            if self.db:
+                self._call(connection, ('SELECT', self.db))
+        except BaseException:
+            self._close(connection)
+            raise
+        return connection
+
+    @staticmethod
+    def _call(connection: Tuple[socket.socket, Any], args: Tuple) -> Any:
+        sock, stream = connection
+        sock.sendall(encode_command(*args))
+        return read_reply(stream)
+
+    @staticmethod
+    def _close(connection: Tuple[socket.socket, Any]):
+        sock, stream = connection
+        try:
+            stream.close()
+            sock.close()
+        except OSError:
+            pass
+
+    def execute(self, *args) -> Any:
+        """
+        Send one command and return its reply
+
+        Raises:
+            RedisError: For error replies (the connection stays usable)
+            OSError: On connection failures and timeouts
+        """
+        with self._lock:
+            connection = self._idle.pop() if self._idle else None
+        if connection is None:
+            connection = self._connect()
+
+        try:
+            reply = self._call(connection, args)
+        except RedisError:
+            self._release(connection)
+            raise
+        except BaseException:
+            # The reply stream may be out of step; never reuse this connection
+            self._close(connection)
+            raise
+        self._release(connection)
+        return reply
+
+    def _release(self, connection: Tuple[socket.socket, Any]):
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(connection)
+                return
+        self._close(connection)
+
+    def ping(self) -> bool:
+        """True when the server answers"""
+        return self.execute('PING') == 'PONG'
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Value of key, or None"""
+        return self.execute('GET', key)
+
+    def set(self, key: str, value: bytes, px: Optional[int] = None, nx: bool = False) -> bool:
+        """
+        Store value
+
+        Args:
+            px: Expiry in milliseconds
+            nx: Only set when the key does not exist
+
+        Returns:
+            False when nx is set and the key already existed
+        """
+        args = ['SET', key, value]
+        if px is not None:
+            args += ['PX', max(1, int(px))]
+        if nx:
+            args.append('NX')
+        return self.execute(*args) is not None
+
+    def delete(self, *keys: str) -> int:
+        """Delete keys; returns how many existed"""
+        return self.execute('DEL', *keys)
+
+    def reset(self):
+        """Forget pooled connections (they belong to the parent after a fork)"""
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def close(self):
+        """Close the pooled connections"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            self._close(connection)
+
+def _reset_clients_after_fork():
+    for client in list(_clients):
+        client.reset()
+
+os.register_at_fork(after_in_child=_reset_clients_after_fork)
+
+class _FakeRedisHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        while True:
+            try:
+                command = read_reply(self.rfile)
+            except (ConnectionError, OSError, ValueError):
+                return
+            if not isinstance(command, list) or not command:
+                self.wfile.write(b'-ERR protocol error\r\n')
+                return
+            self.wfile.write(self.server.store.execute(command))
+
+class _FakeStore:
+    """Keys with optional expiry, guarded by one lock"""
+
+    def __init__(self):
+        self.data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self.lock = threading.Lock()
+        self.commands = 0
+
+    def _live(self, key: bytes) -> Optional[bytes]:
+        item = self.data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    def execute(self, command: List[bytes]) -> bytes:
+        name, args = command[0].upper(), command[1:]
+        with self.lock:
+            self.commands += 1
+            if name == b'PING':
+                return b'+PONG\r\n'
+            if name in (b'AUTH', b'SELECT'):
+                return b'+OK\r\n'
+            if name == b'GET' and len(args) == 1:
+                value = self._live(args[0])
+                return b'$-1\r\n' if value is None else b'$%d\r\n%s\r\n' % (len(value), value)
+            if name == b'SET' and len(args) >= 2:
+                return self._set(args)
+            if name in (b'DEL', b'EXISTS') and args:
+                count = sum(self._live(key) is not None for key in args)
+                if name == b'DEL':
+                    for key in args:
+                        self.data.pop(key, None)
+                return b':%d\r\n' % count
+            if name == b'DBSIZE':
+                return b':%d\r\n' % sum(self._live(key) is not None for key in list(self.data))
+            if name in (b'FLUSHDB', b'FLUSHALL'):
+                self.data.clear()
+                return b'+OK\r\n'
+        return b"-ERR unknown command or wrong number of arguments for '%s'\r\n" % name.lower()
+
+    def _set(self, args: List[bytes]) -> bytes:
+        key, value, options = args[0], args[1], [option.upper() for option in args[2:]]
+        expires_at = None
+        if b'PX' in options or b'EX' in options:
+            unit = b'PX' if b'PX' in options else b'EX'
+            try:
+                amount = int(options[options.index(unit) + 1])
+            except (IndexError, ValueError):
+                return b'-ERR syntax error\r\n'
+            expires_at = time.monotonic() + (amount / 1000 if unit == b'PX' else amount)
+        if b'NX' in options and self._live(key) is not None:
+            return b'$-1\r\n'
+        self.data[key] = (value, expires_at)
+        return b'+OK\r\n'
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    """In-memory RESP server (GET, SET EX/PX/NX, DEL, EXISTS, DBSIZE, FLUSHDB, PING)"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0):
+        """
+        Args:
+            host: Bind address
+            port: Bind port (0 = any free port; see .url)
+        """
+        super().__init__((host, port), _FakeRedisHandler)
+        self.store = _FakeStore()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'redis://{host}:{port}/0'
+
+    def start(self) -> 'FakeRedisServer':
+        """Serve from a daemon thread"""
+        self._thread = threading.Thread(target=self.serve_forever, name='fake-redis', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and release the port"""
+        self.shutdown()
+        self.server_close()
+
+def main(argv: Optional[List[str]] = None):
+    """Run the in-memory server in the foreground"""
+    parser = argparse.ArgumentParser(description="In-memory Redis-protocol server for local testing")
+    parser.add_argument('--host', default='127.0.0.1', help="Bind address")
+    parser.add_argument('--port', type=int, default=6379, help="Bind port")
+    args = parser.parse_args(argv)
+
+    server = FakeRedisServer(args.host, args.port)
+    print(f"Serving {server.url} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Single-flight coalescing for identical in-flight async work
+Concurrent callers with the same key await one execution and share its result
+"""
+from typing import Any, Awaitable, Callable, Dict, Hashable
+import asyncio
+
+class SingleFlight:
+    """Deduplicate concurrent calls by key"""
+    
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.executed = 0
+        self.coalesced = 0
+    
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run func() unless an identical call is already in flight
+        
+        Args:
+            key: Fingerprint identifying identical work
+            func: Zero-argument coroutine factory
+            
+        Returns:
+            The (shared) result; exceptions are shared too
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            self.executed += 1
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        
+        # Shield so one caller disconnecting does not cancel the others' result
+        return await asyncio.shield(task)
+    
+    @property
+    def inflight(self) -> int:
+        """Distinct keys currently executing"""
+        return len(self._inflight)
@@ -0,0 +1,365 @@
+"""
+Two-tier cache: an in-process LRU in front of an optional shared Redis tier
+
+Every worker process keeps its own TTLCache. With a shared tier configured,
+misses fall through to it (values in the compact binary encoding) and
+computed values are written to both, so a chart calculated by one worker
+is a hit for all of them.
+
+Stampede protection: concurrent misses on one key compute once. Within a
+process, threads wait on a per-key lock. Across processes, the first
+worker takes a short-lived lock key in the shared tier (SET NX PX) and the
+others poll for its result. If the lock disappears without a result (the
+holder failed), the next waiter takes it over; after `lock_timeout` waiters
+compute the value themselves.
+
+The shared tier is optional at run time too: after a connection error or
+timeout it is skipped for `retry_after` seconds and the cache runs on its
+local tier alone.
+"""
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+import asyncio
+import logging
+import threading
+import time
+import uuid
+
+from prometheus_client import Counter
+
+from app.utils.binary_codec import CodecError, pack, unpack
+from app.utils.redis_protocol import RedisError, RespClient
+from app.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+CACHE_REQUESTS = Counter(
+    'rajanadi_cache_requests_total', 'Cache lookups by outcome',
+    ['cache', 'result']  # local_hit, shared_hit, miss
+)
+CACHE_SHARED_ERRORS = Counter(
+    'rajanadi_cache_shared_errors_total', 'Failed shared-tier operations', ['cache']
+)
+
+_MISSING = object()
+
+# Poll interval while another worker computes a value (doubles up to the maximum)
+WAIT_INTERVAL = 0.01
+MAX_WAIT_INTERVAL = 0.1
+
+class TieredCache:
+    """Local LRU tier plus an optional shared tier, with stampede protection"""
+
+    def __init__(self, name: str, maxsize: int = 512, ttl: float = 3600.0,
+                 shared: Optional[RespClient] = None, prefix: str = '',
+                 lock_timeout: float = 15.0, retry_after: float = 5.0):
+        """
+        Args:
+            name: Cache name (metrics label and key namespace)
+            maxsize: Entries kept in the local tier
+            ttl: Seconds entries stay valid, in both tiers
+            shared: Client for the shared tier (None = local tier only)
+            prefix: Prepended to shared-tier keys (e.g., app name and version)
+            lock_timeout: Seconds a computation may hold the shared lock; waiting
+                workers compute the value themselves after this
+            retry_after: Seconds the shared tier is skipped after an error
+        """
+        self.name = name
+        self.ttl = ttl
+        self.local = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.shared = shared
+        self.prefix = f'{prefix}{name}:'
+        self.lock_timeout = lock_timeout
+        self.retry_after = retry_after
+
+        self._key_locks: Dict[Hashable, list] = {}  # key -> [lock, threads using it]
+        self._key_locks_guard = threading.Lock()
+        self._shared_down_until = 0.0
+
+        # Metrics
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.waited = 0  # Misses answered by another worker's computation
+
+    # Shared tier
+
+    @property
+    def shared_available(self) -> bool:
+        """True when a shared tier is configured and not backing off after an error"""
+        return self.shared is not None and time.monotonic() >= self._shared_down_until
+
+    def _shared(self, operation: Callable[[], Any], fallback: Any = None) -> Any:
+        """Run a shared-tier operation, backing off from the tier when it fails"""
+        if not self.shared_available:
+            return fallback
+        try:
+            return operation()
+        except (OSError, RedisError) as e:
+            CACHE_SHARED_ERRORS.labels(cache=self.name).inc()
+            self._shared_down_until = time.monotonic() + self.retry_after
+            logger.warning("Shared cache unavailable for %ss (%s): %s",
+                           self.retry_after, self.name, e)
+            return fallback
+
+    def _shared_get(self, key: str) -> Any:
+        data = self._shared(lambda: self.shared.get(self.prefix + key))
+        if data is None:
+            return _MISSING
+        try:
+            return unpack(data)
+        except CodecError as e:
+            logger.warning("Dropping undecodable shared cache entry %s: %s", self.prefix + key, e)
+            return _MISSING
+
+    def _shared_set(self, key: str, value: Any, ttl: float):
+        try:
+            data = pack(value)
+        except CodecError as e:
+            logger.warning("Not sharing cache entry %s: %s", self.prefix + key, e)
+            return
+        self._shared(lambda: self.shared.set(self.prefix + key, data, px=ttl * 1000))
+
+    def _lock_key(self, key: str) -> str:
+        return f'{self.prefix}lock:{key}'
+
+    def _acquire_shared_lock(self, key: str) -> Optional[str]:
+        """
+        Take the shared computation lock for key
+
+        Returns:
+            A token to release it with, '' when the shared tier is unavailable
+            (compute without coordination), or None if another worker holds it
+        """
+        token = uuid.uuid4().hex
+        acquired = self._shared(
+            lambda: self.shared.set(self._lock_key(key), token,
+                                    px=self.lock_timeout * 1000, nx=True),
+            fallback=True
+        )
+        if not acquired:
+            return None
+        return token if self.shared_available else ''
+
+    def _release_shared_lock(self, key: str, token: str):
+        if not token:
+            return
+        lock_key = self._lock_key(key)
+        # Check-then-delete is not atomic: at worst a lock that expired and was
+        # retaken in between is dropped early, costing one duplicate computation
+        if self._shared(lambda: self.shared.get(lock_key)) == token.encode('ascii'):
+            self._shared(lambda: self.shared.delete(lock_key))
+
+    # Lookups
+
+    def _lookup(self, key: str) -> Any:
+        value = self.local.get(key, _MISSING)
+        if value is not _MISSING:
+            self.local_hits += 1
+            CACHE_REQUESTS.labels(cache=self.name, result='local_hit').inc()
+            return value
+
+        value = self._shared_get(key)
+        if value is not _MISSING:
+            self.shared_hits += 1
+            CACHE_REQUESTS.labels(cache=self.name, result='shared_hit').inc()
+            self.local.set(key, value)
+        return value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Value for key from either tier, or default"""
+        value = self._lookup(key)
+        return default if value is _MISSING else value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Store value in both tiers"""
+        ttl = self.ttl if ttl is None else ttl
+        self.local.set(key, value, ttl)
+        if self.shared_available:
+            self._shared_set(key, value, ttl)
+
+    def delete(self, key: str):
+        """Remove key from both tiers"""
+        self.local.pop(key)
+        self._shared(lambda: self.shared.delete(self.prefix + key))
+
+    def clear_local(self):
+        """Drop this process's entries (the shared tier is left alone)"""
+        self.local.clear()
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        """Per-key lock, kept while any thread holds or waits for it"""
+        with self._key_locks_guard:
+            entry = self._key_locks.get(key)
+            if entry is None:
+                entry = self._key_locks[key] = [threading.Lock(), 0]
+            entry[1] += 1
+            return entry[0]
+
+    def _release_key_lock(self, key: str):
+        with self._key_locks_guard:
+            entry = self._key_locks[key]
+            entry[1] -= 1
+            if not entry[1]:
+                del self._key_locks[key]
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """
+        Cached value for key, computing (once across threads and workers) on a miss
+
+        Values are shared between callers; treat them as read-only.
+
+        Args:
+            key: Cache key (a string; include every input of compute)
+            compute: Zero-argument function producing the value
+            ttl: Seconds the value stays valid (default: the cache's ttl)
+
+        Returns:
+            The cached or computed value
+        """
+        value = self.local.get(key, _MISSING)
+        if value is not _MISSING:
+            self.local_hits += 1
+            CACHE_REQUESTS.labels(cache=self.name, result='local_hit').inc()
+            return value
+
+        lock = self._key_lock(key)
+        try:
+            with lock:
+                # Another thread may have filled it while this one waited
+                value = self._lookup(key)
+                if value is not _MISSING:
+                    return value
+
+                deadline = time.monotonic() + self.lock_timeout
+                token = self._acquire_shared_lock(key)
+                while token is None:
+                    value = self._wait_for_shared(key, deadline)
+                    if value is not _MISSING:
+                        return value
+                    if time.monotonic() >= deadline:
+                        token = ''  # Holder overran; compute without the lock
+                    else:
+                        # Lock released without a value (the holder failed): take over
+                        token = self._acquire_shared_lock(key)
+
+                self.misses += 1
+                CACHE_REQUESTS.labels(cache=self.name, result='miss').inc()
+                try:
+                    value = compute()
+                    self.set(key, value, ttl)
+                finally:
+                    self._release_shared_lock(key, token)
+                return value
+        finally:
+            self._release_key_lock(key)
+
+    def _poll_shared(self, key: str) -> Tuple[Any, bool]:
+        """(value or _MISSING, whether the computation lock is still held)"""
+        value = self._shared_get(key)
+        if value is not _MISSING:
+            return value, False
+        return _MISSING, self._shared(lambda: self.shared.get(self._lock_key(key))) is not None
+
+    def _waited_for(self, key: str, value: Any) -> Any:
+        self.waited += 1
+        CACHE_REQUESTS.labels(cache=self.name, result='shared_hit').inc()
+        self.local.set(key, value)
+        return value
+
+    def _wait_for_shared(self, key: str, deadline: float) -> Any:
+        """
+        Poll the shared tier for another worker's result
+
+        Returns:
+            The value, or _MISSING once the lock is gone without one (the
+            holder failed or produced an uncacheable result), at the
+            deadline, or when the shared tier becomes unavailable
+        """
+        interval = WAIT_INTERVAL
+        while time.monotonic() < deadline and self.shared_available:
+            time.sleep(interval)
+            interval = min(interval * 2, MAX_WAIT_INTERVAL)
+            value, locked = self._poll_shared(key)
+            if value is not _MISSING:
+                return self._waited_for(key, value)
+            if not locked:
+                break
+        return _MISSING
+
+    async def aget_or_compute(self, key: str, factory: Callable[[], Awaitable[Any]],
+                              ttl: Optional[float] = None,
+                              cacheable: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        Async get_or_compute for coroutine producers (LLM generations)
+
+        Shared-tier calls run on the default executor so a slow cache never
+        blocks the event loop. Coalescing of concurrent callers within the
+        process is left to the caller (SingleFlight); across workers the
+        shared lock applies as in get_or_compute.
+
+        Args:
+            key: Cache key
+            factory: Zero-argument coroutine factory producing the value
+            ttl: Seconds the value stays valid (default: the cache's ttl)
+            cacheable: Predicate on the result; False leaves it uncached
+                (e.g., an error message returned in place of a result)
+        """
+        value = self.local.get(key, _MISSING)
+        if value is not _MISSING:
+            self.local_hits += 1
+            CACHE_REQUESTS.labels(cache=self.name, result='local_hit').inc()
+            return value
+
+        loop = asyncio.get_running_loop()
+        value = await loop.run_in_executor(None, self._lookup, key)
+        if value is not _MISSING:
+            return value
+
+        deadline = time.monotonic() + self.lock_timeout
+        token = await loop.run_in_executor(None, self._acquire_shared_lock, key)
+        while token is None:
+            value = await self._await_shared(key, deadline)
+            if value is not _MISSING:
+                return value
+            if time.monotonic() >= deadline:
+                token = ''
+            else:
+                token = await loop.run_in_executor(None, self._acquire_shared_lock, key)
+
+        self.misses += 1
+        CACHE_REQUESTS.labels(cache=self.name, result='miss').inc()
+        try:
+            value = await factory()
+            if cacheable is None or cacheable(value):
+                await loop.run_in_executor(None, self.set, key, value, ttl)
+        finally:
+            await loop.run_in_executor(None, self._release_shared_lock, key, token)
+        return value
+
+    async def _await_shared(self, key: str, deadline: float) -> Any:
+        """_wait_for_shared without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        interval = WAIT_INTERVAL
+        while time.monotonic() < deadline and self.shared_available:
+            await asyncio.sleep(interval)
+            interval = min(interval * 2, MAX_WAIT_INTERVAL)
+            value, locked = await loop.run_in_executor(None, self._poll_shared, key)
+            if value is not _MISSING:
+                return self._waited_for(key, value)
+            if not locked:
+                break
+        return _MISSING
+
+    def get_metrics(self) -> Dict:
+        """Hits per tier, misses and local size"""
+        lookups = self.local_hits + self.shared_hits + self.waited + self.misses
+        return {
+            'local_hits': self.local_hits,
+            'shared_hits': self.shared_hits,
+            'waited': self.waited,
+            'misses': self.misses,
+            'hit_rate': round(1 - self.misses / lookups, 4) if lookups else None,
+            'local_size': len(self.local),
+            'shared': self.shared is not None,
+            'shared_available': self.shared_available
+        }
@@ -0,0 +1,107 @@
+"""
+Per-stage latency instrumentation
+Stages are exported as Prometheus histograms and, per request, as a Server-Timing header
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+import time
+
+from prometheus_client import Counter, Histogram
+
+# Chart stages take milliseconds to ~1 s; LLM stages take up to minutes
+STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+                 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+STAGE_SECONDS = Histogram(
+    'rajanadi_stage_seconds', 'Latency of request processing stages',
+    ['stage'], buckets=STAGE_BUCKETS
+)
+REQUEST_SECONDS = Histogram(
+    'rajanadi_request_seconds', 'End-to-end HTTP request latency',
+    ['method', 'route', 'status'], buckets=STAGE_BUCKETS
+)
+STAGE_DEGRADED = Counter(
+    'rajanadi_stage_degraded_total', 'Optional stages left out of a response',
+    ['stage', 'reason']
+)
+LLM_TOKENS = Counter('rajanadi_llm_tokens_total', 'Tokens generated by the LLM backend')
+LLM_TOKENS_PER_SECOND = Histogram(
+    'rajanadi_llm_tokens_per_second', 'LLM generation throughput per call',
+    buckets=(1, 2, 5, 10, 20, 30, 50, 75, 100, 200, 500)
+)
+
+class RequestTimer:
+    """Stage durations collected while serving one request"""
+
+    def __init__(self):
+        self.spans: List[Tuple[str, float]] = []
+
+    def add(self, name: str, seconds: float):
+        self.spans.append((name, seconds))
+
+    def server_timing(self) -> str:
+        """Server-Timing header value (durations in milliseconds)"""
+        return ', '.join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.spans)
+
+_current_timer: ContextVar[Optional[RequestTimer]] = ContextVar('request_timer', default=None)
+
+def record_stage(name: str, seconds: float):
+    """Record a finished stage for the metrics and the current request"""
+    STAGE_SECONDS.labels(stage=name).observe(seconds)
+    timer = _current_timer.get()
+    if timer is not None:
+        timer.add(name, seconds)
+
+@contextmanager
+def stage(name: str):
+    """Time the enclosed block as a named stage"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - started)
+
+def record_generation(seconds: float, tokens: int):
+    """Record one LLM generation: its latency, token count and throughput"""
+    record_stage('llm_generation', seconds)
+    if tokens:
+        LLM_TOKENS.inc(tokens)
+        if seconds > 0:
+            LLM_TOKENS_PER_SECOND.observe(tokens / seconds)
+
+class TimingMiddleware:
+    """ASGI middleware: per-request timer, Server-Timing header and request histogram"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        timer = RequestTimer()
+        token = _current_timer.set(timer)
+        started = time.perf_counter()
+        status = {'code': 500}
+
+        async def send_with_timing(message):
+            if message['type'] == 'http.response.start':
+                status['code'] = message['status']
+                timer.add('total', time.perf_counter() - started)
+                headers = list(message.get('headers', []))
+                headers.append((b'server-timing', timer.server_timing().encode('latin-1')))
+                message = {**message, 'headers': headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_timer.reset(token)
+            route = scope.get('route')
+            REQUEST_SECONDS.labels(
+                method=scope['method'],
+                route=getattr(route, 'path', 'unmatched'),
+                status=str(status['code'])
+            ).observe(time.perf_counter() - started)
@@ -0,0 +1,68 @@
+"""
+Small thread-safe LRU cache with per-entry expiry
+"""
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+import threading
+import time
+
+class TTLCache:
+    """Bounded LRU mapping whose entries expire after `ttl` seconds"""
+    
+    def __init__(self, maxsize: int = 512, ttl: float = 1800.0):
+        """
+        Args:
+            maxsize: Maximum number of entries (least recently used are evicted)
+            ttl: Seconds an entry stays valid after it was set
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Value for key, or default if missing or expired"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+    
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store value, evicting the least recently used entry when full"""
+        with self._lock:
+            self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove key and return its value (expired entries return default)"""
+        with self._lock:
+            item = self._data.pop(key, None)
+            if item is None or item[0] <= time.monotonic():
+                return default
+            return item[1]
+    
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._data.clear()
+    
+    def purge_expired(self) -> int:
+        """Drop all expired entries; returns how many were removed"""
+        now = time.monotonic()
+        with self._lock:
+            expired = [key for key, (expires_at, _) in self._data.items() if expires_at <= now]
+            for key in expired:
+                del self._data[key]
+            return len(expired)
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
@@ -0,0 +1,133 @@
+"""
+Benchmark harness for the chart, transit, rules and prediction paths
+
+Each benchmark times a callable over several rounds and records the
+min, median and max round. The fastest round (the least noisy statistic on
+a shared machine) is what gets compared with the baseline's min in
+baselines.json; the median is reported alongside. Baselines are absolute
+timings from one machine, so failing on them is opt-in: with BENCH_COMPARE=1
+a benchmark fails when its fastest round exceeds the baseline min * threshold.
+
+    pytest benchmarks                                    # time and report
+    pytest benchmarks --update-baselines                 # store this machine's min/median/max
+    BENCH_COMPARE=1 pytest benchmarks                    # fail on regressions
+    BENCH_COMPARE=1 BENCH_THRESHOLD=1.3 pytest benchmarks  # tighter threshold
+"""
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# The prediction path must never need a real model
+os.environ.setdefault('LLM_BACKEND', 'fake')
+os.environ.setdefault('LLM_FAKE_TOKENS_PER_SECOND', '0')
+# Rounds clear the in-process caches; a shared tier would turn them into hits
+os.environ['CACHE_URL'] = ''
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+BASELINES_PATH = Path(__file__).parent / "baselines.json"
+RESULTS_PATH = Path(__file__).parent / "results.json"
+
+_results = {}
+
+def pytest_addoption(parser):
+    parser.addoption('--update-baselines', action='store_true', default=False,
+                     help="Write this run's min/median/max to benchmarks/baselines.json")
+
+def _load_baselines():
+    if BASELINES_PATH.exists():
+        return json.loads(BASELINES_PATH.read_text(encoding='utf-8'))
+    return {'threshold': 1.5, 'benchmarks': {}}
+
+class Benchmark:
+    """Times a callable and checks it against its stored baseline"""
+    
+    def __init__(self, name: str, baselines: dict, compare: bool):
+        self.name = name
+        self.baselines = baselines
+        self.compare = compare
+    
+    def __call__(self, func, rounds: int = 10, warmup: int = 1, setup=None):
+        """
+        Run func `rounds` times (after `warmup` untimed calls)
+        
+        Args:
+            func: Zero-argument callable to time
+            rounds: Timed rounds
+            warmup: Untimed rounds first (loads kernels, fills imports)
+            setup: Untimed callable run before every round (e.g., cache_clear)
+            
+        Returns:
+            The last return value of func
+        """
+        result = None
+        for _ in range(warmup):
+            if setup:
+                setup()
+            result = func()
+        
+        timings = []
+        for _ in range(rounds):
+            if setup:
+                setup()
+            started = time.perf_counter()
+            result = func()
+            timings.append(time.perf_counter() - started)
+        
+        median = statistics.median(timings)
+        _results[self.name] = {
+            'median': round(median, 6),
+            'min': round(min(timings), 6),
+            'max': round(max(timings), 6),
+            'rounds': rounds
+        }
+        
+        baseline = self.baselines['benchmarks'].get(self.name)
+        threshold = float(os.environ.get('BENCH_THRESHOLD', self.baselines.get('threshold', 1.5)))
+        if baseline and self.compare:
+            fastest = min(timings)
+            limit = baseline['min'] * threshold
+            assert fastest <= limit, (
+                f"{self.name}: fastest round {fastest * 1000:.2f} ms exceeds baseline "
+                f"{baseline['min'] * 1000:.2f} ms x {threshold}"
+            )
+        
+        return result
+
+@pytest.fixture
+def benchmark(request):
+    """Benchmark named after the test (without the test_ prefix)"""
+    name = request.node.name.removeprefix('test_')
+    compare = (os.environ.get('BENCH_COMPARE', '') not in ('', '0')
+               and not request.config.getoption('--update-baselines'))
+    return Benchmark(name, _load_baselines(), compare)
+
+def pytest_sessionfinish(session, exitstatus):
+    if not _results:
+        return
+    
+    RESULTS_PATH.write_text(json.dumps(_results, indent=2, sort_keys=True) + '\n', encoding='utf-8')
+    
+    if session.config.getoption('--update-baselines'):
+        baselines = _load_baselines()
+        baselines['benchmarks'].update(_results)
+        BASELINES_PATH.write_text(json.dumps(baselines, indent=2, sort_keys=True) + '\n', encoding='utf-8')
+
+def pytest_terminal_summary(terminalreporter):
+    if not _results:
+        return
+    
+    baselines = _load_baselines()['benchmarks']
+    terminalreporter.section("benchmarks")
+    for name, result in sorted(_results.items()):
+        line = f"{name:32} median {result['median'] * 1000:10.3f} ms   min {result['min'] * 1000:10.3f} ms"
+        if name in baselines:
+            ratio = result['min'] / baselines[name]['min']
+            line += f"   x{ratio:.2f} of baseline"
+        terminalreporter.write_line(line)
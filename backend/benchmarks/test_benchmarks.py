@@ -0,0 +1,136 @@
+"""
+End-to-end benchmarks: chart, transit, rules and prediction paths
+"""
+from datetime import datetime
+from pathlib import Path
+import subprocess
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.chart_calculator import chart_calculator
+from app.services.rajanadi_engine import rajanadi_engine
+from app.services.rules_matcher import rules_matcher
+from app.services.registry import services
+from app.services.caches import chart_cache, transit_cache, prediction_cache
+
+BACKEND_DIR = Path(__file__).parent.parent
+IMPORTTIME_REPORT = Path(__file__).parent / "importtime.txt"
+
+# Loaded on first use through the service registry, never by importing the app
+LAZY_MODULES = ('skyfield', 'numpy', 'pytz', 'requests', 'app.services.ollama_service',
+                'app.services.ephemeris_service', 'app.services.geocoder_service')
+
+BIRTH = (1990, 5, 15, 14, 30, 0, 13.0827, 80.2707)
+
+CHART_REQUEST = {
+    "name": "Benchmark",
+    "date_of_birth": "1990-05-15",
+    "time_of_birth": "14:30:00",
+    "place_of_birth": "Chennai, India",
+    "latitude": 13.0827,
+    "longitude": 80.2707
+}
+
+def _clear_caches():
+    """Route benchmarks time the calculation, not a cache hit from the previous round"""
+    for cache in (chart_cache, transit_cache, prediction_cache):
+        cache.clear_local()
+
+def _import_app() -> subprocess.CompletedProcess:
+    """Import the app in a fresh interpreter with -X importtime (report on stderr)"""
+    return subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app.main'],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+
+def _parse_importtime(report: str) -> dict:
+    """Module -> (self, cumulative) microseconds from an -X importtime report"""
+    modules = {}
+    for line in report.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(own), int(cumulative))
+    return modules
+
+@pytest.fixture(scope="module")
+def natal():
+    return chart_calculator.calculate_natal_chart(*BIRTH)
+
+@pytest.fixture(scope="module")
+def analysis(natal):
+    return rajanadi_engine.analyze_chart(natal, chart_calculator.calculate_navamsa(natal))
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app)
+
+def test_import_app(benchmark):
+    """Cold import of the app; writes the slowest imports to importtime.txt"""
+    result = benchmark(_import_app, rounds=3)
+    modules = _parse_importtime(result.stderr)
+    
+    slowest = sorted(modules.items(), key=lambda item: item[1][1], reverse=True)[:40]
+    IMPORTTIME_REPORT.write_text(
+        f"{'cumulative us':>14} {'self us':>10}  module\n" +
+        ''.join(f"{cumulative:>14} {own:>10}  {name}\n" for name, (own, cumulative) in slowest),
+        encoding='utf-8'
+    )
+    
+    eager = [name for name in LAZY_MODULES if name in modules]
+    assert not eager, f"Imported by app.main (should load on first use): {eager}"
+
+def test_calculate_natal_chart(benchmark):
+    benchmark(lambda: chart_calculator.calculate_natal_chart(*BIRTH), rounds=20)
+
+def test_calculate_navamsa(benchmark, natal):
+    benchmark(lambda: chart_calculator.calculate_navamsa(natal), rounds=200)
+
+def test_get_future_transits(benchmark, natal):
+    benchmark(lambda: services.ephemeris_service.get_future_transits(natal, months_ahead=12), rounds=5)
+
+def test_get_monthly_transits_cold(benchmark):
+    service = services.monthly_transit_service
+    benchmark(lambda: service.get_monthly_transits(months_ahead=6), rounds=10,
+              setup=service._compute_monthly_transits.cache_clear)
+
+def test_get_monthly_transits(benchmark):
+    benchmark(lambda: services.monthly_transit_service.get_monthly_transits(months_ahead=6), rounds=50)
+
+def test_get_sign_changes(benchmark):
+    year = datetime.now().year
+    benchmark(lambda: services.comprehensive_transit_service.get_sign_changes(year=year), rounds=3)
+
+def test_find_relevant_rules(benchmark):
+    keywords = ['retrograde', 'saturn', 'authority', 'transit', 'jupiter', 'marriage']
+    benchmark(lambda: rules_matcher.find_relevant_rules(keywords, max_sections=20), rounds=10)
+
+def test_build_context_for_chart(benchmark, analysis):
+    benchmark(lambda: rules_matcher.build_context_for_chart(analysis), rounds=5)
+
+def test_route_calculate_chart(benchmark, client):
+    def call():
+        response = client.post("/api/calculate-chart", json=CHART_REQUEST)
+        assert response.status_code == 200
+        return response
+    
+    benchmark(call, rounds=3, setup=_clear_caches)
+
+def test_route_generate_prediction(benchmark, client, natal):
+    request = {
+        "name": "Benchmark",
+        "natal_chart": natal,
+        "authority_planet": "Sun",
+        "category": "career",
+        "date_of_birth": "1990-05-15"
+    }
+    
+    def call():
+        response = client.post("/api/generate-prediction", json=request)
+        assert response.status_code == 200
+        return response
+    
+    benchmark(call, rounds=5, setup=_clear_caches)
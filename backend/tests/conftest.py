@@ -0,0 +1,13 @@
+"""
+Shared setup for the pytest suite: backend on the path, fake LLM backend
+"""
+import os
+import sys
+from pathlib import Path
+
+# Tests must never need a real model
+os.environ.setdefault('LLM_BACKEND', 'fake')
+os.environ.setdefault('LLM_FAKE_TOKENS_PER_SECOND', '0')
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
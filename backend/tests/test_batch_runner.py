@@ -0,0 +1,131 @@
+"""
+Batch runner: chunk checkpoints, resume guards, predictions at batch priority
+"""
+import json
+import logging
+from datetime import date
+
+import pytest
+
+from app import batch_runner
+from app.services.llm_scheduler import PRIORITY_BATCH
+from app.services.ollama_service import GenerationFailed
+
+SUBSCRIBERS = [
+    {'id': 's1', 'name': 'Arun', 'date_of_birth': '1990-05-15', 'time_of_birth': '14:30',
+     'place_of_birth': 'Chennai, India', 'latitude': 13.0827, 'longitude': 80.2707, 'timezone': 'Asia/Kolkata'},
+    {'id': 's2', 'name': 'Meena', 'date_of_birth': '1985-11-02', 'time_of_birth': '06:15',
+     'place_of_birth': 'Madurai, India', 'latitude': 9.9252, 'longitude': 78.1198, 'timezone': 'Asia/Kolkata'},
+    {'id': 's3', 'name': 'Broken', 'date_of_birth': 'not a date', 'time_of_birth': '06:15',
+     'place_of_birth': 'Nowhere'},
+]
+
+@pytest.fixture
+def subscribers(tmp_path):
+    path = tmp_path / 'subscribers.jsonl'
+    path.write_text(''.join(json.dumps(s) + '\n' for s in SUBSCRIBERS), encoding='utf-8')
+    return path
+
+def _read(path):
+    return [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+
+def _run(subscribers, out, **kwargs):
+    kwargs.setdefault('feed_start', date(2026, 1, 1))
+    return batch_runner.run_batch(str(subscribers), str(out), workers=1, chunk_size=2, **kwargs)
+
+def test_chunks_and_resume(subscribers, tmp_path, caplog):
+    out = tmp_path / 'out'
+    with caplog.at_level(logging.INFO, logger='app.batch_runner'):
+        manifest = _run(subscribers, out)
+
+    assert manifest['chunk_size'] == 2 and manifest['chunks'] == 2 and manifest['chunks_run'] == 2
+    assert manifest['processed'] == 3 and manifest['failed'] == 1
+    first = _read(batch_runner.chunk_path(out, 0))
+    assert [r['id'] for r in first] == ['s1', 's2'] and 'transit_feed' in first[0]
+    assert 'error' in _read(batch_runner.chunk_path(out, 1))[0]
+    assert any('Chunk 00001 done' in record.getMessage() for record in caplog.records)
+
+    # Finished chunks are not recomputed
+    assert _run(subscribers, out)['chunks_run'] == 0
+
+def test_resume_refuses_other_chunk_size(subscribers, tmp_path):
+    out = tmp_path / 'out'
+    _run(subscribers, out)
+    with pytest.raises(ValueError, match='chunk'):
+        batch_runner.run_batch(str(subscribers), str(out), workers=1, chunk_size=3)
+
+@pytest.mark.parametrize('option, value', [('feed_start', date(2026, 1, 2)), ('feed_days', 7),
+                                           ('prediction_categories', ['general'])])
+def test_resume_refuses_other_options(subscribers, tmp_path, option, value):
+    out = tmp_path / 'out'
+    _run(subscribers, out)
+    with pytest.raises(ValueError, match=option):
+        _run(subscribers, out, **{option: value})
+
+def test_resume_refuses_other_input(subscribers, tmp_path):
+    out = tmp_path / 'out'
+    _run(subscribers, out)
+    subscribers.write_text(''.join(json.dumps(s) + '\n' for s in reversed(SUBSCRIBERS)), encoding='utf-8')
+    with pytest.raises(ValueError, match='input_sha256'):
+        _run(subscribers, out)
+
+def test_resume_keeps_the_feed_window(subscribers, tmp_path):
+    """Resuming after midnight without --feed-start continues the original window"""
+    out = tmp_path / 'out'
+    _run(subscribers, out)
+    batch_runner.chunk_path(out, 1).unlink()
+
+    manifest = batch_runner.run_batch(str(subscribers), str(out), workers=1, chunk_size=2)
+    assert manifest['feed_start'] == '2026-01-01' and manifest['chunks_run'] == 1
+
+def test_resume_refuses_chunks_without_manifest(subscribers, tmp_path):
+    out = tmp_path / 'out'
+    out.mkdir()
+    batch_runner.chunk_path(out, 0).write_text('', encoding='utf-8')
+    with pytest.raises(ValueError, match='manifest'):
+        _run(subscribers, out)
+
+def test_predictions_go_through_scheduler(subscribers, tmp_path, monkeypatch):
+    """Queued jobs are generated at batch priority and written per chunk"""
+    priorities = []
+    submit = batch_runner.llm_scheduler.submit
+
+    async def recording_submit(func, *args, priority, **kwargs):
+        priorities.append(priority)
+        return await submit(func, *args, priority=priority, **kwargs)
+
+    monkeypatch.setattr(batch_runner.llm_scheduler, 'submit', recording_submit)
+    out = tmp_path / 'out'
+    manifest = _run(subscribers, out, prediction_categories=['general'])
+
+    assert manifest['prediction_jobs'] == 2 and manifest['predictions'] == 2
+    assert priorities == [PRIORITY_BATCH, PRIORITY_BATCH]
+    rows = _read(batch_runner.predictions_path(out, 0))
+    assert [(r['id'], r['category']) for r in rows] == [('s1', 'general'), ('s2', 'general')]
+    assert all(r['prediction_text'] for r in rows)
+
+    # Done predictions are not regenerated on resume
+    priorities.clear()
+    assert _run(subscribers, out, prediction_categories=['general'])['predictions'] == 0
+    assert priorities == []
+
+def test_prediction_failures_are_recorded(tmp_path, monkeypatch):
+    """Raised errors and backend error text are recorded per job, not returned as predictions"""
+    replies = iter([RuntimeError('backend down'), GenerationFailed('Error: model not loaded')])
+
+    def generate_prediction(**kwargs):
+        reply = next(replies)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    monkeypatch.setattr(batch_runner.services.ollama_service, 'generate_prediction', generate_prediction)
+    jobs = [{'id': f's{i}', 'category': 'general', 'birth_data': {}, 'chart_analysis': {}, 'matched_rules': ''}
+            for i in range(2)]
+    out = tmp_path / 'out'
+    out.mkdir()
+    batch_runner._write_atomic(batch_runner.jobs_path(out, 0), jobs)
+
+    summary = batch_runner.generate_predictions(str(out), [0])
+    assert summary == {'predictions': 0, 'predictions_failed': 2}
+    assert all('error' in row for row in _read(batch_runner.predictions_path(out, 0)))
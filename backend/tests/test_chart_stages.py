@@ -0,0 +1,79 @@
+"""
+calculate-chart fan-out: stages that time out or fail degrade the response
+"""
+import time
+
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.config import settings
+from app.main import app
+from app.services import chart_tasks
+
+client = TestClient(app)
+
+BIRTH = {
+    "name": "Test User",
+    "date_of_birth": "1990-05-15",
+    "time_of_birth": "14:30:00",
+    "place_of_birth": "Chennai, India",
+    "latitude": 13.0827,
+    "longitude": 80.2707,
+    "timezone": "Asia/Kolkata"
+}
+
+def _degraded_count(stage: str, reason: str) -> float:
+    return REGISTRY.get_sample_value('rajanadi_stage_degraded_total',
+                                     {'stage': stage, 'reason': reason}) or 0
+
+def test_complete_chart_is_cacheable():
+    response = client.post('/api/calculate-chart', json=BIRTH)
+    assert response.status_code == 200
+    body = response.json()
+    assert body['navamsa'] and body['authority_planet'] and 'degraded' not in body
+    assert 'etag' in response.headers
+
+def test_slow_stage_is_left_out(monkeypatch):
+    navamsa = chart_tasks.navamsa_chart
+
+    def slow_navamsa(natal):
+        time.sleep(0.3)
+        return navamsa(natal)
+
+    monkeypatch.setattr(chart_tasks, 'navamsa_chart', slow_navamsa)
+    monkeypatch.setitem(settings.CHART_STAGE_TIMEOUTS, 'navamsa', 0.05)
+    before = _degraded_count('navamsa', 'timeout')
+
+    response = client.post('/api/calculate-chart', json=BIRTH)
+    assert response.status_code == 200
+    body = response.json()
+    assert body['degraded'] == ['navamsa'] and body['navamsa'] is None
+    assert body['natal'] and body['authority_planet']
+    assert response.headers['cache-control'] == 'no-store' and 'etag' not in response.headers
+    assert _degraded_count('navamsa', 'timeout') == before + 1
+
+def test_failing_stage_is_left_out(monkeypatch):
+    def broken(natal):
+        raise RuntimeError('rules table missing')
+
+    monkeypatch.setattr(chart_tasks, 'authority_planet', broken)
+    before = _degraded_count('authority', 'error')
+
+    response = client.post('/api/calculate-chart', json=BIRTH)
+    assert response.status_code == 200
+    body = response.json()
+    assert body['degraded'] == ['authority']
+    assert body['authority_planet'] is None and body['lucky_gemstone'] is None
+    assert body['navamsa'] is not None
+    assert _degraded_count('authority', 'error') == before + 1
+
+def test_degraded_calendar_section_is_omitted(monkeypatch):
+    def broken(year):
+        raise RuntimeError('ephemeris unavailable')
+
+    monkeypatch.setattr(chart_tasks, 'sign_changes_section', broken)
+    response = client.post('/api/calculate-chart', params={'include_calendar': 'true'}, json=BIRTH)
+    assert response.status_code == 200
+    body = response.json()
+    assert body['degraded'] == ['sign_changes'] and 'sign_changes' not in body
+    assert body['monthly_transits'] and body['retrograde_periods'] is not None
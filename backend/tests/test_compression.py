@@ -0,0 +1,58 @@
+"""
+Compression middleware: Vary on every compressible response, ETags on 304s
+"""
+from fastapi import FastAPI, Header, Response
+from fastapi.testclient import TestClient
+
+from app.utils.compression import CompressionMiddleware
+from app.utils.http_cache import not_modified
+
+SMALL_ETAG = '"small"'
+LARGE_ETAG = '"large"'
+
+def _app() -> FastAPI:
+    app = FastAPI()
+
+    def conditional(body: bytes, etag: str, if_none_match):
+        return not_modified(etag, if_none_match) or Response(body, media_type='application/json',
+                                                             headers={'ETag': etag})
+
+    @app.get('/small')
+    def small(if_none_match: str = Header(None)):
+        return conditional(b'{"ok": true}', SMALL_ETAG, if_none_match)
+
+    @app.get('/large')
+    def large(if_none_match: str = Header(None)):
+        return conditional(b'{"values": [' + b'1.2345, ' * 400 + b'0]}', LARGE_ETAG, if_none_match)
+
+    return CompressionMiddleware(app, minimum_size=500)
+
+client = TestClient(_app())
+
+def test_vary_on_uncompressed_responses():
+    """Small bodies and identity requests still say the response varies by encoding"""
+    small = client.get('/small', headers={'Accept-Encoding': 'gzip'})
+    assert 'content-encoding' not in small.headers
+    assert small.headers['vary'] == 'Accept-Encoding'
+    assert small.headers['etag'] == SMALL_ETAG
+
+    identity = client.get('/large', headers={'Accept-Encoding': 'identity'})
+    assert 'content-encoding' not in identity.headers
+    assert identity.headers['vary'] == 'Accept-Encoding'
+
+def test_encoded_etag():
+    response = client.get('/large', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['content-encoding'] == 'gzip'
+    assert response.headers['etag'] == '"large-gzip"'
+    assert response.json()['values'][0] == 1.2345
+
+def test_not_modified_echoes_the_held_etag():
+    """A 304 only carries the encoded tag when the client's copy was encoded"""
+    small = client.get('/small', headers={'Accept-Encoding': 'gzip', 'If-None-Match': SMALL_ETAG})
+    assert small.status_code == 304
+    assert small.headers['etag'] == SMALL_ETAG
+    assert small.headers['vary'] == 'Accept-Encoding'
+
+    large = client.get('/large', headers={'Accept-Encoding': 'gzip', 'If-None-Match': 'W/"large-gzip"'})
+    assert large.status_code == 304
+    assert large.headers['etag'] == '"large-gzip"'
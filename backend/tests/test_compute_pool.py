@@ -0,0 +1,93 @@
+"""
+Compute pool: results, bounded backlog, slot release and 503 on overload
+"""
+import asyncio
+import math
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import routes
+from app.main import app
+from app.services.compute_pool import ComputePool, ComputePoolFullError
+
+client = TestClient(app)
+
+def test_runs_in_a_worker_thread():
+    pool = ComputePool('thread', workers=2)
+    try:
+        result = asyncio.run(pool.run(lambda x: (x * 2, threading.current_thread().name), 21))
+        assert result[0] == 42 and result[1].startswith('compute')
+        assert pool.get_metrics()['completed'] == 1
+    finally:
+        pool.shutdown()
+
+def test_runs_in_a_forked_worker():
+    pool = ComputePool('process', workers=1)
+    try:
+        assert asyncio.run(pool.run(math.factorial, 10)) == 3628800
+    finally:
+        pool.shutdown()
+
+def test_errors_propagate():
+    pool = ComputePool('thread', workers=1)
+    try:
+        with pytest.raises(ZeroDivisionError):
+            asyncio.run(pool.run(lambda: 1 / 0))
+        assert pool.failed == 1 and pool.active == 0
+    finally:
+        pool.shutdown()
+
+def test_full_queue_rejects():
+    pool = ComputePool('thread', workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def run():
+        running = asyncio.ensure_future(pool.run(release.wait))
+        waiting = asyncio.ensure_future(pool.run(release.wait))
+        await asyncio.sleep(0.01)
+        assert (pool.active, pool.queue_depth) == (1, 1)
+        with pytest.raises(ComputePoolFullError):
+            await pool.run(release.wait)
+        release.set()
+        await asyncio.gather(running, waiting)
+
+    try:
+        asyncio.run(run())
+        assert pool.rejected == 1 and pool.completed == 2 and pool.queue_depth == 0
+    finally:
+        pool.shutdown()
+
+def test_timed_out_task_holds_its_slot_until_done():
+    """A caller giving up does not free the worker; the finished task does"""
+    pool = ComputePool('thread', workers=1, max_queue=0)
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(pool.run(time.sleep, 0.2), 0.01)
+        assert pool.active == 1
+        with pytest.raises(ComputePoolFullError):
+            await asyncio.wait_for(pool.run(time.sleep, 0), 1)
+        await asyncio.sleep(0.3)
+        assert pool.active == 0
+        return await pool.run(lambda: 'free')
+
+    try:
+        assert asyncio.run(run()) == 'free'
+    finally:
+        pool.shutdown()
+
+def test_unknown_kind():
+    with pytest.raises(ValueError):
+        ComputePool('fiber')
+
+def test_overload_answers_503(monkeypatch):
+    async def full(func, *args, **kwargs):
+        raise ComputePoolFullError('Compute queue is full (64 waiting)')
+
+    monkeypatch.setattr(routes.compute_pool, 'run', full)
+    response = client.get('/api/calendar/sign-changes/2024')
+    assert response.status_code == 503
+    assert response.headers['retry-after'] == '1'
@@ -0,0 +1,198 @@
+"""
+Gazetteer geocoder: exact birth-place matches, country qualifiers, autocomplete, timezones,
+concurrent index builds, online fallback
+"""
+import asyncio
+import threading
+from datetime import date, datetime, time
+from types import SimpleNamespace
+
+import pytest
+
+from app.config import Settings, settings
+from app.services.errors import GeocodingUnavailableError
+from app.services.geocoder_service import GeocoderService
+from app.services.timezone_service import TimezoneService
+from app.utils.gazetteer_index import GazetteerIndex, build_index
+
+ROWS = [
+    (1, 'Hyderabad', 17.3850, 78.4867, 'IN', 6809970, 'Asia/Kolkata'),
+    (2, 'Karachi', 24.8607, 67.0011, 'PK', 14910352, 'Asia/Karachi'),
+    (3, 'Madurai', 9.9252, 78.1198, 'IN', 1017865, 'Asia/Kolkata'),
+]
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / 'cities.tsv'
+    lines = []
+    for geonameid, name, lat, lon, country, population, tz in ROWS:
+        fields = [str(geonameid), name, name, '', str(lat), str(lon), 'P', 'PPL', country,
+                  '', '', '', '', '', str(population), '', '', tz, '']
+        lines.append('\t'.join(fields))
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    return path
+
+@pytest.fixture
+def geocoder(source, tmp_path):
+    return GeocoderService(source, tmp_path / 'index', timezone_polygons='')
+
+def test_country_qualifier_restricts_matches(geocoder):
+    """A place missing from the named country is no match, not a match elsewhere"""
+    assert geocoder.geocode('Hyderabad, India')['country'] == 'IN'
+    assert geocoder.search('Hyderabad, Pakistan') == []
+    assert geocoder.geocode('Hyderabad')['name'] == 'Hyderabad'
+
+@pytest.fixture(scope='module')
+def bundled(tmp_path_factory):
+    """The shipped gazetteer (with the tz database's principal cities)"""
+    return GeocoderService(settings.GAZETTEER_PATH, tmp_path_factory.mktemp('bundled') / 'index',
+                           timezone_polygons='')
+
+@pytest.mark.parametrize('query', ['Karur', 'Nellore', 'Tiruppur', 'Chen', 'Paris, Texas',
+                                   'London, Ontario', 'Chennai, Tamil Nadu', 'Chennai, India, USA'])
+def test_near_misses_are_not_geocoded(bundled, query):
+    """Autocomplete may suggest Kanpur for 'Karur'; a birth place must not resolve to it"""
+    assert bundled.geocode(query) is None
+
+def test_exact_and_alternate_names(bundled):
+    assert bundled.geocode('Madras')['name'] == 'Chennai'
+    assert bundled.geocode('chennai, IN')['timezone'] == 'Asia/Kolkata'
+    assert bundled.geocode('Paris, France')['timezone'] == 'Europe/Paris'
+    assert bundled.geocode('London, United Kingdom')['country'] == 'GB'
+    # Autocomplete labels geocode to the place they show
+    label = bundled.search('Lond', 1)[0]['label']
+    assert bundled.geocode(label)['name'] == 'London'
+    # Autocomplete keeps its prefix and fuzzy matches
+    assert bundled.search('Karur', 1)[0]['name'] == 'Kanpur'
+    assert bundled.search('Chen', 1)[0]['name'] == 'Chennai'
+
+@pytest.mark.parametrize('query, expected', [('Chennai, India', 'Chennai'), ('madras', 'Chennai'),
+                                             ('trichy', 'Tiruchirappalli'), ('kolkatta', 'Kolkata'),
+                                             ('London, UK', 'London')])
+def test_search_spellings(bundled, query, expected):
+    """Qualified, alternate-name and misspelt autocomplete queries"""
+    assert bundled.search(query, 3)[0]['name'] == expected
+
+def test_search_without_matches(bundled):
+    assert bundled.search('xyzzy') == []
+
+def test_timezones(bundled):
+    """Places carry their zone; bare coordinates use the nearest place"""
+    place = bundled.geocode('Madurai, India')
+    assert place['timezone'] == 'Asia/Kolkata'
+    assert abs(place['latitude'] - 9.93) < 0.05
+
+    assert bundled.timezone_at(13.0, 80.2) == 'Asia/Kolkata'
+    assert bundled.timezone_at(40.7, -74.0) == 'America/New_York'
+
+def test_birth_time_conversion(bundled):
+    """Local birth times convert to UTC with the offset in force at the time"""
+    service = TimezoneService(bundled)
+
+    utc, offset = service.local_to_utc('Asia/Kolkata', datetime(1943, 6, 1, 12, 0))
+    assert offset == 6.5 and utc == datetime(1943, 6, 1, 5, 30)  # Wartime +06:30
+
+    utc, offset = service.local_to_utc('America/New_York', datetime(2021, 11, 7, 1, 30))
+    assert offset == -4.0  # Repeated hour resolves to the earlier instant
+
+    place = service.resolve_birth_moment('Chennai, India', date(1990, 5, 15), time(14, 30))
+    assert place['timezone'] == 'Asia/Kolkata'
+    assert place['birth_time_utc'] == datetime(1990, 5, 15, 9, 0)
+
+def test_concurrent_builds(source, tmp_path):
+    """Builders racing on one index directory all succeed and leave a loadable index"""
+    out_dir = tmp_path / 'index'
+    errors = []
+
+    def build():
+        try:
+            build_index(source, out_dir, include_zone_tab=False)
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+
+    threads = [threading.Thread(target=build) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(GazetteerIndex(out_dir)) == len(ROWS)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['cities.tsv', 'index']
+
+class _FakeNominatim:
+    def __init__(self):
+        self.queries = []
+
+    def geocode(self, query):
+        self.queries.append(query)
+        if query.startswith('springfield'):
+            return SimpleNamespace(latitude=39.7817, longitude=-89.6501)
+        return None
+
+def test_online_fallback(geocoder, monkeypatch):
+    """Places the gazetteer lacks go to Nominatim; its coordinates get a local timezone"""
+    monkeypatch.setattr(settings, 'GEOCODER_ONLINE_FALLBACK', True)
+    service = TimezoneService(geocoder)
+    service._nominatim = _FakeNominatim()
+
+    assert service.geocode_location('Madurai, India')[2] == 'Asia/Kolkata'
+    assert service._nominatim.queries == []
+
+    latitude, longitude, _ = service.geocode_location('Springfield, USA')
+    assert (latitude, longitude) == (39.7817, -89.6501)
+    assert service.geocode_location('Nowhere, Atlantis') is None
+
+def test_online_fallback_disabled(geocoder, monkeypatch):
+    monkeypatch.setattr(settings, 'GEOCODER_ONLINE_FALLBACK', False)
+    service = TimezoneService(geocoder)
+    service._nominatim = _FakeNominatim()
+
+    assert service.geocode_location('Springfield, USA') is None
+    assert service._nominatim.queries == []
+
+def test_online_errors_are_not_cached(geocoder, monkeypatch):
+    """A network failure is reported, and the place is looked up again next time"""
+    monkeypatch.setattr(settings, 'GEOCODER_ONLINE_FALLBACK', True)
+    service = TimezoneService(geocoder)
+    service._nominatim = SimpleNamespace(geocode=lambda query: (_ for _ in ()).throw(OSError('unreachable')))
+
+    with pytest.raises(GeocodingUnavailableError):
+        service.geocode_location('Springfield, USA')
+
+    service._nominatim = _FakeNominatim()
+    assert service.geocode_location('Springfield, USA')[:2] == (39.7817, -89.6501)
+    # Real misses are cached
+    assert service.geocode_location('Nowhere, Atlantis') is None
+    assert service.geocode_location('nowhere,atlantis') is None
+    assert service._nominatim.queries == ['springfield, usa', 'nowhere, atlantis']
+
+def test_online_fallback_is_off_by_default():
+    assert Settings().GEOCODER_ONLINE_FALLBACK is False
+
+def test_online_lookup_runs_off_the_event_loop(geocoder, monkeypatch):
+    """A slow Nominatim call leaves the event loop free; a failed one answers 503"""
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.services.registry import services
+
+    monkeypatch.setattr(settings, 'GEOCODER_ONLINE_FALLBACK', True)
+    service = TimezoneService(geocoder)
+    on_loop = []
+
+    def slow_geocode(query):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        raise OSError('timed out')
+
+    service._nominatim = SimpleNamespace(geocode=slow_geocode)
+    monkeypatch.setitem(services.__dict__, 'timezone_service', service)
+
+    birth = {'name': 'A', 'date_of_birth': '1990-05-15', 'time_of_birth': '14:30:00',
+             'place_of_birth': 'Springfield, USA'}
+    response = TestClient(app).post('/api/calculate-chart', json=birth)
+    assert response.status_code == 503 and response.headers['retry-after'] == '5'
+    assert on_loop == [False]
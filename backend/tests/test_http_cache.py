@@ -0,0 +1,47 @@
+"""
+HTTP caching on the API: ETag matching, conditional chart requests, compressed JSON
+"""
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.utils.http_cache import etag_matches
+
+client = TestClient(app)
+
+BIRTH = {
+    "name": "Test User",
+    "date_of_birth": "1990-05-15",
+    "time_of_birth": "14:30:00",
+    "place_of_birth": "Chennai, India"
+}
+
+def test_etag_matching():
+    """Weak and encoded forms of an ETag match; other tags do not"""
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('W/"abc"', '"abc"')
+    assert etag_matches('"old", "abc-br"', '"abc"')
+    assert etag_matches('*', '"abc"')
+    assert not etag_matches('"abd"', '"abc"')
+    assert not etag_matches(None, '"abc"')
+
+def test_chart_not_modified():
+    """A repeated chart request with its ETag is answered with 304"""
+    etag = client.post('/api/calculate-chart', json=BIRTH).headers['etag']
+
+    repeat = client.post('/api/calculate-chart', json=BIRTH, headers={'If-None-Match': etag})
+    assert repeat.status_code == 304 and repeat.content == b''
+
+    other = client.post('/api/calculate-chart', json={**BIRTH, "time_of_birth": "14:31:00"},
+                        headers={'If-None-Match': etag})
+    assert other.status_code == 200 and other.headers['etag'] != etag
+
+def test_large_json_is_compressed():
+    """Large responses use the best coding the client accepts; small ones are sent as is"""
+    for encoding in ('br', 'gzip'):
+        response = client.get('/api/calendar/monthly-transits', headers={'Accept-Encoding': encoding})
+        assert response.headers['content-encoding'] == encoding
+        assert response.json()
+
+    plain = client.get('/api/calendar/monthly-transits', headers={'Accept-Encoding': 'identity'})
+    assert 'content-encoding' not in plain.headers
+    assert 'content-encoding' not in client.get('/api/health').headers
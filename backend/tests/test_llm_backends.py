@@ -0,0 +1,66 @@
+"""
+LLM backends: the abstract interface, factory selection and the fake backend
+"""
+import pytest
+
+from app.config import settings
+from app.services.llm_backends import (
+    FakeBackend, LlamaCppBackend, LLMBackend, OllamaBackend, OpenAICompatibleBackend, create_backend
+)
+from app.services.ollama_service import OllamaService
+
+def _settings(backend: str, **overrides):
+    return settings.model_copy(update={'LLM_BACKEND': backend, **overrides})
+
+def test_interface_is_abstract():
+    with pytest.raises(TypeError):
+        LLMBackend()
+
+    class Incomplete(LLMBackend):
+        def generate(self, model, prompt, options=None, context=None):
+            return {}
+
+    with pytest.raises(TypeError, match='check_health'):
+        Incomplete()
+
+@pytest.mark.parametrize('name, backend_class', [
+    ('ollama', OllamaBackend),
+    ('openai', OpenAICompatibleBackend),
+    ('llamacpp', LlamaCppBackend),
+    ('fake', FakeBackend),
+    ('FAKE', FakeBackend),
+])
+def test_factory_selects_backend(name, backend_class):
+    """Building a backend does not contact its server"""
+    backend = create_backend(_settings(name))
+    assert isinstance(backend, backend_class)
+    assert backend.name == backend_class.name
+
+def test_factory_passes_settings():
+    openai = create_backend(_settings('openai', OPENAI_BASE_URL='http://llm:9000/', OPENAI_API_KEY='secret'))
+    assert openai.base_url == 'http://llm:9000'
+    assert openai.session.headers['Authorization'] == 'Bearer secret'
+
+    fake = create_backend(_settings('fake', LLM_FAKE_TOKENS=7, LLM_FAKE_TOKENS_PER_SECOND=0))
+    assert (fake.tokens, fake.tokens_per_second) == (7, 0)
+
+def test_unknown_backend():
+    with pytest.raises(ValueError, match='Unknown LLM_BACKEND'):
+        create_backend(_settings('gpt-in-a-box'))
+
+def test_fake_backend_is_deterministic():
+    """Same prompt, same text; requested section headers are echoed"""
+    backend = FakeBackend(tokens=5, tokens_per_second=0)
+    prompt = "Answer each:\n### [CAREER]\n### [HEALTH]"
+    first = backend.generate('llama3', prompt)
+
+    assert first == backend.generate('llama3', prompt)
+    assert first['response'] != backend.generate('llama3', prompt + ' ')['response']
+    assert [part.split('\n')[0] for part in first['response'].split('\n\n')] == ['### [CAREER]', '### [HEALTH]']
+    assert first['eval_count'] == 10 and backend.check_health()
+
+def test_service_uses_selected_backend():
+    """The conftest selects the fake backend, so predictions need no model"""
+    service = OllamaService()
+    assert isinstance(service.backend, FakeBackend)
+    assert OllamaService(backend=FakeBackend(tokens=3, tokens_per_second=0)).backend.tokens == 3
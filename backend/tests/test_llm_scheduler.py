@@ -0,0 +1,88 @@
+"""
+LLM scheduler: slot accounting, priorities, rejection and cancellation
+"""
+import asyncio
+import threading
+
+import pytest
+
+from app.services.llm_scheduler import (
+    LLMScheduler, PRIORITY_BATCH, PRIORITY_INTERACTIVE, QueueFullError
+)
+
+def test_cancelled_caller_keeps_slot_until_generation_ends():
+    """Cancelling a request does not free its slot while its generation still runs"""
+    scheduler = LLMScheduler(max_concurrency=1, max_queue=4)
+    release = threading.Event()
+    running = []
+
+    def generate(name):
+        running.append(name)
+        if name == 'first':
+            release.wait(5)
+        return name
+
+    async def run():
+        first = asyncio.create_task(scheduler.submit(generate, 'first'))
+        while not running:
+            await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+        second = asyncio.create_task(scheduler.submit(generate, 'second'))
+        await asyncio.sleep(0.1)
+        # The cancelled generation is still on the only slot
+        assert scheduler._active == 1 and running == ['first'] and not second.done()
+
+        release.set()
+        assert await asyncio.wait_for(second, 5) == 'second'
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+    assert scheduler._active == 0 and scheduler.queue_depth == 0
+
+def test_priority_order_and_failures():
+    """Waiters are served by priority; a failing call frees its slot"""
+    scheduler = LLMScheduler(max_concurrency=1, max_queue=4)
+    release = threading.Event()
+    order = []
+
+    def generate(name):
+        order.append(name)
+        if name == 'busy':
+            release.wait(5)
+        if name == 'broken':
+            raise RuntimeError('backend down')
+        return name
+
+    async def run():
+        busy = asyncio.create_task(scheduler.submit(generate, 'busy'))
+        await asyncio.sleep(0.05)
+        batch = asyncio.create_task(scheduler.submit(generate, 'batch', priority=PRIORITY_BATCH))
+        broken = asyncio.create_task(scheduler.submit(generate, 'broken'))
+        interactive = asyncio.create_task(scheduler.submit(generate, 'interactive',
+                                                           priority=PRIORITY_INTERACTIVE))
+        await asyncio.sleep(0.05)
+        release.set()
+        return await asyncio.gather(busy, batch, broken, interactive, return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert order == ['busy', 'interactive', 'broken', 'batch']
+    assert isinstance(results[2], RuntimeError)
+    assert scheduler.failed == 1 and scheduler.completed == 3 and scheduler._active == 0
+
+def test_full_queue_rejects():
+    scheduler = LLMScheduler(max_concurrency=1, max_queue=1)
+    release = threading.Event()
+
+    async def run():
+        tasks = [asyncio.create_task(scheduler.submit(release.wait, 5)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(QueueFullError):
+            await scheduler.submit(release.wait, 5)
+        release.set()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+    assert scheduler.rejected == 1
@@ -0,0 +1,80 @@
+"""
+Structured logging: request ID propagation, JSON lines and the queue writer
+"""
+import json
+import logging
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.utils.logging_utils import (JSONFormatter, RequestIdFilter, RequestIdMiddleware,
+                                     configure_logging, request_id_var, shutdown_logging)
+
+class Capture(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.addFilter(RequestIdFilter())
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+def _client(capture: Capture) -> TestClient:
+    app = FastAPI()
+    logger = logging.getLogger('test.request_id')
+    logger.handlers = [capture]
+    logger.setLevel('INFO')
+    logger.propagate = False
+
+    @app.get('/ping')
+    async def ping():
+        logger.info('handled')
+        return {'request_id': request_id_var.get()}
+
+    return TestClient(RequestIdMiddleware(app))
+
+def test_request_id_is_echoed_and_stamped():
+    capture = Capture()
+    response = _client(capture).get('/ping', headers={'X-Request-ID': 'abc-123'})
+
+    assert response.headers['x-request-id'] == 'abc-123'
+    assert response.json() == {'request_id': 'abc-123'}
+    assert capture.records[-1].request_id == 'abc-123'
+    # Reset once the request is done
+    assert request_id_var.get() == '-'
+
+def test_request_id_is_generated():
+    capture = Capture()
+    client = _client(capture)
+    first, second = client.get('/ping'), client.get('/ping')
+
+    assert len(first.headers['x-request-id']) == 32
+    assert first.headers['x-request-id'] != second.headers['x-request-id']
+    assert capture.records[0].request_id == first.headers['x-request-id']
+
+def test_json_formatter_includes_extra_fields():
+    record = logging.LogRecord('app.test', logging.WARNING, __file__, 1, 'took %d ms', (12,), None)
+    record.request_id = 'abc'
+    record.stage = 'natal'
+
+    entry = json.loads(JSONFormatter().format(record))
+    assert entry['message'] == 'took 12 ms' and entry['level'] == 'WARNING'
+    assert entry['request_id'] == 'abc' and entry['stage'] == 'natal'
+    assert 'args' not in entry and 'exception' not in entry
+
+def test_queue_writer_flushes_on_shutdown(capsys):
+    configure_logging('INFO', 'json')
+    try:
+        token = request_id_var.set('req-1')
+        logging.getLogger('app.test').info('queued', extra={'chart': 7})
+        logging.getLogger('app.test').debug('below level')
+        request_id_var.reset(token)
+        shutdown_logging()
+
+        lines = capsys.readouterr().out.strip().split('\n')
+        assert len(lines) == 1
+        entry = json.loads(lines[0])
+        assert (entry['message'], entry['request_id'], entry['chart']) == ('queued', 'req-1', 7)
+    finally:
+        configure_logging(settings.LOG_LEVEL, settings.LOG_FORMAT)
@@ -0,0 +1,68 @@
+"""
+Monthly transits and the sign-change calendar: ingress detection and month bucketing
+"""
+from datetime import date, datetime
+
+import numpy as np
+import pytest
+
+from app.services.comprehensive_transit_service import comprehensive_transit_service
+from app.services.monthly_transit_service import monthly_transit_service
+from app.utils.ingress_utils import find_ingresses
+
+def test_direct_ingress_is_interpolated():
+    """29° -> 31° over one day crosses into Taurus halfway"""
+    jd, from_rasi, to_rasi = find_ingresses([10.0, 11.0, 12.0], [28.0, 29.0, 31.0])
+    assert jd.tolist() == [11.5]
+    assert (from_rasi.tolist(), to_rasi.tolist()) == ([1], [2])
+
+def test_retrograde_and_wraparound():
+    # Retrograde back over 30°, then Pisces -> Aries across 360°
+    jd, from_rasi, to_rasi = find_ingresses([0.0, 1.0], [30.5, 29.5])
+    assert jd.tolist() == pytest.approx([0.5]) and (from_rasi[0], to_rasi[0]) == (2, 1)
+
+    jd, from_rasi, to_rasi = find_ingresses([0.0, 1.0], [359.0, 1.0])
+    assert jd.tolist() == pytest.approx([0.5]) and (from_rasi[0], to_rasi[0]) == (12, 1)
+
+def test_no_ingress():
+    jd, from_rasi, to_rasi = find_ingresses(np.arange(5.0), np.linspace(40, 50, 5))
+    assert len(jd) == len(from_rasi) == len(to_rasi) == 0
+
+@pytest.fixture(scope='module')
+def april_may_2024():
+    return monthly_transit_service._compute_monthly_transits(2024, 4, 2)
+
+def test_months_start_on_the_first(april_may_2024):
+    assert [m['start_date'] for m in april_may_2024] == ['2024-04-01', '2024-05-01']
+    assert [m['month'] for m in april_may_2024] == ['April 2024', 'May 2024']
+    for month in april_may_2024:
+        assert len(month['planets']) == 9
+        # The Moon changes sign every two to three days
+        assert 12 <= len(month['moon_transits']) <= 15
+
+def test_sign_changes_fall_inside_their_month(april_may_2024):
+    for month in april_may_2024:
+        prefix = month['start_date'][:7]
+        assert all(change['date'].startswith(prefix) for change in month['sign_changes'])
+        assert month['sign_changes'] == sorted(month['sign_changes'], key=lambda c: (c['date'], c['time']))
+
+    april, may = april_may_2024
+    sun = [c for c in april['sign_changes'] if c['planet'] == 'Sun']
+    assert [(c['from_sign'], c['to_sign']) for c in sun] == [('Pisces', 'Aries')]  # Mesha Sankranti
+    assert sun[0]['date'] in ('2024-04-13', '2024-04-14')
+    assert any(c['planet'] == 'Jupiter' and c['to_sign'] == 'Taurus' for c in may['sign_changes'])
+
+def test_sign_change_calendar_agrees_with_months(april_may_2024):
+    """The yearly calendar and the monthly view report the same Jupiter ingress"""
+    calendar = comprehensive_transit_service.get_sign_changes(2024)
+    assert set(calendar) == {'Jupiter', 'Saturn', 'Rahu_Ketu', 'Uranus', 'Neptune'}
+
+    jupiter = calendar['Jupiter']
+    assert [(c['from_sign'], c['to_sign']) for c in jupiter] == [('Aries', 'Taurus')]
+    monthly = next(c for c in april_may_2024[1]['sign_changes'] if c['planet'] == 'Jupiter')
+    assert datetime.strptime(jupiter[0]['date'], '%B %d, %Y').date() == date.fromisoformat(monthly['date'])
+
+def test_returned_months_are_copies():
+    first = monthly_transit_service.get_monthly_transits(1)
+    first[0]['planets'].clear()
+    assert monthly_transit_service.get_monthly_transits(1)[0]['planets']
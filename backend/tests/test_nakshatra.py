@@ -0,0 +1,24 @@
+"""
+Nakshatra lookups: 13°20' / 3°20' boundaries, planet annotation with pada and star lord
+"""
+from app.utils.nakshatra_utils import NAKSHATRA_NAMES, STAR_LORDS, annotate_nakshatras, get_nakshatra_indices
+
+def test_boundaries():
+    nakshatra_idx, padas = get_nakshatra_indices([0.0, 3.3333, 3.3334, 13.3334, 359.99, 360.0])
+    assert nakshatra_idx.tolist() == [0, 0, 0, 1, 26, 0]
+    assert padas.tolist() == [1, 1, 2, 1, 4, 1]
+
+def test_annotation():
+    """Planet dictionaries gain nakshatra, lord and pada"""
+    planets = {
+        'Moon': {'longitude': 275.5389},  # Uttara Ashadha
+        'Ketu': {'longitude': 125.0},  # Magha
+    }
+    annotate_nakshatras(planets)
+
+    assert planets['Moon']['nakshatra'] == 'Uttara Ashadha'
+    assert planets['Moon']['nakshatra_lord'] == 'Sun'
+    assert planets['Moon']['pada'] == 3
+    assert planets['Ketu']['nakshatra'] == 'Magha'
+    assert planets['Ketu']['nakshatra_lord'] == 'Ketu'
+    assert len(NAKSHATRA_NAMES) == len(STAR_LORDS) == 27
@@ -0,0 +1,49 @@
+"""
+Panchangam: daily values, year slicing and request validation
+"""
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.panchangam_service import panchangam_service
+
+client = TestClient(app)
+
+CHENNAI = {'latitude': 13.0827, 'longitude': 80.2707, 'timezone': 'Asia/Kolkata'}
+
+def test_full_moon_in_chennai():
+    """Paush Purnima 2024 fell on 25 January"""
+    days = panchangam_service.get_panchangam(date(2024, 1, 24), date(2024, 1, 26), 13.0827, 80.2707)
+    assert [d['date'] for d in days] == ['2024-01-24', '2024-01-25', '2024-01-26']
+    assert [d['tithi_name'] for d in days] == ['Chaturdashi', 'Purnima', 'Pratipada']
+    assert [d['paksha'] for d in days] == ['Shukla', 'Shukla', 'Krishna']
+    assert days[1]['vara'] == 'Thursday'
+    assert '06:30:00' < days[1]['sunrise'] < '06:45:00'
+
+def test_range_across_years():
+    days = panchangam_service.get_panchangam(date(2023, 12, 30), date(2024, 1, 2), 13.0827, 80.2707)
+    assert [d['date'] for d in days] == ['2023-12-30', '2023-12-31', '2024-01-01', '2024-01-02']
+
+def test_endpoint():
+    params = {**CHENNAI, 'start': '2024-01-01', 'end': '2024-01-31'}
+    response = client.get('/api/panchangam', params=params)
+    assert response.status_code == 200
+    body = response.json()
+    assert body['timezone'] == 'Asia/Kolkata' and len(body['days']) == 31
+
+    repeat = client.get('/api/panchangam', params=params, headers={'If-None-Match': response.headers['etag']})
+    assert repeat.status_code == 304
+
+@pytest.mark.parametrize('params, message', [
+    ({'timezone': 'Mars/Olympus_Mons'}, 'Unknown timezone'),
+    ({'start': '2024-02-01', 'end': '2024-01-01'}, 'before start'),
+    ({'start': '2024-01-01', 'end': '2025-12-31'}, 'limited to'),
+])
+def test_bad_requests(params, message):
+    """Invalid input is a 400 with a reason, not a server error"""
+    query = {**CHENNAI, 'start': '2024-01-01', 'end': '2024-01-07', **params}
+    response = client.get('/api/panchangam', params=query)
+    assert response.status_code == 400
+    assert message in response.json()['detail']
@@ -0,0 +1,86 @@
+"""
+Sampling profiler middleware: token gate, output formats, stored profiles, compute threads
+"""
+import time
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.services.compute_pool import ComputePool
+from app.utils.profiler import ProfilerMiddleware
+
+TOKEN = 'secret'
+
+def calculate():
+    deadline = time.perf_counter() + 0.05
+    while time.perf_counter() < deadline:
+        pass
+    return 42
+
+def _app(**kwargs) -> TestClient:
+    app = FastAPI()
+    pool = ComputePool('thread', workers=1)
+
+    @app.get('/busy')
+    async def busy():
+        # Spin on the event-loop thread
+        deadline = time.perf_counter() + 0.05
+        while time.perf_counter() < deadline:
+            pass
+        return {'ok': True}
+
+    @app.get('/offloaded')
+    async def offloaded():
+        return {'result': await pool.run(calculate)}
+
+    return TestClient(ProfilerMiddleware(app, interval_ms=1, **kwargs))
+
+PROFILE = {'X-Profile': '1', 'X-Profile-Token': TOKEN}
+
+def test_not_profiled_without_a_matching_token():
+    assert _app(token='').get('/busy', headers=PROFILE).json() == {'ok': True}
+    assert _app(token=TOKEN).get('/busy', headers={**PROFILE, 'X-Profile-Token': 'guess'}).json() == {'ok': True}
+    assert _app(token=TOKEN).get('/busy').json() == {'ok': True}
+
+def test_speedscope_profile():
+    response = _app(token=TOKEN).get('/busy', headers=PROFILE)
+    assert response.headers['x-profiled-status'] == '200'
+
+    profile = response.json()
+    sampled = profile['profiles'][0]
+    assert profile['name'] == 'GET /busy' and sampled['type'] == 'sampled'
+    assert len(sampled['samples']) == len(sampled['weights']) > 5
+    names = {frame['name'] for frame in profile['shared']['frames']}
+    assert 'busy' in names
+
+def test_collapsed_stacks_by_query():
+    response = _app(token=TOKEN).get('/busy', params={'profile': '1', 'profile_token': TOKEN,
+                                                      'profile_format': 'collapsed'})
+    assert response.headers['content-type'].startswith('text/plain')
+    lines = response.text.strip().split('\n')
+    assert any('busy (test_profiler.py' in line for line in lines)
+    assert all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
+
+def test_stored_profile_passes_response_through(tmp_path):
+    response = _app(token=TOKEN, output_dir=str(tmp_path)).get('/busy', headers=PROFILE)
+    assert response.json() == {'ok': True}
+
+    stored = Path(response.headers['x-profile-file'])
+    assert stored.parent == tmp_path and stored.name.endswith('-busy.speedscope.json')
+    assert stored.stat().st_size > 0
+
+def test_compute_threads_are_sampled():
+    """Calculations handed to the compute pool appear in their own thread's profile"""
+    response = _app(token=TOKEN).get('/offloaded', headers=PROFILE)
+    profile = response.json()
+    frames = profile['shared']['frames']
+    by_thread = {p['name']: {frames[i]['name'] for stack in p['samples'] for i in stack}
+                 for p in profile['profiles']}
+
+    compute = [name for name in by_thread if name.startswith('compute')]
+    assert len(compute) == 1 and 'calculate' in by_thread[compute[0]]
+    assert 'calculate' not in by_thread['event loop']
+
+    collapsed = _app(token=TOKEN).get('/offloaded', headers={**PROFILE, 'X-Profile-Format': 'collapsed'}).text
+    assert any(line.startswith('compute') and ';calculate (' in line for line in collapsed.splitlines())
@@ -0,0 +1,74 @@
+"""
+Service registry: lazy imports on first use, overrides and a light API import
+"""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from app.services.registry import ServiceRegistry
+
+BACKEND = Path(__file__).resolve().parents[1]
+
+HEAVY = ['skyfield', 'numpy', 'ollama', 'app.services.chart_calculator',
+         'app.services.ephemeris_service', 'app.services.ollama_service', 'app.services.rules_matcher']
+
+def _fresh_interpreter(code: str) -> dict:
+    """Run code in a new interpreter (this one has imported everything already)"""
+    env = {**os.environ, 'PYTHONPATH': str(BACKEND)}
+    result = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True,
+                            timeout=120, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def test_importing_the_api_loads_no_service():
+    loaded = _fresh_interpreter(f"""
+import json, sys
+import app.main
+from app.services.registry import services
+print(json.dumps({{'modules': [m for m in {HEAVY!r} if m in sys.modules], 'services': services.loaded}}))
+""")
+    assert loaded == {'modules': [], 'services': []}
+
+def test_first_request_loads_only_what_it_uses():
+    loaded = _fresh_interpreter("""
+import json, sys
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.registry import services
+assert TestClient(app).get('/api/places', params={'q': 'chennai', 'limit': 1}).status_code == 200
+print(json.dumps({'skyfield': 'skyfield' in sys.modules, 'services': services.loaded}))
+""")
+    assert loaded == {'skyfield': False, 'services': ['geocoder_service']}
+
+@pytest.fixture
+def plugin(tmp_path, monkeypatch):
+    """Name of a throwaway service module, not imported yet"""
+    (tmp_path / 'registry_plugin.py').write_text("instance = object()\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield 'registry_plugin'
+    sys.modules.pop('registry_plugin', None)
+
+def test_service_is_imported_on_first_use(plugin):
+    registry = ServiceRegistry({'plugin': f'{plugin}:instance'})
+    assert plugin not in sys.modules and registry.loaded == []
+
+    first = registry.plugin
+    assert first is sys.modules[plugin].instance
+    assert registry.get('plugin') is first and registry.loaded == ['plugin']
+
+def test_override_and_unknown_names(plugin):
+    registry = ServiceRegistry({'plugin': f'{plugin}:instance'})
+    stub = object()
+    registry.override('plugin', stub)
+    assert registry.plugin is stub and plugin not in sys.modules
+
+    registry.override('extra', stub)
+    assert registry.loaded == ['plugin', 'extra']
+
+    with pytest.raises(AttributeError):
+        registry.missing
+    with pytest.raises(KeyError):
+        registry.get('missing')
@@ -0,0 +1,122 @@
+"""
+Payloads of the orjson fast-path routes match their documented response models
+
+The chart and prediction routes serialize dicts straight to JSON instead of
+going through FastAPI's response_model validation, so these tests hold
+the payloads to the models in app/schemas.py.
+"""
+from typing import Dict, List
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import BaseModel, TypeAdapter
+
+from app.main import app
+from app.services.llm_backends import FakeBackend
+from app.services.ollama_service import GenerationFailed, OllamaService
+from app.services.registry import services
+from app.schemas import (
+    ChartResponse, MonthlyTransit, MultiPredictionResponse, PredictionResponse,
+    RetrogradePeriods, SignChange
+)
+
+client = TestClient(app)
+
+BIRTH = {
+    "name": "Test User",
+    "date_of_birth": "1990-05-15",
+    "time_of_birth": "14:30:00",
+    "place_of_birth": "Chennai, India"
+}
+
+def _validate(model: type, payload: Dict) -> BaseModel:
+    """Validate against the model and reject fields the model does not document"""
+    assert set(payload) <= set(model.model_fields), set(payload) - set(model.model_fields)
+    return model.model_validate(payload)
+
+@pytest.fixture(scope='module')
+def chart() -> Dict:
+    response = client.post('/api/calculate-chart', json=BIRTH)
+    assert response.status_code == 200
+    return response.json()
+
+def test_calculate_chart(chart):
+    validated = _validate(ChartResponse, chart)
+    assert validated.natal and validated.navamsa and validated.birth_place
+
+def test_calculate_chart_with_calendar():
+    response = client.post('/api/calculate-chart', params={'include_calendar': 'true'}, json=BIRTH)
+    assert response.status_code == 200
+    validated = _validate(ChartResponse, response.json())
+    assert validated.monthly_transits and validated.sign_changes and validated.retrograde_periods
+
+@pytest.mark.parametrize('path, shape', [
+    ('/api/calendar/monthly-transits', List[MonthlyTransit]),
+    ('/api/calendar/sign-changes/2026', Dict[str, List[SignChange]]),
+    ('/api/calendar/retrogrades/2026', List[RetrogradePeriods]),
+])
+def test_calendar_sections(path, shape):
+    """The calendar endpoints serve the sections ChartResponse embeds"""
+    response = client.get(path)
+    assert response.status_code == 200
+    assert TypeAdapter(shape).validate_python(response.json())
+
+def _prediction_request(chart: Dict) -> Dict:
+    return {
+        "name": BIRTH["name"],
+        "natal_chart": chart["natal"],
+        "navamsa_chart": chart["navamsa"],
+        "authority_planet": chart["authority_planet"],
+        "date_of_birth": BIRTH["date_of_birth"],
+        "time_of_birth": BIRTH["time_of_birth"],
+        "place_of_birth": BIRTH["place_of_birth"]
+    }
+
+def test_generate_prediction(chart):
+    response = client.post('/api/generate-prediction', json={**_prediction_request(chart), "category": "career"})
+    assert response.status_code == 200
+    assert _validate(PredictionResponse, response.json()).prediction_text
+
+def test_generate_predictions(chart):
+    response = client.post('/api/generate-predictions',
+                           json={**_prediction_request(chart), "categories": ["career", "health"]})
+    assert response.status_code == 200
+    validated = _validate(MultiPredictionResponse, response.json())
+    assert set(validated.predictions) == {"career", "health"}
+
+def test_failed_categories_are_flagged(chart, monkeypatch):
+    """Error text in place of a reading is listed in 'failed' so clients do not keep it"""
+    def generate(categories, **kwargs):
+        return {'wealth': 'Steady gains.', 'marriage': GenerationFailed('Error: backend down')}
+
+    monkeypatch.setattr(services.ollama_service, 'generate_multi_category_prediction', generate)
+    response = client.post('/api/generate-predictions',
+                           json={**_prediction_request(chart), "categories": ["wealth", "marriage"]})
+    assert response.status_code == 200
+    assert _validate(MultiPredictionResponse, response.json()).failed == ['marriage']
+
+class SkippingBackend(FakeBackend):
+    """Answers every section except HEALTH"""
+
+    def __init__(self):
+        super().__init__(tokens=5, tokens_per_second=0)
+        self.calls = 0
+
+    def generate(self, model, prompt, options=None, context=None):
+        self.calls += 1
+        return super().generate(model, prompt.replace('### [HEALTH]', 'HEALTH'), options, context)
+
+def test_skipped_section_is_not_cached(chart, monkeypatch):
+    """A section the model left out reads 'please try again', so it must not be kept"""
+    backend = SkippingBackend()
+    service = OllamaService(backend=backend)
+    sections = service.split_sections('### [CAREER]\nSteady gains.', ['career', 'health'])
+    assert isinstance(sections['health'], GenerationFailed) and not service.is_cacheable(sections)
+
+    monkeypatch.setitem(services.__dict__, 'ollama_service', service)
+    request = {**_prediction_request(chart), "name": "Skipped Section", "categories": ["career", "health"]}
+    for _ in range(2):
+        response = client.post('/api/generate-predictions', json=request)
+        assert response.status_code == 200
+        assert _validate(MultiPredictionResponse, response.json()).failed == ['health']
+    assert backend.calls == 2
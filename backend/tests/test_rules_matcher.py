@@ -0,0 +1,44 @@
+"""
+Rules matcher: Saram (star lord) rules only match for the chart's star lords
+"""
+import pytest
+
+from app.services.rules_matcher import RulesMatcher
+
+FILLER = ['.'] * 20  # Sections within 15 lines of a better match are dropped
+
+RULES = [
+    'Saram: every planet gives the results of its star lord.',
+    *FILLER,
+    'Saram of Venus brings an early marriage.',
+    *FILLER,
+    'Saram of Ketu brings detachment.',
+    *FILLER,
+]
+
+@pytest.fixture
+def matcher(tmp_path):
+    path = tmp_path / 'rules.txt'
+    path.write_text('\n'.join(RULES), encoding='utf-8')
+    return RulesMatcher(str(path))
+
+def _chart(star_lord: str) -> dict:
+    return {'planets': {'Mars': {'rasi_name': 'Leo', 'nakshatra_lord': star_lord}}}
+
+def test_saram_needs_the_star_lord(matcher):
+    """A bare 'saram' no longer pulls in every Saram rule"""
+    context = matcher.build_context_for_chart(_chart('Venus'))
+    assert 'Saram of Venus' in context
+    assert 'every planet gives' not in context
+    assert 'Saram of Ketu' not in context
+
+def test_matched_rules_follow_the_star_lord(matcher):
+    venus = matcher.build_context_for_chart(_chart('Venus'))
+    ketu = matcher.build_context_for_chart(_chart('Ketu'))
+    assert venus != ketu
+    assert 'Saram of Ketu' in ketu and 'Saram of Venus' not in ketu
+
+def test_paired_keywords_score_only_with_a_partner(matcher):
+    assert 'No specific rules' in matcher.find_relevant_rules([], paired_keywords={'saram': ['jupiter']})
+    matched = matcher.find_relevant_rules([], paired_keywords={'Saram': ['KETU']})
+    assert matched.count('Saram') == 1 and 'Ketu' in matched
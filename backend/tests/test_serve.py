@@ -0,0 +1,106 @@
+"""
+Preforking server: readiness probe, shared socket, worker supervision
+"""
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import routes
+from app.main import app
+from app.serve import bind_socket
+from app.services.warmup import WarmupService
+
+BACKEND = Path(__file__).resolve().parents[1]
+
+client = TestClient(app)
+
+def test_ready_is_503_until_warm(monkeypatch):
+    warmup = WarmupService(steps=[('noop', lambda: None)])
+    monkeypatch.setattr(routes, 'warmup_service', warmup)
+
+    response = client.get('/api/ready')
+    assert response.status_code == 503
+    assert response.json() == {'ready': False, 'started': False, 'steps': {}}
+
+    warmup.run()
+    response = client.get('/api/ready')
+    assert response.status_code == 200 and response.json()['steps']['noop']['ok']
+
+def test_bind_socket_is_inheritable():
+    sock = bind_socket('127.0.0.1', 0)
+    try:
+        assert sock.get_inheritable()
+        assert sock.getsockopt(socket.SOL_SOCKET, socket.SO_ACCEPTCONN)
+    finally:
+        sock.close()
+
+def _get(port: int, path: str):
+    try:
+        with urllib.request.urlopen(f'http://127.0.0.1:{port}{path}', timeout=5) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+    except OSError:
+        return None, None
+
+def _wait_for(condition, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.2)
+    return False
+
+@pytest.fixture
+def server(tmp_path):
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+
+    log = tmp_path / 'serve.log'
+    env = {**os.environ, 'PYTHONPATH': str(BACKEND), 'LOG_FORMAT': 'text'}
+    with open(log, 'w') as out:
+        # Run from the current directory, where the ephemeris kernel lives
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'app.serve', '--host', '127.0.0.1', '--port', str(port),
+             '--workers', '2', '--graceful-timeout', '5'],
+            env=env, stdout=out, stderr=subprocess.STDOUT, start_new_session=True
+        )
+    try:
+        yield process, port, log
+    finally:
+        # The master and any workers left behind by a failed test
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        process.wait()
+
+def test_forked_workers_start_ready(server):
+    """Warm-up runs once in the master, so every worker answers ready immediately"""
+    process, port, log = server
+    assert _wait_for(lambda: _get(port, '/api/ready')[0] is not None), log.read_text()
+
+    for _ in range(4):
+        status, body = _get(port, '/api/ready')
+        assert status == 200 and body['ready'], body
+    assert log.read_text().count('Started worker') == 2
+
+    # HUP replaces both workers without closing the socket
+    process.send_signal(signal.SIGHUP)
+    assert _wait_for(lambda: log.read_text().count('Started worker') == 4, 30), log.read_text()
+    assert _get(port, '/api/health')[0] == 200
+
+    process.send_signal(signal.SIGTERM)
+    assert process.wait(timeout=30) == 0
+    assert _get(port, '/api/health')[0] is None
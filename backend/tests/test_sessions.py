@@ -0,0 +1,78 @@
+"""
+Follow-up sessions: context reuse across custom questions, turn limit, expiry
+"""
+import time
+
+import pytest
+
+from app.config import settings
+from app.services.llm_backends import FakeBackend
+from app.services.ollama_service import GenerationFailed, OllamaService
+from app.utils.ttl_cache import TTLCache
+
+BIRTH = {'name': 'Arun', 'date_of_birth': '1990-05-15', 'time_of_birth': '14:30', 'place_of_birth': 'Chennai'}
+
+def _analysis(sun_rasi: int = 2) -> dict:
+    return {'authority_planet': 'Sun', 'planets': {'Sun': {'rasi': sun_rasi, 'degree': 0.69, 'rasi_name': 'Taurus'}}}
+
+class RecordingBackend(FakeBackend):
+    def __init__(self):
+        super().__init__(tokens=5, tokens_per_second=0)
+        self.calls = []
+
+    def generate(self, model, prompt, options=None, context=None):
+        self.calls.append((prompt, context))
+        return super().generate(model, prompt, options, context)
+
+@pytest.fixture
+def backend():
+    return RecordingBackend()
+
+@pytest.fixture
+def service(backend):
+    return OllamaService(backend=backend)
+
+def _ask(service, question, analysis=None):
+    return service.generate_custom_answer(BIRTH, analysis or _analysis(), {}, '', question, 'custom', 36)
+
+def test_follow_up_reuses_context(service, backend):
+    _ask(service, 'When will I marry?')
+    _ask(service, 'And children?')
+
+    (first_prompt, first_context), (second_prompt, second_context) = backend.calls
+    assert first_context is None and 'Key Planets' in first_prompt
+    assert second_prompt.startswith('FOLLOW-UP QUESTION') and 'Key Planets' not in second_prompt
+    assert second_context == [len(first_prompt)]  # The context FakeBackend returned
+
+def test_sessions_are_per_chart(service, backend):
+    _ask(service, 'When will I marry?')
+    _ask(service, 'When will I marry?', _analysis(sun_rasi=3))
+    assert backend.calls[1][1] is None
+
+def test_turn_limit_starts_afresh(service, backend, monkeypatch):
+    monkeypatch.setattr(settings, 'LLM_SESSION_MAX_TURNS', 2)
+    for question in ('One?', 'Two?', 'Three?'):
+        _ask(service, question)
+    assert [context is None for _, context in backend.calls] == [True, False, True]
+
+def test_failed_generation_keeps_no_session(service, backend, monkeypatch):
+    def broken(*args, **kwargs):
+        raise ConnectionError('refused')
+
+    monkeypatch.setattr(backend, 'generate', broken)
+    answer = _ask(service, 'When will I marry?')
+    assert isinstance(answer, GenerationFailed) and not service.is_cacheable(answer)
+    assert len(service.sessions) == 0
+
+def test_ttl_cache_expiry_and_eviction():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1  # 'a' is now the most recently used
+    cache.set('c', 3)
+    assert cache.get('b') is None and cache.get('a') == 1 and len(cache) == 2
+
+    cache.set('short', 4, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get('short', 'gone') == 'gone'
+    assert cache.pop('a') == 1 and cache.pop('a') is None
@@ -0,0 +1,77 @@
+"""
+Prediction coalescing: identical in-flight requests share one generation
+"""
+import asyncio
+
+import pytest
+
+from app.services.ollama_service import OllamaService
+from app.services.llm_backends import FakeBackend
+from app.utils.single_flight import SingleFlight
+
+def test_identical_calls_run_once():
+    flights = SingleFlight()
+    calls = []
+
+    async def generate():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return 'reading'
+
+    async def run():
+        same = [flights.do('a', generate) for _ in range(5)]
+        return await asyncio.gather(*same, flights.do('b', generate))
+
+    results = asyncio.run(run())
+    assert results == ['reading'] * 6
+    assert len(calls) == 2 and flights.executed == 2 and flights.coalesced == 4
+    assert flights.inflight == 0
+
+def test_errors_are_shared_and_not_remembered():
+    flights = SingleFlight()
+    attempts = []
+
+    async def failing():
+        attempts.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError('backend down')
+
+    async def run():
+        results = await asyncio.gather(flights.do('a', failing), flights.do('a', failing),
+                                       return_exceptions=True)
+        # Finished flights are forgotten, so the next call tries again
+        retry = await asyncio.gather(flights.do('a', failing), return_exceptions=True)
+        return results + retry
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert len(attempts) == 2
+
+def test_cancelled_caller_does_not_cancel_the_others():
+    flights = SingleFlight()
+
+    async def generate():
+        await asyncio.sleep(0.05)
+        return 'reading'
+
+    async def run():
+        first = asyncio.create_task(flights.do('a', generate))
+        second = asyncio.create_task(flights.do('a', generate))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(run()) == 'reading'
+
+def test_fingerprint_covers_what_shapes_the_prompt():
+    service = OllamaService(backend=FakeBackend(tokens_per_second=0))
+    birth = {'name': 'A', 'date_of_birth': '1990-05-15'}
+    planets = {'Sun': {'rasi': 2, 'degree': 0.69, 'nakshatra': 'Krittika'}}
+
+    key = service.prediction_fingerprint(birth, planets, 'career', None)
+    assert key == service.prediction_fingerprint(dict(birth), {'Sun': {'rasi': 2, 'degree': 0.69}}, 'career', '  ')
+    assert key != service.prediction_fingerprint(birth, planets, 'health', None)
+    assert key != service.prediction_fingerprint(birth, planets, 'career', 'When will I marry?')
+    assert key != service.prediction_fingerprint({**birth, 'date_of_birth': '1991-05-15'}, planets, 'career', None)
@@ -0,0 +1,147 @@
+"""
+Tiered cache: shared tier, stampede protection, outages, waiters taking over; the binary codec
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services.chart_calculator import chart_calculator
+from app.utils.binary_codec import pack, unpack
+from app.utils.json_utils import dumps
+from app.utils.redis_protocol import FakeRedisServer, RespClient
+from app.utils.tiered_cache import TieredCache
+
+@pytest.fixture
+def server():
+    server = FakeRedisServer().start()
+    yield server
+    server.stop()
+
+def _workers(server, count=2):
+    return [TieredCache('chart', shared=RespClient(server.url), lock_timeout=10.0) for _ in range(count)]
+
+def test_codec_round_trip():
+    """Chart payloads survive packing and are smaller than their JSON"""
+    natal = chart_calculator.calculate_natal_chart(1990, 5, 15, 9, 0, 0, 13.0827, 80.2707)
+    packed = pack(natal)
+    assert dumps(unpack(packed)) == dumps(natal)
+    assert len(packed) < len(dumps(natal)) / 2
+
+def test_shared_between_workers(server):
+    """A value computed by one worker is a hit for another"""
+    worker_a, worker_b = _workers(server)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {'Sun': {'rasi': 2, 'degree': 0.69}}
+
+    assert worker_a.get_or_compute('natal:1', compute) == worker_b.get_or_compute('natal:1', compute)
+    assert len(calls) == 1 and worker_b.shared_hits == 1
+
+def test_stampede(server):
+    """Concurrent misses on one key compute once across threads and workers"""
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return [1.5, 2.5]
+
+    results = []
+    threads = [threading.Thread(target=lambda cache=cache: results.append(cache.get_or_compute('table', compute)))
+               for cache in _workers(server) * 4]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1 and results == [[1.5, 2.5]] * len(threads)
+
+def test_shared_tier_down():
+    """An unreachable shared tier is skipped; the local tier keeps working"""
+    server = FakeRedisServer()
+    url = server.url
+    server.server_close()  # Nothing listens on the port any more
+
+    cache = TieredCache('chart', shared=RespClient(url))
+    assert cache.get_or_compute('natal:1', lambda: 42) == 42
+    assert cache.get_or_compute('natal:1', lambda: 43) == 42
+    assert not cache.shared_available
+
+def test_uncacheable_result_is_not_stored():
+    cache = TieredCache('prediction')
+
+    async def generate():
+        return "Error: backend down"
+
+    async def run():
+        await cache.aget_or_compute('p1', generate, cacheable=lambda text: not text.startswith('Error'))
+        return cache.get('p1')
+
+    assert asyncio.run(run()) is None
+
+def test_waiter_takes_over_when_holder_fails(server):
+    holder, waiter = _workers(server)
+    holder_started = threading.Event()
+
+    def failing():
+        holder_started.set()
+        time.sleep(0.3)
+        raise RuntimeError("calculation failed")
+
+    def run_holder():
+        with pytest.raises(RuntimeError):
+            holder.get_or_compute('natal:1', failing)
+
+    thread = threading.Thread(target=run_holder)
+    thread.start()
+    holder_started.wait()
+
+    started = time.monotonic()
+    assert waiter.get_or_compute('natal:1', lambda: 42) == 42
+    thread.join()
+
+    # Far below the 10 s lock timeout: the waiter noticed the released lock
+    assert time.monotonic() - started < 2.0
+    assert waiter.misses == 1
+
+def test_async_waiter_takes_over_after_uncacheable_result(server):
+    holder, waiter = _workers(server)
+
+    async def failed():
+        await asyncio.sleep(0.3)
+        return "Error: backend down"
+
+    async def succeeded():
+        return "A reading"
+
+    async def run():
+        first = asyncio.create_task(holder.aget_or_compute('p1', failed, cacheable=lambda text: not text.startswith('Error')))
+        await asyncio.sleep(0.05)  # Let the holder take the lock
+        started = time.monotonic()
+        second = await waiter.aget_or_compute('p1', succeeded)
+        return await first, second, time.monotonic() - started
+
+    first, second, waited = asyncio.run(run())
+    assert first == "Error: backend down"
+    assert second == "A reading"
+    assert waited < 2.0
+
+def test_waiter_gets_holders_value(server):
+    holder, waiter = _workers(server)
+    holder_started = threading.Event()
+
+    def slow():
+        holder_started.set()
+        time.sleep(0.2)
+        return {'Sun': 1}
+
+    thread = threading.Thread(target=lambda: holder.get_or_compute('natal:2', slow))
+    thread.start()
+    holder_started.wait()
+    assert waiter.get_or_compute('natal:2', lambda: {'Sun': 2}) == {'Sun': 1}
+    thread.join()
+    assert waiter.waited == 1 and waiter.misses == 0
@@ -0,0 +1,62 @@
+"""
+Stage timings: Server-Timing header and Prometheus metrics
+"""
+import re
+
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.main import app
+from app.utils.timing import RequestTimer, stage
+
+client = TestClient(app)
+
+BIRTH = {
+    "name": "Test User",
+    "date_of_birth": "1990-05-15",
+    "time_of_birth": "14:30:00",
+    "place_of_birth": "Chennai, India",
+    "latitude": 13.0827,
+    "longitude": 80.2707,
+    "timezone": "Asia/Kolkata"
+}
+
+def _server_timing(response) -> dict:
+    return {name: float(duration) for name, duration in
+            re.findall(r'([\w-]+);dur=([\d.]+)', response.headers['server-timing'])}
+
+def test_server_timing_lists_stages():
+    response = client.post('/api/calculate-chart', json=BIRTH)
+    assert response.status_code == 200
+
+    spans = _server_timing(response)
+    assert {'resolve_place', 'natal', 'serialize', 'total'} <= set(spans)
+    assert spans['total'] >= spans['natal'] > 0
+
+def test_every_response_is_timed():
+    """Even an error response carries the header"""
+    response = client.get('/api/calendar/sign-changes/1800')
+    assert response.status_code == 400
+    assert 'total' in _server_timing(response)
+
+def test_metrics_endpoint():
+    client.post('/api/calculate-chart', json=BIRTH)
+    body = client.get('/metrics').text
+
+    assert 'rajanadi_stage_seconds_bucket{le="0.001",stage="natal"}' in body
+    assert 'route="/api/calculate-chart"' in body
+    assert 'rajanadi_llm_queue_depth' in body
+
+def test_stage_records_failures_too():
+    before = REGISTRY.get_sample_value('rajanadi_stage_seconds_count', {'stage': 'test_failing'}) or 0
+    with pytest.raises(ValueError):
+        with stage('test_failing'):
+            raise ValueError('boom')
+    assert REGISTRY.get_sample_value('rajanadi_stage_seconds_count', {'stage': 'test_failing'}) == before + 1
+
+def test_server_timing_format():
+    timer = RequestTimer()
+    timer.add('natal', 0.01234)
+    timer.add('total', 0.05)
+    assert timer.server_timing() == 'natal;dur=12.3, total;dur=50.0'
@@ -0,0 +1,49 @@
+"""
+Transit feed: house relationships, orbs and block sizing
+"""
+import numpy as np
+
+from app.services.ephemeris_service import EphemerisService
+from app.services.transit_feed_service import transit_feed_service
+
+GRAHAS = EphemerisService.GRAHAS
+
+def _block(natal_longitudes: dict, transit_longitudes: dict, days: int = 3):
+    natal = np.full((1, len(GRAHAS)), 200.0)
+    for name, longitude in natal_longitudes.items():
+        natal[0, GRAHAS.index(name)] = longitude
+    table = np.full((len(GRAHAS), days), 200.0)
+    for name, longitude in transit_longitudes.items():
+        table[GRAHAS.index(name)] = longitude
+    dates = [f'2026-01-0{day + 1}' for day in range(days)]
+    return transit_feed_service._feeds_for_block(natal, dates, table)[0]
+
+def test_house_counted_from_natal_to_transit():
+    """Saturn in Leo (125°) is in the 5th house from a natal Moon in Aries (5°)"""
+    feed = _block({'Moon': 5.0}, {'Saturn': 125.0})
+    hit = next(event for event in feed
+               if event['transit_planet'] == 'Saturn' and event['natal_planet'] == 'Moon')
+    assert hit['type'] == '5th house'
+    assert hit['strength'] == 100
+
+def test_opposite_direction_is_ninth_house():
+    """Saturn in Sagittarius (245°) is in the 9th from a natal Moon in Aries"""
+    feed = _block({'Moon': 5.0}, {'Saturn': 245.0})
+    hit = next(event for event in feed
+               if event['transit_planet'] == 'Saturn' and event['natal_planet'] == 'Moon'
+               and event['kind'] == 'rasi')
+    assert hit['type'] == '9th house'
+
+def test_orb_hit_peaks_at_closest_day():
+    feed = _block({'Moon': 10.0}, {'Jupiter': 0.0})
+    orb = next(event for event in feed if event['kind'] == 'orb'
+               and event['transit_planet'] == 'Jupiter' and event['natal_planet'] == 'Moon')
+    assert orb['strength'] == round(1 - 10 / 15, 2)
+
+def test_block_size_bounds_memory_for_long_ranges():
+    n = len(GRAHAS)
+    for days in (1, 30, 366):
+        batch = transit_feed_service.batch_size(days)
+        assert 1 <= batch <= transit_feed_service.BATCH_SIZE
+        assert batch * n * n * days <= transit_feed_service.MAX_BLOCK_ELEMENTS
+    assert transit_feed_service.batch_size(366) < transit_feed_service.batch_size(30)
@@ -0,0 +1,71 @@
+"""
+Warm-up: steps run once, failures leave the process not ready, caches end up hot
+"""
+import threading
+from datetime import datetime
+
+from app.services.registry import services
+from app.services.shared_sections import SharedSectionsService
+from app.services.warmup import TRANSIT_SNAPSHOT_DAYS, WarmupService
+
+def test_steps_run_once_in_order():
+    calls = []
+    warmup = WarmupService(steps=[('first', lambda: calls.append('first')),
+                                  ('second', lambda: calls.append('second'))])
+    assert warmup.status() == {'ready': False, 'started': False, 'steps': {}}
+
+    assert warmup.run() is True
+    assert warmup.run() is True
+    assert calls == ['first', 'second']
+
+    status = warmup.status()
+    assert status['ready'] and status['started']
+    assert list(status['steps']) == ['first', 'second']
+    assert all(step['ok'] and step['seconds'] >= 0 for step in status['steps'].values())
+
+def test_failed_step_is_reported_and_the_rest_still_run():
+    calls = []
+
+    def missing_kernel():
+        raise FileNotFoundError('de421.bsp')
+
+    warmup = WarmupService(steps=[('ephemeris', missing_kernel),
+                                  ('rules_index', lambda: calls.append('rules_index'))])
+    assert warmup.run() is False
+    assert calls == ['rules_index']
+
+    steps = warmup.status()['steps']
+    assert steps['ephemeris']['ok'] is False and 'de421.bsp' in steps['ephemeris']['error']
+    assert steps['rules_index']['ok'] is True
+    assert warmup.status()['ready'] is False
+
+def test_background_run_starts_once():
+    release = threading.Event()
+    calls = []
+
+    def step():
+        calls.append(1)
+        release.wait(5)
+
+    warmup = WarmupService(steps=[('slow', step)])
+    warmup.start_background()
+    release.set()
+    warmup.start_background()
+    assert warmup.run() is True  # Waits for the background run instead of repeating it
+    assert calls == [1]
+
+def test_default_steps_warm_the_shared_caches(monkeypatch):
+    assert WarmupService().run() is True
+
+    # Served from the caches filled by the warm-up, without recomputing
+    def not_cached(*args):
+        raise AssertionError('computed after warm-up')
+
+    monkeypatch.setattr(services.ephemeris_service, '_compute_transit_table', not_cached)
+    dates, longitudes = services.ephemeris_service.get_transit_table(datetime.utcnow().date(),
+                                                                     TRANSIT_SNAPSHOT_DAYS)
+    assert len(dates) == TRANSIT_SNAPSHOT_DAYS and longitudes.shape == (9, TRANSIT_SNAPSHOT_DAYS)
+
+    hits = SharedSectionsService._sign_changes.cache_info().hits
+    services.shared_sections.sign_changes(datetime.utcnow().year)
+    assert SharedSectionsService._sign_changes.cache_info().hits == hits + 1
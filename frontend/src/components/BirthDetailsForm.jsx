@@ -38,17 +38,18 @@ function BirthDetailsForm({ setChartData }) {
             setSearchingPlaces(true)
 
             try {
-                const response = await axios.get(
-                    `https://nominatim.openstreetmap.org/search?format=json&q=${encodeURIComponent(query)}&limit=8`
-                )
+                // Offline gazetteer on our own backend (no third-party geocoding)
+                const response = await axios.get(`${API_BASE_URL}/places`, {
+                    params: { q: query, limit: 8 }
+                })
 
-                // Deduplicate results based on display_name
+                // Deduplicate results based on label
                 const uniquePlaces = []
                 const seenNames = new Set()
 
-                response.data.forEach(place => {
-                    if (!seenNames.has(place.display_name)) {
-                        seenNames.add(place.display_name)
+                response.data.places.forEach(place => {
+                    if (!seenNames.has(place.label)) {
+                        seenNames.add(place.label)
                         uniquePlaces.push(place)
                     }
                 })
@@ -83,6 +84,10 @@ function BirthDetailsForm({ setChartData }) {
     const handleChange = (e) => {
         if (e.target.name === 'place_of_birth') {
             setIsPlaceSelected(false)
+            // Typed text replaces a selected place; the server geocodes it
+            const { latitude, longitude, timezone, ...rest } = formData
+            setFormData({ ...rest, place_of_birth: e.target.value })
+            return
         }
         setFormData({
             ...formData,
@@ -94,9 +99,10 @@ function BirthDetailsForm({ setChartData }) {
         // Update state with selected place
         setFormData(prev => ({
             ...prev,
-            place_of_birth: place.display_name,
-            latitude: parseFloat(place.lat),
-            longitude: parseFloat(place.lon)
+            place_of_birth: place.label,
+            latitude: place.latitude,
+            longitude: place.longitude,
+            timezone: place.timezone
         }))
         setIsPlaceSelected(true)
         // Clear suggestions and hide them immediately
@@ -116,7 +122,13 @@ function BirthDetailsForm({ setChartData }) {
                 setProgress(prev => Math.min(prev + 10, 90))
             }, 500)
 
-            const response = await axios.post(`${API_BASE_URL}/calculate-chart`, formData)
+            // Year-wide sign changes are shared by every user and cached by the browser for a day
+            const [response, signChanges] = await Promise.all([
+                axios.post(`${API_BASE_URL}/calculate-chart`, formData),
+                axios.get(`${API_BASE_URL}/calendar/sign-changes/${new Date().getFullYear()}`)
+                    .then(res => res.data)
+                    .catch(() => ({}))
+            ])
 
             clearInterval(progressInterval)
             setProgress(100)
@@ -124,6 +136,7 @@ function BirthDetailsForm({ setChartData }) {
             // Store chart data and navigate
             setChartData({
                 ...response.data,
+                sign_changes: signChanges,
                 birthDetails: formData
             })
 
@@ -232,7 +245,7 @@ function BirthDetailsForm({ setChartData }) {
                                                     className="suggestion-item"
                                                 >
                                                     <span className="place-icon">📍</span>
-                                                    <span className="place-name">{place.display_name}</span>
+                                                    <span className="place-name">{place.label}</span>
                                                 </li>
                                             ))}
                                         </ul>
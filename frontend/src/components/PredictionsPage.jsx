@@ -23,19 +23,31 @@ function PredictionsPage({ chartData }) {
     const [loading, setLoading] = useState(false)
     const [customQuestion, setCustomQuestion] = useState('')
     const [progress, setProgress] = useState(0)
+    // All age-appropriate category readings, fetched together on the first click
+    // (failed ones are left out, so the next click retries them)
+    const [categoryPredictions, setCategoryPredictions] = useState(null)
+    const [error, setError] = useState(null)
 
     const generatePrediction = async (category, question = null) => {
+        setSelectedCategory(category)
+
+        setError(null)
+
+        if (!question && categoryPredictions?.[category]) {
+            setPrediction(categoryPredictions[category])
+            return
+        }
+
         setLoading(true)
         setPrediction(null)
         setProgress(0)
-        setSelectedCategory(category)
 
-        try {
-            const progressInterval = setInterval(() => {
-                setProgress(prev => Math.min(prev + 5, 90))
-            }, 800)
+        const progressInterval = setInterval(() => {
+            setProgress(prev => Math.min(prev + 5, 90))
+        }, 800)
 
-            const response = await axios.post(`${API_BASE_URL}/generate-prediction`, {
+        try {
+            const requestBody = {
                 name: chartData.birthDetails.name,
                 natal_chart: chartData.natal,
                 navamsa_chart: chartData.navamsa,
@@ -47,17 +59,39 @@ function PredictionsPage({ chartData }) {
                 date_of_birth: chartData.birthDetails.date_of_birth,
                 time_of_birth: chartData.birthDetails.time_of_birth,
                 place_of_birth: chartData.birthDetails.place_of_birth
-            })
-
+            }
+
+            let predictionText
+            if (question) {
+                const response = await axios.post(`${API_BASE_URL}/generate-prediction`, requestBody)
+                predictionText = response.data.prediction_text
+            } else {
+                const response = await axios.post(`${API_BASE_URL}/generate-predictions`, requestBody)
+                const { predictions, failed = [] } = response.data
+                const succeeded = Object.fromEntries(
+                    Object.entries(predictions).filter(([name]) => !failed.includes(name))
+                )
+                setCategoryPredictions(prev => ({ ...prev, ...succeeded }))
+                if (failed.includes(category)) {
+                    throw new Error(predictions[category])
+                }
+                predictionText = predictions[category]
+            }
+
+            if (!predictionText) {
+                // Not age-appropriate (or not covered): let the single-category endpoint explain
+                const response = await axios.post(`${API_BASE_URL}/generate-prediction`, requestBody)
+                predictionText = response.data.prediction_text
+            }
 
-            clearInterval(progressInterval)
             setProgress(100)
-            setPrediction(response.data.prediction_text)
+            setPrediction(predictionText)
 
         } catch (err) {
             console.error('Prediction error:', err)
-            setPrediction('Error generating prediction. Please try again.')
+            setError('Error generating prediction. Please try again.')
         } finally {
+            clearInterval(progressInterval)
             setLoading(false)
             setTimeout(() => setProgress(0), 1000)
         }
@@ -147,6 +181,13 @@ function PredictionsPage({ chartData }) {
                     </div>
                 )}
 
+                {error && !loading && (
+                    <div className="error-message">
+                        <span className="error-icon">❌</span>
+                        <span>{error}</span>
+                    </div>
+                )}
+
                 {prediction && !loading && (
                     <div className="prediction-result">
                         <div className="prediction-header">